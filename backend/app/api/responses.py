@@ -0,0 +1,45 @@
+"""
+JSON rendering for the API
+
+FastJSONResponse serializes with orjson. Hot read routes return it through render(): their bodies are shaped
+as plain dicts / lists by the route and written out once, instead of being built into models, validated again
+against response_model and encoded by FastAPI. response_model stays on those routes for the OpenAPI schema
+"""
+
+from decimal import Decimal
+from typing import Any, Type
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.config import VALIDATE_RESPONSES
+
+# Aware datetimes as "...Z" like pydantic; numpy values from the aggregation code pass through
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    """Types orjson doesn't serialize natively"""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson (datetimes natively, Decimal as float)"""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+def render(model: Type[BaseModel], content: Any) -> FastJSONResponse:
+    """
+    Response for a route body shaped as model's JSON, skipping response_model validation
+    With VALIDATE_RESPONSES set the body goes through model first, as response_model would
+    """
+    if VALIDATE_RESPONSES:
+        content = model.model_validate(content).model_dump(mode="json", exclude_unset=True)
+    return FastJSONResponse(content)
@@ -1,11 +1,13 @@
 import logging
 from datetime import UTC, datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 
 from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse
 from sqlalchemy import and_, text
 from sqlalchemy.orm import Session
 
+from app.api.responses import FastJSONResponse, render
 from app.database import get_db
 from app.models import PriceHistory1d, PriceHistory1h, PriceHistory1w, PriceHistory5m, PriceHistoryRaw
 from app.schemas import (
@@ -15,7 +17,7 @@ from app.schemas import (
     MarketCapResponse,
     PaginatedResponse,
     PriceChartResponse,
-    PricePoint,
+    SparsePaginatedResponse,
 )
 from app.services import (
     AggregationService,
@@ -25,6 +27,13 @@ from app.services import (
     HistoricalDataService,
     PriceService,
 )
+from app.services.aggregation_service import as_utc, carry_forward
+from app.services.candle_builder import candle_builder
+from app.services.coin_service import LIST_FIELDS, SORT_COLUMNS
+from app.services.exchange_health import exchange_health
+from app.services.pagination import InvalidCursor, PageCursor, decode_cursor, split_page
+from app.services.raw_history import CARRY_FORWARD_LIMIT, POLL_INTERVAL, raw_history_writer
+from app.tasks.startup import get_startup_status
 
 # Configure logger
 logger = logging.getLogger(__name__)
@@ -45,62 +54,213 @@ async def health_check(db: Session = Depends(get_db)):
         return HealthResponse(status="unhealthy", timestamp=datetime.now(UTC).isoformat(), database=f"error: {str(e)}")
 
 
+@router.get("/health/live")
+async def liveness_check():
+    """Liveness probe - the process is up and the event loop is responsive"""
+    startup_status = get_startup_status()
+    return {
+        "status": "alive",
+        "timestamp": datetime.now(UTC).isoformat(),
+        "backfill": startup_status["backfill"],
+    }
+
+
+@router.get("/health/ready")
+async def readiness_check(db: Session = Depends(get_db)):
+    """Readiness probe - startup finished and the database is reachable (backfill may still be running)"""
+    startup_status = get_startup_status()
+
+    try:
+        db.execute(text("SELECT 1"))
+        database = "connected"
+    except Exception as e:
+        database = f"error: {str(e)}"
+
+    ready = startup_status["ready"] and database == "connected"
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "timestamp": datetime.now(UTC).isoformat(),
+        "database": database,
+        "started_at": startup_status["started_at"],
+        "backfill": startup_status["backfill"],
+    }
+
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+
+@router.get("/health/exchanges")
+async def exchange_health_check():
+    """Per-exchange circuit breaker state, latency, error rate and adaptive poll interval"""
+    circuits = exchange_health.snapshot()
+    return {
+        "status": "degraded" if any(c["state"] != "closed" for c in circuits.values()) else "ok",
+        "timestamp": datetime.now(UTC).isoformat(),
+        "exchanges": circuits,
+    }
+
+
 # ==================== COIN ENDPOINTS ====================
 
 
-@router.get("/coins", response_model=PaginatedResponse[CoinResponse])
-async def get_coins(
+def _decode_cursor(cursor: Optional[str]) -> Optional[PageCursor]:
+    """Parse a ?cursor= parameter (400 if it isn't one of ours)"""
+    if not cursor:
+        return None
+    try:
+        after = decode_cursor(cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if after.sort_by not in SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor sort field: {after.sort_by}")
+    return after
+
+
+def _parse_fields(fields: Optional[str]) -> List[str]:
+    """Parse a ?fields= parameter (comma-separated CoinResponse fields; 400 on unknown ones). Empty means all"""
+    if not fields:
+        return list(LIST_FIELDS)
+    requested = list(dict.fromkeys(field.strip() for field in fields.split(",") if field.strip()))
+    unknown = [field for field in requested if field not in LIST_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)} (available: {', '.join(LIST_FIELDS)})"
+        )
+    return requested or list(LIST_FIELDS)
+
+
+# The read routes are plain `def`: their database calls block, so FastAPI runs them in its threadpool instead of
+# stalling the event loop (and every other request) while they wait for a pooled connection
+@router.get("/coins", response_model=Union[PaginatedResponse[CoinResponse], SparsePaginatedResponse])
+def get_coins(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(100, ge=1, le=500, description="Items per page"),
     sort_by: str = Query("market_cap_rank", description="Sort field"),
     sort_desc: bool = Query(False, description="Sort descending"),
     search: Optional[str] = Query(None, description="Search coins by name or symbol"),
+    cursor: Optional[str] = Query(
+        None, description="next_cursor of the previous page (takes the place of page, sort_by and sort_desc)"
+    ),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. symbol,price_usd"),
+    list_format: str = Query(
+        "objects", alias="format", pattern="^(objects|columns)$", description="objects, or columns: one array per field"
+    ),
     db: Session = Depends(get_db),
 ):
-    """Get paginated list of coins"""
+    """
+    Get paginated list of coins
+    With fields or format=columns the page is read as a column projection (SparsePaginatedResponse)
+    """
     coin_service = CoinService(db)
 
+    after = _decode_cursor(cursor)
+    if fields or list_format == "columns":
+        return _sparse_coins(
+            coin_service, _parse_fields(fields), list_format, page, size, sort_by, sort_desc, search, after
+        )
+    if after:
+        page, sort_by, sort_desc = after.page + 1, after.sort_by, after.sort_desc
+    sort_by = coin_service.resolve_sort(sort_by)
+
     # Calculate offset
     skip = (page - 1) * size
+    next_cursor = None
 
     try:
         if search:
-            # Search functionality
-            coins = coin_service.search_coins(search, limit=size)
-            total = len(coins)
+            # Search results in relevance order, paged by offset
+            symbols, total = coin_service.search_page(search, skip, size)
+            coins = coin_service.get_coins_by_symbols(symbols)
+            has_next = skip + size < total
         else:
-            # Regular pagination
-            coins = coin_service.get_coins(skip=skip, limit=size, sort_by=sort_by, sort_desc=sort_desc)
+            # Regular pagination; the extra row tells whether there is a next page
+            coins = coin_service.get_coins(skip=skip, limit=size + 1, sort_by=sort_by, sort_desc=sort_desc, after=after)
+            coins, next_cursor = split_page(coins, size, sort_by, sort_desc, page)
             total = coin_service.get_total_coins()
+            has_next = next_cursor is not None
 
         # Convert to response format
-        coin_responses = []
-        for coin in coins:
-            coin_dict = coin_service.get_coin_with_exchange_pairs(coin.symbol)
-            if coin_dict:
-                coin_responses.append(CoinResponse(**coin_dict))
+        coin_responses = coin_service.get_coins_with_exchange_pairs(coins)
 
         # Calculate pagination info
         total_pages = (total + size - 1) // size
-        has_next = page < total_pages
         has_previous = page > 1
 
-        return PaginatedResponse(
-            items=coin_responses,
-            total=total,
-            page=page,
-            size=size,
-            pages=total_pages,
-            has_next=has_next,
-            has_previous=has_previous,
+        return render(
+            PaginatedResponse[CoinResponse],
+            {
+                "items": coin_responses,
+                "total": total,
+                "page": page,
+                "size": size,
+                "pages": total_pages,
+                "has_next": has_next,
+                "has_previous": has_previous,
+                "next_cursor": next_cursor,
+            },
         )
 
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching coins: {str(e)}")
 
 
+def _sparse_coins(
+    coin_service: CoinService,
+    fields: List[str],
+    list_format: str,
+    page: int,
+    size: int,
+    sort_by: str,
+    sort_desc: bool,
+    search: Optional[str],
+    after: Optional[PageCursor],
+) -> FastJSONResponse:
+    """/coins from a projection of the requested columns, serialized without building CoinResponse models"""
+    if after:
+        page, sort_by, sort_desc = after.page + 1, after.sort_by, after.sort_desc
+    sort_by = coin_service.resolve_sort(sort_by)
+    skip = (page - 1) * size
+    next_cursor = None
+
+    try:
+        if search:
+            # Same paging and totals as the full /coins search, read as a projection
+            symbols, total = coin_service.search_page(search, skip, size)
+            rows = coin_service.get_coin_rows_for_symbols(fields, symbols)
+            has_next = skip + size < total
+        else:
+            rows = coin_service.get_coin_rows(
+                fields, skip=skip, limit=size + 1, sort_by=sort_by, sort_desc=sort_desc, after=after
+            )
+            rows, next_cursor = split_page(rows, size, sort_by, sort_desc, page)
+            total = coin_service.get_total_coins()
+            has_next = next_cursor is not None
+
+        columns = coin_service.coin_columns(rows, fields)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error fetching coins: {str(e)}")
+
+    if list_format == "columns":
+        body = {"fields": fields, "columns": columns}
+    else:
+        body = {"fields": fields, "items": [dict(zip(fields, values)) for values in zip(*columns.values())]}
+    body.update(
+        total=total,
+        page=page,
+        size=size,
+        pages=(total + size - 1) // size,
+        has_next=has_next,
+        has_previous=page > 1,
+        next_cursor=next_cursor,
+    )
+    return render(SparsePaginatedResponse, body)
+
+
 @router.get("/coins/{symbol}", response_model=APIResponse[CoinResponse])
-async def get_coin(symbol: str, db: Session = Depends(get_db)):
+def get_coin(symbol: str, db: Session = Depends(get_db)):
     """Get detailed information for a specific coin"""
     coin_service = CoinService(db)
 
@@ -110,8 +270,14 @@ async def get_coin(symbol: str, db: Session = Depends(get_db)):
         if not coin_data:
             raise HTTPException(status_code=404, detail=f"Coin {symbol.upper()} not found")
 
-        return APIResponse(
-            success=True, data=CoinResponse(**coin_data), message=f"Coin {symbol.upper()} retrieved successfully"
+        return render(
+            APIResponse[CoinResponse],
+            {
+                "success": True,
+                "message": f"Coin {symbol.upper()} retrieved successfully",
+                "data": coin_data,
+                "error": None,
+            },
         )
 
     except HTTPException:
@@ -124,56 +290,66 @@ async def get_coin(symbol: str, db: Session = Depends(get_db)):
 
 
 @router.get("/market-cap", response_model=PaginatedResponse[MarketCapResponse])
-async def get_market_cap_rankings(
+def get_market_cap_rankings(
     page: int = Query(1, ge=1, description="Page number"),
     size: int = Query(100, ge=1, le=500, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (takes the place of page)"),
     db: Session = Depends(get_db),
 ):
     """Get market cap rankings"""
     coin_service = CoinService(db)
 
+    after = _decode_cursor(cursor)
+    if after:
+        if (after.sort_by, after.sort_desc) != ("market_cap_rank", False):
+            raise HTTPException(status_code=400, detail="Cursor was not issued by /market-cap")
+        page = after.page + 1
+
     skip = (page - 1) * size
 
     try:
-        coins = coin_service.get_top_coins_by_market_cap(limit=skip + size)
-
-        # Slice for pagination
-        paginated_coins = coins[skip : skip + size]
+        coins = coin_service.get_top_coins_by_market_cap(limit=size + 1, skip=skip, after=after)
+        coins, next_cursor = split_page(coins, size, "market_cap_rank", False, page)
+        total = coin_service.get_total_market_cap_coins()
 
         # Convert to market cap response format
-        market_cap_responses = []
-        for coin in paginated_coins:
-            if coin.market_cap:
-                market_cap_responses.append(
-                    MarketCapResponse(
-                        rank=coin.market_cap_rank or 0,
-                        symbol=coin.symbol,
-                        name=coin.name or coin.symbol,
-                        price_usd=coin.price_usd or 0,
-                        price_change_24h=coin.price_change_24h,
-                        market_cap=coin.market_cap,
-                        volume_24h_usd=coin.volume_24h_usd,
-                    )
-                )
+        market_cap_responses = [
+            {
+                "rank": coin.market_cap_rank or 0,
+                "symbol": coin.symbol,
+                "name": coin.name or coin.symbol,
+                "price_usd": coin.price_usd or 0,
+                "price_change_24h": coin.price_change_24h,
+                "market_cap": coin.market_cap,
+                "volume_24h_usd": coin.volume_24h_usd,
+            }
+            for coin in coins
+        ]
 
-        total_pages = (len(coins) + size - 1) // size
+        total_pages = (total + size - 1) // size
 
-        return PaginatedResponse(
-            items=market_cap_responses,
-            total=len(coins),
-            page=page,
-            size=size,
-            pages=total_pages,
-            has_next=page < total_pages,
-            has_previous=page > 1,
+        return render(
+            PaginatedResponse[MarketCapResponse],
+            {
+                "items": market_cap_responses,
+                "total": total,
+                "page": page,
+                "size": size,
+                "pages": total_pages,
+                "has_next": next_cursor is not None,
+                "has_previous": page > 1,
+                "next_cursor": next_cursor,
+            },
         )
 
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching market cap data: {str(e)}")
 
 
 @router.get("/trending", response_model=APIResponse[List[CoinResponse]])
-async def get_trending_coins(
+def get_trending_coins(
     limit: int = Query(10, ge=1, le=50, description="Number of trending coins"), db: Session = Depends(get_db)
 ):
     """Get trending coins by volume"""
@@ -182,20 +358,24 @@ async def get_trending_coins(
     try:
         trending_coins = coin_service.get_trending_coins(limit=limit)
 
-        coin_responses = []
-        for coin in trending_coins:
-            coin_dict = coin_service.get_coin_with_exchange_pairs(coin.symbol)
-            if coin_dict:
-                coin_responses.append(CoinResponse(**coin_dict))
+        coin_responses = coin_service.get_coins_with_exchange_pairs(trending_coins)
 
-        return APIResponse(success=True, data=coin_responses, message=f"Retrieved {len(coin_responses)} trending coins")
+        return render(
+            APIResponse[List[CoinResponse]],
+            {
+                "success": True,
+                "message": f"Retrieved {len(coin_responses)} trending coins",
+                "data": coin_responses,
+                "error": None,
+            },
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching trending coins: {str(e)}")
 
 
 @router.get("/gainers", response_model=APIResponse[List[CoinResponse]])
-async def get_biggest_gainers(
+def get_biggest_gainers(
     limit: int = Query(10, ge=1, le=50, description="Number of gainers"), db: Session = Depends(get_db)
 ):
     """Get biggest price gainers in 24h"""
@@ -204,14 +384,16 @@ async def get_biggest_gainers(
     try:
         gainers = coin_service.get_biggest_gainers(limit=limit)
 
-        coin_responses = []
-        for coin in gainers:
-            coin_dict = coin_service.get_coin_with_exchange_pairs(coin.symbol)
-            if coin_dict:
-                coin_responses.append(CoinResponse(**coin_dict))
+        coin_responses = coin_service.get_coins_with_exchange_pairs(gainers)
 
-        return APIResponse(
-            success=True, data=coin_responses, message=f"Retrieved {len(coin_responses)} biggest gainers"
+        return render(
+            APIResponse[List[CoinResponse]],
+            {
+                "success": True,
+                "message": f"Retrieved {len(coin_responses)} biggest gainers",
+                "data": coin_responses,
+                "error": None,
+            },
         )
 
     except Exception as e:
@@ -219,7 +401,7 @@ async def get_biggest_gainers(
 
 
 @router.get("/losers", response_model=APIResponse[List[CoinResponse]])
-async def get_biggest_losers(
+def get_biggest_losers(
     limit: int = Query(10, ge=1, le=50, description="Number of losers"), db: Session = Depends(get_db)
 ):
     """Get biggest price losers in 24h"""
@@ -228,13 +410,17 @@ async def get_biggest_losers(
     try:
         losers = coin_service.get_biggest_losers(limit=limit)
 
-        coin_responses = []
-        for coin in losers:
-            coin_dict = coin_service.get_coin_with_exchange_pairs(coin.symbol)
-            if coin_dict:
-                coin_responses.append(CoinResponse(**coin_dict))
+        coin_responses = coin_service.get_coins_with_exchange_pairs(losers)
 
-        return APIResponse(success=True, data=coin_responses, message=f"Retrieved {len(coin_responses)} biggest losers")
+        return render(
+            APIResponse[List[CoinResponse]],
+            {
+                "success": True,
+                "message": f"Retrieved {len(coin_responses)} biggest losers",
+                "data": coin_responses,
+                "error": None,
+            },
+        )
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching losers: {str(e)}")
@@ -244,7 +430,7 @@ async def get_biggest_losers(
 
 
 @router.get("/coins/{symbol}/chart", response_model=APIResponse[PriceChartResponse])
-async def get_price_chart(
+def get_price_chart(
     symbol: str,
     timeframe: str = Query("7d", description="Timeframe: 5m, 1h, 4h, 1d, 7d, 30d, 1y"),
     exchange: str = Query("average", description="Exchange or 'average'"),
@@ -290,35 +476,38 @@ async def get_price_chart(
 
         # Query the appropriate table
         if table == PriceHistoryRaw:
-            # Raw data - use simple price field
+            # Raw data - use simple price field. Rows are stored on change only, so the last one before the
+            # window is included and every row is carried forward over the polls it skipped
             price_data = (
-                db.query(table)
+                db.query(table.timestamp, table.price_usd, table.volume_24h_usd)
                 .filter(
                     table.symbol == symbol,
                     table.exchange == exchange,
-                    table.timestamp >= start_time,
+                    table.timestamp >= start_time - CARRY_FORWARD_LIMIT,
                 )
                 .order_by(table.timestamp.asc())
                 .all()
             )
 
-            if not price_data:
-                raise HTTPException(status_code=404, detail=f"No price history found for {symbol}")
-
             # Convert raw data to chart format
             chart_data = []
-            for price_point in price_data:
-                chart_data.append(
-                    PricePoint(
-                        timestamp=price_point.timestamp,
-                        price=float(price_point.price_usd),
-                        volume=float(price_point.volume_24h_usd) if price_point.volume_24h_usd else None,
+            for poll_time, polls, price, volume in carry_forward(price_data, start_time, now):
+                for i in range(polls):
+                    chart_data.append(
+                        {
+                            "timestamp": poll_time + i * POLL_INTERVAL,
+                            "price": float(price),
+                            "volume": float(volume) if volume else None,
+                        }
                     )
-                )
+
+            if not chart_data:
+                raise HTTPException(status_code=404, detail=f"No price history found for {symbol}")
         else:
-            # OHLC data - use close price for charts
+            # OHLC data - use close price for charts. Only the columns the chart index covers are read,
+            # so PostgreSQL can answer from the index alone
             price_data = (
-                db.query(table)
+                db.query(table.timestamp, table.price_close, table.volume_sum)
                 .filter(
                     table.symbol == symbol,
                     table.exchange == exchange,
@@ -335,19 +524,23 @@ async def get_price_chart(
             chart_data = []
             for price_point in price_data:
                 chart_data.append(
-                    PricePoint(
-                        timestamp=price_point.timestamp,
-                        price=float(price_point.price_close),
-                        volume=float(price_point.volume_sum) if price_point.volume_sum else None,
-                    )
+                    {
+                        "timestamp": price_point.timestamp,
+                        "price": float(price_point.price_close),
+                        "volume": float(price_point.volume_sum) if price_point.volume_sum else None,
+                    }
                 )
 
-        chart_response = PriceChartResponse(symbol=symbol, exchange=exchange, timeframe=timeframe, data=chart_data)
+        chart_response = {"symbol": symbol, "exchange": exchange, "timeframe": timeframe, "data": chart_data}
 
-        return APIResponse(
-            success=True,
-            data=chart_response,
-            message=f"Retrieved {len(chart_data)} price points for {symbol} ({timeframe})",
+        return render(
+            APIResponse[PriceChartResponse],
+            {
+                "success": True,
+                "message": f"Retrieved {len(chart_data)} price points for {symbol} ({timeframe})",
+                "data": chart_response,
+                "error": None,
+            },
         )
 
     except HTTPException:
@@ -357,7 +550,7 @@ async def get_price_chart(
 
 
 @router.get("/coins/{symbol}/ohlc", response_model=APIResponse[List[Dict]])
-async def get_ohlc_chart(
+def get_ohlc_chart(
     symbol: str,
     timeframe: str = Query("1d", description="Timeframe: 5m, 1h, 1d, 1w"),
     exchange: str = Query("average", description="Exchange or 'average'"),
@@ -397,9 +590,6 @@ async def get_ohlc_chart(
             .all()
         )
 
-        if not ohlc_data:
-            raise HTTPException(status_code=404, detail=f"No OHLC data found for {symbol}")
-
         # Convert to chart format (reverse to get chronological order)
         ohlc_data.reverse()
 
@@ -416,6 +606,25 @@ async def get_ohlc_chart(
                 }
             )
 
+        # Append the live (still open) candle from the tick stream
+        live_candle = candle_builder.get_live_candle(symbol, exchange, timeframe)
+        if live_candle and (not ohlc_data or as_utc(ohlc_data[-1].timestamp) < live_candle["timestamp"]):
+            chart_data.append(
+                {
+                    "timestamp": live_candle["timestamp"].replace(tzinfo=None).isoformat(),
+                    "open": live_candle["open"],
+                    "high": live_candle["high"],
+                    "low": live_candle["low"],
+                    "close": live_candle["close"],
+                    "volume": live_candle["volume"],
+                    "live": True,
+                }
+            )
+            chart_data = chart_data[-limit:]
+
+        if not chart_data:
+            raise HTTPException(status_code=404, detail=f"No OHLC data found for {symbol}")
+
         return APIResponse(
             success=True,
             data=chart_data,
@@ -548,6 +757,7 @@ async def get_system_status(db: Session = Depends(get_db)):
             "recent_price_updates": recent_updates,
             "total_price_records": total_price_records,
             "metadata_stats": metadata_stats,
+            "exchanges": exchange_health.snapshot(),
             "recommendations": recommendations,
             "last_check": datetime.now(UTC).isoformat(),
         }
@@ -622,6 +832,8 @@ async def get_aggregation_stats(db: Session = Depends(get_db)):
     try:
         aggregation_service = AggregationService(db)
         stats = aggregation_service.get_aggregation_stats()
+        stats["live_candles"] = candle_builder.get_stats()
+        stats["raw_history"] = raw_history_writer.get_stats()
 
         return APIResponse(success=True, data=stats, message="Aggregation statistics retrieved successfully")
 
@@ -629,6 +841,50 @@ async def get_aggregation_stats(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Error getting aggregation stats: {str(e)}")
 
 
+@router.post("/admin/aggregation/reaggregate")
+async def reaggregate_time_range(
+    start: datetime = Query(..., description="Start of the range to rebuild (ISO 8601)"),
+    end: Optional[datetime] = Query(None, description="End of the range (defaults to now)"),
+    interval: str = Query("all", description="Interval to rebuild: 5m, 1h, 1d, 1w or 'all'"),
+    symbols: Optional[str] = Query(None, description="Comma-separated symbols (defaults to all with source data)"),
+    background_tasks: BackgroundTasks = BackgroundTasks(),
+    db: Session = Depends(get_db),
+):
+    """
+    Rebuild OHLC aggregates for an arbitrary time range
+    Use this to repair holes left by outages longer than the regular rollup lookback
+    """
+    if interval != "all" and interval not in ("5m", "1h", "1d", "1w"):
+        raise HTTPException(status_code=400, detail="interval must be 5m, 1h, 1d, 1w or 'all'")
+
+    # Naive query datetimes are UTC, like the stored timestamps (comparing naive with aware raises TypeError)
+    start, end = as_utc(start), as_utc(end)
+    if end and end <= start:
+        raise HTTPException(status_code=400, detail="end must be after start")
+
+    try:
+        aggregation_service = AggregationService(db)
+        symbol_list = [symbol.strip().upper() for symbol in symbols.split(",") if symbol.strip()] if symbols else None
+
+        # Run in background - large ranges can take a while
+        background_tasks.add_task(reaggregate_task, aggregation_service, interval, start, end, symbol_list)
+
+        return APIResponse(
+            success=True,
+            data={
+                "operation": "reaggregation_started",
+                "interval": interval,
+                "start": start.isoformat(),
+                "end": end.isoformat() if end else None,
+                "symbols": symbol_list or "all",
+            },
+            message=f"Re-aggregation of {interval} data started in background",
+        )
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error starting re-aggregation: {str(e)}")
+
+
 @router.post("/admin/historical/detect-gaps")
 async def detect_data_gaps(db: Session = Depends(get_db)):
     """
@@ -852,6 +1108,23 @@ async def bulk_backfill_task(service, days_back: str | int, pause_real_time: boo
         logger.error(f"Error in bulk backfill background task: {e}")
 
 
+def reaggregate_task(
+    aggregation_service: AggregationService,
+    interval: str,
+    start: datetime,
+    end: Optional[datetime],
+    symbols: Optional[List[str]],
+):
+    """Background task for range re-aggregation"""
+    try:
+        logger.info(f"Starting re-aggregation background task: {interval} from {start} to {end or 'now'}")
+        result = aggregation_service.reaggregate_range(interval, start, end, symbols=symbols)
+        logger.info(f"Re-aggregation completed: {result}")
+
+    except Exception as e:
+        logger.error(f"Error in re-aggregation background task: {e}")
+
+
 async def gap_fill_task(service):
     """Background task for smart gap filling"""
     try:
@@ -910,7 +1183,7 @@ async def update_metadata(
 
 
 @router.get("/search", response_model=APIResponse[List[CoinResponse]])
-async def search_coins(
+def search_coins(
     q: str = Query(..., min_length=1, description="Search query"),
     limit: int = Query(10, ge=1, le=50, description="Number of results"),
     db: Session = Depends(get_db),
@@ -921,14 +1194,16 @@ async def search_coins(
     try:
         coins = coin_service.search_coins(q, limit=limit)
 
-        coin_responses = []
-        for coin in coins:
-            coin_dict = coin_service.get_coin_with_exchange_pairs(coin.symbol)
-            if coin_dict:
-                coin_responses.append(CoinResponse(**coin_dict))
+        coin_responses = coin_service.get_coins_with_exchange_pairs(coins)
 
-        return APIResponse(
-            success=True, data=coin_responses, message=f"Found {len(coin_responses)} coins matching '{q}'"
+        return render(
+            APIResponse[List[CoinResponse]],
+            {
+                "success": True,
+                "message": f"Found {len(coin_responses)} coins matching '{q}'",
+                "data": coin_responses,
+                "error": None,
+            },
         )
 
     except Exception as e:
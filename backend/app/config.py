@@ -19,12 +19,54 @@ BINANCE_API_URL: str = os.getenv("BINANCE_API_URL", "")
 BINANCE_24HR_URL: str = os.getenv("BINANCE_24HR_URL", "")
 BINANCE_INFO_URL: str = os.getenv("BINANCE_INFO_URL", "")
 
+# Decode Binance / MEXC ticker payloads incrementally, dropping low-volume rows before they are materialized
+STREAM_TICKER_PARSING: bool = os.getenv("STREAM_TICKER_PARSING", "false").lower() in ("1", "true", "yes")
+
+# Exchange polling: per-exchange deadline (must stay below the 30s tick), adaptive interval bounds, circuit breaker
+EXCHANGE_DEADLINE_SECONDS: float = float(os.getenv("EXCHANGE_DEADLINE_SECONDS", "10"))
+EXCHANGE_POLL_SECONDS: float = float(os.getenv("EXCHANGE_POLL_SECONDS", "30"))
+EXCHANGE_MAX_POLL_SECONDS: float = float(os.getenv("EXCHANGE_MAX_POLL_SECONDS", "300"))
+CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "3"))
+CIRCUIT_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_OPEN_SECONDS", "60"))
+CIRCUIT_MAX_OPEN_SECONDS: float = float(os.getenv("CIRCUIT_MAX_OPEN_SECONDS", "900"))
+
+# Raw history is written change-only: a pair's row is skipped while its price and volume move less than these
+# relative epsilons, with a heartbeat row at least every RAW_HISTORY_HEARTBEAT_MINUTES (0 writes every tick)
+RAW_HISTORY_PRICE_EPSILON: float = float(os.getenv("RAW_HISTORY_PRICE_EPSILON", "0.0001"))
+RAW_HISTORY_VOLUME_EPSILON: float = float(os.getenv("RAW_HISTORY_VOLUME_EPSILON", "0.01"))
+RAW_HISTORY_HEARTBEAT_MINUTES: float = float(os.getenv("RAW_HISTORY_HEARTBEAT_MINUTES", "5"))
+
+# Compact history layout: double precision prices and the (symbol, exchange, timestamp) key instead of a surrogate id.
+# Must match the database - run `alembic upgrade compact_history@head` before enabling it (checked at startup)
+COMPACT_HISTORY_SCHEMA: bool = os.getenv("COMPACT_HISTORY_SCHEMA", "false").lower() in ("1", "true", "yes")
+# Compact layout: how long a symbol / exchange the key dictionaries couldn't find is answered as unknown before the
+# table is read again (rows interned by another process show up after at most this long)
+KEY_MISS_TTL_SECONDS: float = float(os.getenv("KEY_MISS_TTL_SECONDS", "60"))
+
+# Coin search (/search, /coins?search=): "memory" (in-process prefix / trigram index) or "pg_trgm" (GIN trigram
+# index on coins, PostgreSQL only - run `alembic upgrade coin_search_trgm@head` first, checked at startup)
+COIN_SEARCH_BACKEND: str = os.getenv("COIN_SEARCH_BACKEND", "memory").lower()
+
+# Hot read routes render pre-shaped dicts straight to JSON with orjson; their response_model only documents them.
+# Set to validate those bodies against the schemas first (development / contract checks)
+VALIDATE_RESPONSES: bool = os.getenv("VALIDATE_RESPONSES", "false").lower() in ("1", "true", "yes")
+
 # Kraken API configuration
 KRAKEN_API_URL: str = os.getenv("KRAKEN_API_URL", "")
 
 # MEXC API configuration
 MEXC_API_URL: str = os.getenv("MEXC_API_URL", "")
 
+# CoinGecko API configuration
+COINGECKO_API_URL: str = os.getenv("COINGECKO_API_URL", "https://api.coingecko.com/api/v3")
+
+# Local cache directory (symbol mappings, API responses)
+CACHE_DIR: str = os.getenv("CACHE_DIR", ".cache")
+
+# On-disk CoinGecko response cache (size cap in MB)
+HTTP_CACHE_ENABLED: bool = os.getenv("HTTP_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+HTTP_CACHE_MAX_MB: int = int(os.getenv("HTTP_CACHE_MAX_MB", "256"))
+
 # Logging configuration
 LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
 
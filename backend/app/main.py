@@ -4,8 +4,14 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .api.responses import FastJSONResponse
 from .api.routes import router as crypto_router
-from .tasks import scheduler, start_scheduler
+from .database import engine
+from .models.key_dictionary import load_history_keys
+from .models.layout import check_schema_layout
+from .services.exchange_metadata import exchange_metadata
+from .services.symbol_mapping_cache import symbol_mapping_cache
+from .tasks import cancel_startup_backfill, mark_ready, scheduler, start_scheduler, start_startup_backfill
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,47 +23,41 @@ async def lifespan(app: FastAPI):
     # Startup sequence
     logger.info("🚀 FastAPI application starting up...")
 
-    try:
-        # 1. First check for data gaps and backfill if needed
-        logger.info("🔍 Checking for historical data gaps...")
-        from .database import SessionLocal
-        from .services.historical_data_service import HistoricalDataService
-
-        db = SessionLocal()
-        try:
-            historical_service = HistoricalDataService(db)
-
-            # Run startup gap check (this will automatically backfill if needed)
-            startup_result = await historical_service.startup_gap_check_and_fill(max_gap_hours=2)
-
-            if startup_result["status"] == "no_action_needed":
-                logger.info("✅ All historical data is current - no backfill needed")
-            elif startup_result["status"] == "gaps_filled":
-                logger.info(f"✅ {startup_result['message']}")
-            else:
-                logger.warning(f"⚠️ Startup gap check: {startup_result}")
+    # Refuse to start when the history layout / search index doesn't match the config (opt-in Alembic branches)
+    check_schema_layout(engine)
 
-        finally:
-            db.close()
+    try:
+        # 1. Load the persisted CoinGecko symbol mapping and exchange pair metadata (refreshed later if stale),
+        #    and the symbol / exchange id dictionaries of the compact history layout
+        symbol_mapping_cache.load()
+        exchange_metadata.load()
+        load_history_keys(engine)
 
-        # 2. Start the scheduler for real-time data
+        # 2. Start the scheduler for real-time data right away
         logger.info("⏰ Starting background scheduler...")
         start_scheduler()
 
+        # 3. Check for data gaps and backfill them in the background (doesn't block serving)
+        start_startup_backfill(max_gap_hours=2)
+
         logger.info("🎉 FastAPI application started successfully!")
         logger.info("📊 Real-time data fetching: ACTIVE")
         logger.info("🔄 Background jobs: RUNNING")
-        logger.info("📈 Historical data: CURRENT")
+        logger.info("📈 Historical data: gap check running in background (see /health/ready)")
 
     except Exception as e:
         logger.error(f"❌ Error during startup: {e}")
         # Continue anyway - don't crash the app
         logger.info("⚠️ Starting with limited functionality...")
 
+    mark_ready()
+
     yield
 
     # Shutdown sequence
     logger.info("🛑 FastAPI application shutting down...")
+    await cancel_startup_backfill()
+
     try:
         scheduler.shutdown()
         logger.info("✅ Background scheduler stopped")
@@ -72,6 +72,7 @@ app = FastAPI(
     description="Comprehensive cryptocurrency price tracking with historical data",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
 # Configure CORS
@@ -0,0 +1,7 @@
+"""
+Database migrations package (Alembic, configured by backend/alembic.ini)
+
+versions/ holds the revisions; online.py has the helpers the history tables need to change without downtime
+(CREATE INDEX CONCURRENTLY, batched data copies). The main line is the `core` branch; optional layouts are
+branches an operator upgrades to explicitly (`compact_history`, `coin_search_trgm`, see alembic.ini)
+"""
@@ -0,0 +1,51 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import engine_from_config, pool
+
+import app.models  # noqa: F401 - registers the tables on Base.metadata
+from app.config import DATABASE_URL
+from app.database import Base
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+# Autogenerate compares against the models as configured (COMPACT_HISTORY_SCHEMA changes the history tables)
+target_metadata = Base.metadata
+
+
+def database_url() -> str:
+    """-x url=... wins over sqlalchemy.url in alembic.ini, which wins over app.config"""
+    return (
+        context.get_x_argument(as_dictionary=True).get("url")
+        or config.get_main_option("sqlalchemy.url")
+        or DATABASE_URL
+    )
+
+
+def run_migrations_offline():
+    """Emit the SQL to stdout (alembic upgrade core@head --sql)"""
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connectable = engine_from_config({"sqlalchemy.url": database_url()}, prefix="sqlalchemy.", poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        # One transaction per revision, so a failed revision doesn't roll back the ones before it
+        context.configure(connection=connection, target_metadata=target_metadata, transaction_per_migration=True)
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
@@ -0,0 +1,86 @@
+"""
+Helpers for changing the history tables while the app keeps writing to them
+
+Revisions run in a transaction; these step outside it where PostgreSQL needs that (CONCURRENTLY can't run in a
+transaction block, and a backfill committed per batch holds its row locks for one batch only)
+"""
+
+import logging
+import time
+from typing import Optional, Sequence
+
+from alembic import op
+from sqlalchemy import text
+
+logger = logging.getLogger("alembic.online")
+
+BATCH_SIZE = 50_000
+
+
+def is_postgresql() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def create_index_concurrently(name: str, table: str, columns: Sequence[str], **kw):
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS (plain CREATE INDEX on other databases)
+    A concurrent build that failed half-way leaves an INVALID index behind, which is dropped and rebuilt
+    """
+    with op.get_context().autocommit_block():
+        _drop_if_invalid(name, table)
+        op.create_index(name, table, columns, if_not_exists=True, postgresql_concurrently=True, **kw)
+
+
+def drop_index_concurrently(name: str, table: str):
+    """DROP INDEX CONCURRENTLY IF EXISTS"""
+    with op.get_context().autocommit_block():
+        op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
+
+
+def _drop_if_invalid(name: str, table: str):
+    if not is_postgresql() or op.get_context().as_sql:
+        return
+    invalid = (
+        op.get_bind()
+        .execute(
+            text("SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"),
+            {"name": name},
+        )
+        .scalar()
+    )
+    if invalid:
+        logger.warning(f"{name}: dropping invalid index left by an interrupted build")
+        op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+
+def run_in_batches(
+    statement: str, table: str, key: str = "id", batch_size: int = BATCH_SIZE, pause: Optional[float] = None
+) -> int:
+    """
+    Run an UPDATE / INSERT ... SELECT / DELETE over a table in key ranges, committing after each one
+    statement restricts itself with `{key} >= :lo AND {key} < :hi`. Rows written after the ranges were
+    computed are left for the revision's final (locked) step. Returns the number of rows touched
+    """
+    context = op.get_context()
+    if context.as_sql:
+        raise RuntimeError(f"Batched copies on {table} need a live database connection (no --sql)")
+
+    touched = 0
+    with context.autocommit_block():
+        connection = op.get_bind()
+        low, high = connection.execute(text(f"SELECT MIN({key}), MAX({key}) FROM {table}")).one()
+        if low is None:
+            return 0
+
+        for lo in range(low, high + 1, batch_size):
+            started = time.perf_counter()
+            touched += connection.execute(text(statement), {"lo": lo, "hi": lo + batch_size}).rowcount
+            logger.info(
+                f"{table}: {min(lo + batch_size, high + 1) - low}/{high + 1 - low} keys "
+                f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+            )
+            if pause:
+                # Lets replicas and autovacuum keep up on big tables
+                time.sleep(pause)
+
+    return touched
@@ -0,0 +1,99 @@
+"""Baseline: the schema create_all built before migrations existed
+
+Revision ID: 0001_baseline
+Revises:
+Create Date: 2026-10-19
+
+Databases that already have these tables: `alembic stamp 0001_baseline`, then `alembic upgrade core@head`
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_baseline"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OHLC_INTERVALS = ("5m", "1h", "1d", "1w")
+
+
+def upgrade() -> None:
+    op.create_table(
+        "coins",
+        sa.Column("symbol", sa.String(20), primary_key=True),
+        sa.Column("name", sa.String(100)),
+        sa.Column("price_usd", sa.Float),
+        sa.Column("price_24h_high", sa.Float),
+        sa.Column("price_24h_low", sa.Float),
+        sa.Column("price_change_1h", sa.Float),
+        sa.Column("price_change_24h", sa.Float),
+        sa.Column("price_change_7d", sa.Float),
+        sa.Column("volume_24h_usd", sa.Float),
+        sa.Column("volume_24h_base", sa.Float),
+        sa.Column("market_cap", sa.Float),
+        sa.Column("circulating_supply", sa.Float),
+        sa.Column("total_supply", sa.Float),
+        sa.Column("max_supply", sa.Float),
+        sa.Column("categories", sa.JSON),
+        sa.Column("market_cap_rank", sa.Integer),
+        sa.Column("exchange_count", sa.Integer),
+        sa.Column("last_updated", sa.DateTime),
+    )
+    op.create_index("idx_market_cap", "coins", ["market_cap"])
+    op.create_index("idx_volume", "coins", ["volume_24h_usd"])
+    op.create_index("idx_last_updated", "coins", ["last_updated"])
+
+    op.create_table(
+        "exchange_pairs",
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("symbol", sa.String(20), sa.ForeignKey("coins.symbol"), nullable=False),
+        sa.Column("exchange", sa.String(20), nullable=False),
+        sa.Column("pair", sa.String(30), nullable=False),
+        sa.Column("quote_currency", sa.String(10), nullable=False),
+        sa.Column("is_active", sa.Boolean),
+        sa.Column("last_seen", sa.DateTime),
+    )
+    op.create_index("idx_exchange_pairs_symbol", "exchange_pairs", ["symbol"])
+    op.create_index("idx_exchange_pairs_exchange", "exchange_pairs", ["exchange"])
+    op.create_index("idx_exchange_pairs_active", "exchange_pairs", ["is_active"])
+
+    op.create_table(
+        "price_history_raw",
+        sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+        sa.Column("symbol", sa.String(20), nullable=False),
+        sa.Column("exchange", sa.String(20), nullable=False),
+        sa.Column("price_usd", sa.DECIMAL(20, 8), nullable=False),
+        sa.Column("volume_24h_usd", sa.DECIMAL(20, 2)),
+        sa.Column("timestamp", sa.DateTime, nullable=False),
+    )
+    op.create_index("idx_price_raw_symbol_time", "price_history_raw", ["symbol", "timestamp"])
+    op.create_index("idx_price_raw_exchange_time", "price_history_raw", ["symbol", "exchange", "timestamp"])
+
+    for interval in OHLC_INTERVALS:
+        table = f"price_history_{interval}"
+        op.create_table(
+            table,
+            sa.Column("id", sa.BigInteger, primary_key=True, autoincrement=True),
+            sa.Column("symbol", sa.String(20), nullable=False),
+            sa.Column("exchange", sa.String(20), nullable=False),
+            sa.Column("price_open", sa.DECIMAL(20, 8), nullable=False),
+            sa.Column("price_close", sa.DECIMAL(20, 8), nullable=False),
+            sa.Column("price_high", sa.DECIMAL(20, 8), nullable=False),
+            sa.Column("price_low", sa.DECIMAL(20, 8), nullable=False),
+            sa.Column("volume_sum", sa.DECIMAL(20, 2)),
+            sa.Column("timestamp", sa.DateTime, nullable=False),
+        )
+        op.create_index(f"idx_price_{interval}_symbol_time", table, ["symbol", "timestamp"])
+        op.create_index(f"idx_price_{interval}_exchange_time", table, ["symbol", "exchange", "timestamp"])
+
+
+def downgrade() -> None:
+    for interval in reversed(OHLC_INTERVALS):
+        op.drop_table(f"price_history_{interval}")
+    op.drop_table("price_history_raw")
+    op.drop_table("exchange_pairs")
+    op.drop_table("coins")
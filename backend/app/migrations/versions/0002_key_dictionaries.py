@@ -0,0 +1,37 @@
+"""Symbol / exchange dictionary tables for the compact history layout
+
+Revision ID: 0002_key_dictionaries
+Revises: 0001_baseline
+Create Date: 2026-10-19
+
+Empty until 0004 (or the app, when COMPACT_HISTORY_SCHEMA=true) interns keys into them
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_key_dictionaries"
+down_revision: Union[str, None] = "0001_baseline"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "symbols",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("symbol", sa.String(20), nullable=False, unique=True),
+    )
+    op.create_table(
+        "exchanges",
+        sa.Column("id", sa.SmallInteger, primary_key=True, autoincrement=True),
+        sa.Column("name", sa.String(20), nullable=False, unique=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("exchanges")
+    op.drop_table("symbols")
@@ -0,0 +1,49 @@
+"""History index plan: covering chart indexes and BRIN / B-tree timestamp indexes
+
+Revision ID: 0003_history_indexes
+Revises: 0002_key_dictionaries
+Create Date: 2026-10-19
+
+Replaces the (symbol, timestamp) and (symbol, exchange, timestamp) B-trees with a (symbol, exchange, timestamp)
+B-tree that INCLUDEs the chart columns, plus a timestamp index (BRIN on the tables written in time order).
+Everything is built / dropped CONCURRENTLY and the new indexes exist before the old ones go, so it runs live
+(see app.models.indexes)
+"""
+
+from typing import Sequence, Union
+
+from app.migrations.online import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_history_indexes"
+down_revision: Union[str, None] = "0002_key_dictionaries"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> (index prefix, chart INCLUDE columns, BRIN timestamp index)
+TABLES = {
+    "price_history_raw": ("idx_price_raw", ["price_usd", "volume_24h_usd"], True),
+    "price_history_5m": ("idx_price_5m", ["price_close", "volume_sum"], True),
+    "price_history_1h": ("idx_price_1h", ["price_close", "volume_sum"], True),
+    "price_history_1d": ("idx_price_1d", ["price_close", "volume_sum"], False),
+    "price_history_1w": ("idx_price_1w", ["price_close", "volume_sum"], False),
+}
+BRIN_OPTIONS = {"postgresql_using": "brin", "postgresql_with": {"pages_per_range": 32}}
+
+
+def upgrade() -> None:
+    for table, (prefix, covered, brin) in TABLES.items():
+        create_index_concurrently(
+            f"{prefix}_chart", table, ["symbol", "exchange", "timestamp"], postgresql_include=covered
+        )
+        create_index_concurrently(f"{prefix}_time", table, ["timestamp"], **(BRIN_OPTIONS if brin else {}))
+        drop_index_concurrently(f"{prefix}_symbol_time", table)
+        drop_index_concurrently(f"{prefix}_exchange_time", table)
+
+
+def downgrade() -> None:
+    for table, (prefix, _, _) in TABLES.items():
+        create_index_concurrently(f"{prefix}_symbol_time", table, ["symbol", "timestamp"])
+        create_index_concurrently(f"{prefix}_exchange_time", table, ["symbol", "exchange", "timestamp"])
+        drop_index_concurrently(f"{prefix}_chart", table)
+        drop_index_concurrently(f"{prefix}_time", table)
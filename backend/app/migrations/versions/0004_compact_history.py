@@ -0,0 +1,196 @@
+"""Compact history layout (opt-in branch `compact_history`) - PostgreSQL only
+
+Revision ID: 0004_compact_history
+Revises: 0003_history_indexes
+Create Date: 2026-10-19
+
+Converts each history table to double precision values, interned symbol_id / exchange_id keys and no surrogate id,
+with the OHLC tables keyed on (symbol_id, exchange_id, timestamp):
+
+1. expand (online): fill the dictionaries, add the new columns (nullable, no default - no table rewrite)
+2. backfill (online): copy into the new columns in id ranges, one commit per batch; drop duplicate OHLC buckets
+3. build the new key / chart index CONCURRENTLY
+4. contract (locked, short): copy the rows written since step 2, drop the old columns, rename the new ones,
+   attach the primary key to the index from step 3. SET NOT NULL scans the table but doesn't rewrite it
+
+Applied only on request: `alembic upgrade compact_history@head`, then deploy the app with
+COMPACT_HISTORY_SCHEMA=true right after step 4 - the old code can't write the new layout (the app refuses to start
+when the setting and the tables disagree). `alembic downgrade compact_history@base` rewrites the tables back in
+place under an exclusive lock (maintenance window)
+"""
+
+import logging
+from typing import Dict, Sequence, Tuple, Union
+
+from alembic import op
+from sqlalchemy import inspect
+
+from app.migrations.online import create_index_concurrently, is_postgresql, run_in_batches
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_compact_history"
+down_revision: Union[str, None] = "0003_history_indexes"
+branch_labels: Union[str, Sequence[str], None] = ("compact_history",)
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger("alembic.compact_history")
+
+RAW_TABLE = "price_history_raw"
+OHLC_TABLES = ("price_history_5m", "price_history_1h", "price_history_1d", "price_history_1w")
+
+# (DECIMAL type, NOT NULL) of the value columns
+PRICE = ("NUMERIC(20, 8)", True)
+VOLUME = ("NUMERIC(20, 2)", False)
+
+# table -> {value column: (DECIMAL type, NOT NULL)}
+VALUE_COLUMNS: Dict[str, Dict[str, Tuple[str, bool]]] = {
+    RAW_TABLE: {"price_usd": PRICE, "volume_24h_usd": VOLUME},
+    **{
+        table: {
+            "price_open": PRICE,
+            "price_close": PRICE,
+            "price_high": PRICE,
+            "price_low": PRICE,
+            "volume_sum": VOLUME,
+        }
+        for table in OHLC_TABLES
+    },
+}
+# Chart index prefix and INCLUDE columns (0003_history_indexes)
+CHART_INDEXES = {
+    RAW_TABLE: ("idx_price_raw", ["price_usd", "volume_24h_usd"]),
+    **{table: (f"idx_price_{table.rsplit('_', 1)[1]}", ["price_close", "volume_sum"]) for table in OHLC_TABLES},
+}
+
+
+def _is_compact(table: str) -> bool:
+    if op.get_context().as_sql:
+        raise RuntimeError("The compact history migration inspects the tables and needs a live connection (no --sql)")
+    return "id" not in {column["name"] for column in inspect(op.get_bind()).get_columns(table)}
+
+
+# ==================== UPGRADE ====================
+
+
+def upgrade() -> None:
+    if not is_postgresql():
+        raise RuntimeError("The compact history migration only supports PostgreSQL")
+
+    for table, values in VALUE_COLUMNS.items():
+        if _is_compact(table):
+            logger.info(f"{table}: already compact, skipping")
+            continue
+        _expand(table, values)
+        _backfill(table, values)
+        _build_key_index(table, values)
+        _contract(table, values)
+
+
+def _intern_keys(table: str, where: str = "") -> None:
+    op.execute(f"INSERT INTO symbols (symbol) SELECT DISTINCT symbol FROM {table} {where} ON CONFLICT DO NOTHING")
+    op.execute(f"INSERT INTO exchanges (name) SELECT DISTINCT exchange FROM {table} {where} ON CONFLICT DO NOTHING")
+
+
+def _copy_set(values: Dict[str, Tuple[str, bool]]) -> str:
+    copies = ", ".join(f"{column}_new = t.{column}" for column in values)
+    return f"symbol_id = s.id, exchange_id = e.id, {copies}"
+
+
+def _expand(table: str, values: Dict[str, Tuple[str, bool]]) -> None:
+    _intern_keys(table)
+    new_columns = ", ".join(f"ADD COLUMN {column}_new double precision" for column in values)
+    op.execute(f"ALTER TABLE {table} ADD COLUMN symbol_id INTEGER, ADD COLUMN exchange_id SMALLINT, {new_columns}")
+
+
+def _backfill(table: str, values: Dict[str, Tuple[str, bool]]) -> None:
+    copied = run_in_batches(
+        f"UPDATE {table} t SET {_copy_set(values)} FROM symbols s, exchanges e "
+        f"WHERE s.symbol = t.symbol AND e.name = t.exchange AND t.id >= :lo AND t.id < :hi",
+        table,
+    )
+    logger.info(f"{table}: backfilled {copied} rows")
+
+    if table != RAW_TABLE:
+        # Keep the newest row of each bucket so the unique key can be built
+        removed = run_in_batches(
+            f"DELETE FROM {table} a USING {table} b WHERE a.symbol = b.symbol AND a.exchange = b.exchange "
+            f"AND a.timestamp = b.timestamp AND a.id < b.id AND a.id >= :lo AND a.id < :hi",
+            table,
+        )
+        logger.info(f"{table}: removed {removed} duplicate buckets")
+
+
+def _build_key_index(table: str, values: Dict[str, Tuple[str, bool]]) -> None:
+    if table == RAW_TABLE:
+        # Chart index on the new columns; the old one goes with the symbol / exchange columns
+        create_index_concurrently(
+            f"{CHART_INDEXES[table][0]}_chart_new",
+            table,
+            ["symbol_id", "exchange_id", "timestamp"],
+            postgresql_include=[f"{column}_new" for column in values],
+        )
+    else:
+        create_index_concurrently(f"{table}_key_new", table, ["symbol_id", "exchange_id", "timestamp"], unique=True)
+
+
+def _contract(table: str, values: Dict[str, Tuple[str, bool]]) -> None:
+    op.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+
+    # Rows the app wrote since the backfill
+    _intern_keys(table, "WHERE symbol_id IS NULL")
+    op.execute(
+        f"UPDATE {table} t SET {_copy_set(values)} FROM symbols s, exchanges e "
+        f"WHERE t.symbol_id IS NULL AND s.symbol = t.symbol AND e.name = t.exchange"
+    )
+
+    drops = ", ".join(f"DROP COLUMN {column}" for column in values)
+    not_nulls = "".join(
+        f", ALTER COLUMN {column}_new SET NOT NULL" for column, (_, required) in values.items() if required
+    )
+    op.execute(
+        f"ALTER TABLE {table} DROP COLUMN id, DROP COLUMN symbol, DROP COLUMN exchange, {drops}, "
+        f"ALTER COLUMN symbol_id SET NOT NULL, ALTER COLUMN exchange_id SET NOT NULL{not_nulls}, "
+        f"ADD CONSTRAINT {table}_symbol_id_fkey FOREIGN KEY (symbol_id) REFERENCES symbols (id) NOT VALID, "
+        f"ADD CONSTRAINT {table}_exchange_id_fkey FOREIGN KEY (exchange_id) REFERENCES exchanges (id) NOT VALID"
+    )
+    for column in values:
+        op.execute(f"ALTER TABLE {table} RENAME COLUMN {column}_new TO {column}")
+
+    if table == RAW_TABLE:
+        prefix = CHART_INDEXES[table][0]
+        op.execute(f"ALTER INDEX {prefix}_chart_new RENAME TO {prefix}_chart")
+    else:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY USING INDEX {table}_key_new")
+
+    # Validating takes a lighter lock than adding a checked foreign key; it runs after the exclusive lock is released
+    with op.get_context().autocommit_block():
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_symbol_id_fkey")
+        op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_exchange_id_fkey")
+
+
+# ==================== DOWNGRADE ====================
+
+
+def downgrade() -> None:
+    if not is_postgresql():
+        return
+
+    for table, values in VALUE_COLUMNS.items():
+        if not _is_compact(table):
+            continue
+        prefix, covered = CHART_INDEXES[table]
+        decimals = ", ".join(f"ALTER COLUMN {column} TYPE {decimal}" for column, (decimal, _) in values.items())
+        drop_key = "" if table == RAW_TABLE else f"DROP CONSTRAINT {table}_pkey, "
+
+        op.execute(f"ALTER TABLE {table} ADD COLUMN symbol VARCHAR(20), ADD COLUMN exchange VARCHAR(20)")
+        op.execute(
+            f"UPDATE {table} t SET symbol = s.symbol, exchange = e.name FROM symbols s, exchanges e "
+            f"WHERE s.id = t.symbol_id AND e.id = t.exchange_id"
+        )
+        # Dropping the id columns drops the compact chart index; the timestamp index is kept
+        op.execute(
+            f"ALTER TABLE {table} {drop_key}DROP COLUMN symbol_id, DROP COLUMN exchange_id, "
+            f"ALTER COLUMN symbol SET NOT NULL, ALTER COLUMN exchange SET NOT NULL, {decimals}, "
+            f"ADD COLUMN id BIGSERIAL PRIMARY KEY"
+        )
+        op.create_index(f"{prefix}_chart", table, ["symbol", "exchange", "timestamp"], postgresql_include=covered)
@@ -0,0 +1,44 @@
+"""Keyset pagination indexes on coins
+
+Revision ID: 0005_coin_sort_indexes
+Revises: 0003_history_indexes
+Create Date: 2026-10-19
+
+First revision of the `core` branch - the main line every deployment upgrades (`alembic upgrade core@head`).
+The optional layouts branch off before it at 0003_history_indexes
+
+/coins and /market-cap page by (sort column, symbol), so each sortable column the lists default to gets a
+(column, symbol) B-tree. The single-column market cap and volume indexes are prefixes of the new ones and go
+"""
+
+from typing import Sequence, Union
+
+from app.migrations.online import create_index_concurrently, drop_index_concurrently
+
+# revision identifiers, used by Alembic.
+revision: str = "0005_coin_sort_indexes"
+down_revision: Union[str, None] = "0003_history_indexes"
+branch_labels: Union[str, Sequence[str], None] = ("core",)
+depends_on: Union[str, Sequence[str], None] = None
+
+# new index -> (sort column, index it replaces)
+SORT_INDEXES = {
+    "idx_coins_rank": ("market_cap_rank", None),
+    "idx_coins_market_cap": ("market_cap", "idx_market_cap"),
+    "idx_coins_volume": ("volume_24h_usd", "idx_volume"),
+    "idx_coins_change_24h": ("price_change_24h", None),
+}
+
+
+def upgrade() -> None:
+    for name, (column, replaced) in SORT_INDEXES.items():
+        create_index_concurrently(name, "coins", [column, "symbol"])
+        if replaced:
+            drop_index_concurrently(replaced, "coins")
+
+
+def downgrade() -> None:
+    for name, (column, replaced) in SORT_INDEXES.items():
+        if replaced:
+            create_index_concurrently(replaced, "coins", [column])
+        drop_index_concurrently(name, "coins")
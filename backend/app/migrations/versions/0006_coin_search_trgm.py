@@ -0,0 +1,42 @@
+"""pg_trgm search index on coins (opt-in branch `coin_search_trgm`) - PostgreSQL only
+
+Revision ID: 0006_coin_search_trgm
+Revises: 0003_history_indexes
+Create Date: 2026-10-19
+
+GIN trigram index on coins (symbol, name) for the SQL search path. The default in-process search index needs
+nothing in the database, so this is applied only on request: `alembic upgrade coin_search_trgm@head`, then set
+COIN_SEARCH_BACKEND=pg_trgm. `alembic downgrade coin_search_trgm@base` drops it again
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.migrations.online import create_index_concurrently, drop_index_concurrently, is_postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0006_coin_search_trgm"
+down_revision: Union[str, None] = "0003_history_indexes"
+branch_labels: Union[str, Sequence[str], None] = ("coin_search_trgm",)
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not is_postgresql():
+        raise RuntimeError("The pg_trgm search index needs PostgreSQL")
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    create_index_concurrently(
+        "idx_coins_search_trgm",
+        "coins",
+        ["symbol", "name"],
+        postgresql_using="gin",
+        postgresql_ops={"symbol": "gin_trgm_ops", "name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    if is_postgresql():
+        # The extension stays: other objects may use it
+        drop_index_concurrently("idx_coins_search_trgm", "coins")
@@ -4,17 +4,21 @@ Database models package
 
 from .models import (
     Coin,
+    Exchange,
     ExchangePair,
     PriceHistory1d,
     PriceHistory1h,
     PriceHistory1w,
     PriceHistory5m,
     PriceHistoryRaw,
+    Symbol,
 )
 
 __all__ = [
     "Coin",
     "ExchangePair",
+    "Symbol",
+    "Exchange",
     "PriceHistoryRaw",
     "PriceHistory5m",
     "PriceHistory1h",
@@ -0,0 +1,60 @@
+"""
+Index strategy for the price history tables (existing databases are moved to it by revision 0003_history_indexes)
+
+Query shapes the indexes are built for:
+- charts, OHLC and price-change lookups: symbol = ?, exchange = ?, timestamp range, ordered by timestamp
+- rollups: symbol IN (...) (or every symbol) over a timestamp range, ordered by symbol, exchange, timestamp
+- cleanup, gap checks and symbol discovery: timestamp range only
+
+So every table gets one (symbol, exchange, timestamp) B-tree that INCLUDEs the columns the chart reads (index-only
+scans on PostgreSQL) and one timestamp index. Tables written in time order get a BRIN timestamp index (a few pages
+instead of a B-tree the size of the table); 1d / 1w are backfilled years into the past, so theirs is a B-tree.
+The old (symbol, timestamp) B-tree is redundant with the covering index (only a handful of exchanges per symbol).
+In the compact layout the OHLC primary key already is that B-tree (without INCLUDE), so it serves the charts alone
+"""
+
+from typing import Dict, NamedTuple, Tuple
+
+from sqlalchemy import Index
+
+from app.config import COMPACT_HISTORY_SCHEMA
+
+
+class HistoryIndexPlan(NamedTuple):
+    prefix: str  # index name prefix, e.g. "idx_price_5m"
+    covered: Tuple[str, ...]  # non-key columns stored in the chart index
+    append_only: bool  # rows arrive in timestamp order -> BRIN instead of a B-tree on timestamp
+
+
+INDEX_PLANS: Dict[str, HistoryIndexPlan] = {
+    "price_history_raw": HistoryIndexPlan("idx_price_raw", ("price_usd", "volume_24h_usd"), True),
+    "price_history_5m": HistoryIndexPlan("idx_price_5m", ("price_close", "volume_sum"), True),
+    "price_history_1h": HistoryIndexPlan("idx_price_1h", ("price_close", "volume_sum"), True),
+    "price_history_1d": HistoryIndexPlan("idx_price_1d", ("price_close", "volume_sum"), False),
+    "price_history_1w": HistoryIndexPlan("idx_price_1w", ("price_close", "volume_sum"), False),
+}
+
+# Name suffixes (after the prefix) of the plan's indexes, and of the earlier indexes it replaces
+PLAN_SUFFIXES = ("chart", "time")
+LEGACY_SUFFIXES = ("symbol_time", "exchange_time")
+
+BRIN_PAGES_PER_RANGE = 32
+
+
+def has_chart_index(table_name: str, compact: bool) -> bool:
+    """Whether the plan adds a covering chart index (not where the compact primary key has the same key columns)"""
+    return not compact or table_name == "price_history_raw"
+
+
+def history_indexes(table_name: str) -> Tuple[Index, ...]:
+    """
+    __table_args__ indexes of a history table. Columns are attribute keys, so they resolve to symbol_id / exchange_id
+    in the compact layout. INCLUDE and BRIN are PostgreSQL options; SQLite gets plain B-trees
+    """
+    plan = INDEX_PLANS[table_name]
+    time_options = {"postgresql_using": "brin", "postgresql_with": {"pages_per_range": BRIN_PAGES_PER_RANGE}}
+    indexes = (Index(f"{plan.prefix}_time", "timestamp", **(time_options if plan.append_only else {})),)
+    if has_chart_index(table_name, COMPACT_HISTORY_SCHEMA):
+        chart = Index(f"{plan.prefix}_chart", "symbol", "exchange", "timestamp", postgresql_include=list(plan.covered))
+        indexes = (chart, *indexes)
+    return indexes
@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import Integer, SmallInteger, TypeDecorator, column, select, table
+from sqlalchemy.engine import Engine
+
+from app.config import COMPACT_HISTORY_SCHEMA, KEY_MISS_TTL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Bound for values the dictionary doesn't know: matches no row, and fails the foreign key on insert
+UNKNOWN_ID = -1
+
+# Misses remembered at most (the negative cache is dropped when full, e.g. under a scan of made-up symbols)
+MAX_REMEMBERED_MISSES = 10000
+
+
+class KeyDictionary:
+    """
+    In-process, bidirectional value <-> integer id map for one lookup table (symbols, exchanges)
+    Loaded once at startup and grown by intern() on the write path, so reads and writes translate keys with a dict
+    lookup instead of a join. New values are inserted on their own connection and committed right away, so an id
+    is never handed out for a row a rolled-back transaction took with it. A lookup that misses reads the row back
+    from the table, since another process (a second worker, an ingest job, a migration) may have interned it.
+    Misses are remembered for KEY_MISS_TTL_SECONDS, so an unknown key costs one read per TTL rather than one per bind
+    """
+
+    def __init__(self, table_name: str, value_column: str, miss_ttl: float = KEY_MISS_TTL_SECONDS):
+        self.table = table(table_name, column("id"), column(value_column))
+        self.value_column = value_column
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._values: Dict[int, str] = {}
+        # Set by load() / intern(); misses are read back through it
+        self._engine: Optional[Engine] = None
+        # ("id", key) / ("value", value) -> monotonic time of the read-back that found nothing
+        self.miss_ttl = miss_ttl
+        self._misses: Dict[Any, float] = {}
+
+    # ==================== LOOKUPS ====================
+
+    def id_for(self, value: str) -> Optional[int]:
+        key = self._ids.get(value)
+        if key is None and self._read_back(("value", value), self.table.c[self.value_column] == value):
+            key = self._ids.get(value)
+        return key
+
+    def value_for(self, key: int) -> Optional[str]:
+        value = self._values.get(key)
+        if value is None and self._read_back(("id", key), self.table.c.id == key):
+            value = self._values.get(key)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    # ==================== LOADING & INTERNING ====================
+
+    def load(self, engine: Engine) -> int:
+        """Replace the map with the whole lookup table (called at startup). Returns the number of entries"""
+        self._engine = engine
+        with engine.connect() as connection:
+            rows = connection.execute(select(self.table.c.id, self.table.c[self.value_column])).all()
+        with self._lock:
+            self._ids.clear()
+            self._values.clear()
+            self._misses.clear()
+        self._remember(rows)
+        logger.info(f"Loaded {len(rows)} {self.table.name} keys")
+        return len(rows)
+
+    def intern(self, engine: Engine, values: Iterable[str]) -> int:
+        """Make sure every value has an id, inserting the missing ones. Returns the number added"""
+        self._engine = engine
+        missing = sorted({value for value in values if value is not None and value not in self._ids})
+        if not missing:
+            return 0
+
+        value_column = self.table.c[self.value_column]
+        with engine.begin() as connection:
+            if engine.dialect.name == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert
+            else:
+                from sqlalchemy.dialects.sqlite import insert
+            connection.execute(
+                insert(self.table).on_conflict_do_nothing(index_elements=[self.value_column]),
+                [{self.value_column: value} for value in missing],
+            )
+            # Another process may have inserted some of them first - read back whatever ids won
+            rows = connection.execute(select(self.table.c.id, value_column).where(value_column.in_(missing))).all()
+
+        self._remember(rows)
+        return len(missing)
+
+    def _read_back(self, miss_key: tuple, condition) -> bool:
+        """
+        Load the entry matching condition from the table (interned elsewhere since load()). False if there is none,
+        without reading again until the miss is miss_ttl old
+        """
+        if self._engine is None:
+            return False
+        missed_at = self._misses.get(miss_key)
+        if missed_at is not None and time.monotonic() - missed_at < self.miss_ttl:
+            return False
+
+        with self._engine.connect() as connection:
+            rows = connection.execute(select(self.table.c.id, self.table.c[self.value_column]).where(condition)).all()
+        if rows:
+            self._remember(rows)
+            return True
+
+        with self._lock:
+            if len(self._misses) >= MAX_REMEMBERED_MISSES:
+                self._misses.clear()
+            self._misses[miss_key] = time.monotonic()
+        return False
+
+    def _remember(self, rows):
+        with self._lock:
+            for key, value in rows:
+                self._ids[value] = key
+                self._values[key] = value
+                self._misses.pop(("id", key), None)
+                self._misses.pop(("value", value), None)
+
+
+class InternedKey(TypeDecorator):
+    """
+    Integer column that reads and writes the string it stands for, translated through a KeyDictionary
+    Queries keep comparing, filtering and inserting symbols / exchange names while the table stores small ints
+    """
+
+    impl = Integer
+    cache_ok = True
+
+    def __init__(self, dictionary: KeyDictionary, impl=Integer):
+        super().__init__()
+        self.impl = impl() if isinstance(impl, type) else impl
+        self.dictionary = dictionary
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, int):
+            return value
+        key = self.dictionary.id_for(value)
+        return UNKNOWN_ID if key is None else key
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self.dictionary.value_for(value)
+
+
+symbol_keys = KeyDictionary("symbols", "symbol")
+exchange_keys = KeyDictionary("exchanges", "name")
+
+
+def SymbolKey() -> InternedKey:
+    return InternedKey(symbol_keys, Integer)
+
+
+def ExchangeKey() -> InternedKey:
+    return InternedKey(exchange_keys, SmallInteger)
+
+
+def load_history_keys(engine: Engine) -> int:
+    """Load both dictionaries at startup (no-op unless the history tables use the compact layout)"""
+    if not COMPACT_HISTORY_SCHEMA:
+        return 0
+    return symbol_keys.load(engine) + exchange_keys.load(engine)
+
+
+def intern_history_keys(engine: Engine, symbols: Iterable[str], exchanges: Iterable[str]):
+    """Assign ids to any new symbols / exchanges before rows using them are written (compact layout only)"""
+    if not COMPACT_HISTORY_SCHEMA:
+        return
+    symbol_keys.intern(engine, symbols)
+    exchange_keys.intern(engine, exchanges)
@@ -0,0 +1,65 @@
+"""
+Startup check that the optional layouts the config selects match the database
+
+COMPACT_HISTORY_SCHEMA and COIN_SEARCH_BACKEND=pg_trgm change the models, while the tables behind them only change
+when an operator applies the matching Alembic branch (compact_history, coin_search_trgm). A mismatch would otherwise
+show up as failing queries long after startup
+"""
+
+import logging
+from typing import List
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+
+from app.config import COIN_SEARCH_BACKEND, COMPACT_HISTORY_SCHEMA
+from app.models.indexes import INDEX_PLANS
+
+logger = logging.getLogger(__name__)
+
+COIN_SEARCH_INDEX = "idx_coins_search_trgm"
+
+
+def layout_mismatches(engine: Engine) -> List[str]:
+    """One message per history table / index that doesn't match the configured layout (empty when all match)"""
+    inspector = inspect(engine)
+    mismatches = []
+
+    # Same test as the compact_history revision: the compact tables have no surrogate id
+    wrong_layout = [
+        table
+        for table in INDEX_PLANS
+        if inspector.has_table(table)
+        and ("id" not in {column["name"] for column in inspector.get_columns(table)}) != COMPACT_HISTORY_SCHEMA
+    ]
+    if wrong_layout:
+        fix = (
+            "alembic upgrade compact_history@head"
+            if COMPACT_HISTORY_SCHEMA
+            else "alembic downgrade compact_history@base"
+        )
+        mismatches.append(
+            f"COMPACT_HISTORY_SCHEMA={'true' if COMPACT_HISTORY_SCHEMA else 'false'} but "
+            f"{', '.join(wrong_layout)} use the other layout (`{fix}`)"
+        )
+
+    if COIN_SEARCH_BACKEND == "pg_trgm" and inspector.has_table("coins"):
+        if COIN_SEARCH_INDEX not in {index["name"] for index in inspector.get_indexes("coins")}:
+            mismatches.append(
+                f"COIN_SEARCH_BACKEND=pg_trgm but coins has no {COIN_SEARCH_INDEX} "
+                f"(`alembic upgrade coin_search_trgm@head`)"
+            )
+
+    return mismatches
+
+
+def check_schema_layout(engine: Engine):
+    """Raise if the database doesn't match the configured layouts (an unreachable database is left to the app)"""
+    try:
+        mismatches = layout_mismatches(engine)
+    except OperationalError as e:
+        logger.warning(f"Could not check the schema layout: {e}")
+        return
+    if mismatches:
+        raise RuntimeError("Database schema doesn't match the configuration: " + "; ".join(mismatches))
@@ -1,8 +1,60 @@
 from datetime import UTC, datetime
 
-from sqlalchemy import DECIMAL, JSON, BigInteger, Boolean, Column, DateTime, Float, ForeignKey, Index, Integer, String
-
+from sqlalchemy import (
+    DECIMAL,
+    JSON,
+    BigInteger,
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+)
+
+from app.config import COIN_SEARCH_BACKEND, COMPACT_HISTORY_SCHEMA
 from app.database import Base
+from app.models.indexes import history_indexes
+from app.models.key_dictionary import ExchangeKey, SymbolKey
+
+# History value columns: NUMERIC is exact but wide on disk and slow to aggregate; the compact layout stores doubles
+# (15-16 significant digits, plenty for prices from 1e-8 to 1e6)
+HistoryPrice = Float(precision=53) if COMPACT_HISTORY_SCHEMA else DECIMAL(20, 8)
+HistoryVolume = Float(precision=53) if COMPACT_HISTORY_SCHEMA else DECIMAL(20, 2)
+
+
+def history_symbol_column(**kwargs) -> Column:
+    """symbol of a history row: a string, or in the compact layout an interned symbols.id read back as the string"""
+    if COMPACT_HISTORY_SCHEMA:
+        return Column("symbol_id", SymbolKey(), ForeignKey("symbols.id"), key="symbol", nullable=False, **kwargs)
+    return Column(String(20), nullable=False, **kwargs)
+
+
+def history_exchange_column(**kwargs) -> Column:
+    """exchange of a history row: a string, or in the compact layout an interned exchanges.id"""
+    if COMPACT_HISTORY_SCHEMA:
+        return Column(
+            "exchange_id", ExchangeKey(), ForeignKey("exchanges.id"), key="exchange", nullable=False, **kwargs
+        )
+    return Column(String(20), nullable=False, **kwargs)
+
+
+def coin_search_indexes() -> tuple:
+    """GIN trigram index behind COIN_SEARCH_BACKEND=pg_trgm (ILIKE '%q%' and similarity on symbol / name)"""
+    if COIN_SEARCH_BACKEND != "pg_trgm":
+        return ()
+    return (
+        Index(
+            "idx_coins_search_trgm",
+            "symbol",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"symbol": "gin_trgm_ops", "name": "gin_trgm_ops"},
+        ),
+    )
 
 
 class Coin(Base):
@@ -44,11 +96,14 @@ class Coin(Base):
     # Timestamps
     last_updated = Column(DateTime, default=lambda: datetime.now(UTC))
 
-    # Indexes for performance
+    # Indexes for performance; the (column, symbol) ones serve keyset pagination of the coin lists
     __table_args__ = (
-        Index("idx_market_cap", "market_cap"),
-        Index("idx_volume", "volume_24h_usd"),
+        Index("idx_coins_rank", "market_cap_rank", "symbol"),
+        Index("idx_coins_market_cap", "market_cap", "symbol"),
+        Index("idx_coins_volume", "volume_24h_usd", "symbol"),
+        Index("idx_coins_change_24h", "price_change_24h", "symbol"),
         Index("idx_last_updated", "last_updated"),
+        *coin_search_indexes(),
     )
 
 
@@ -75,25 +130,50 @@ class ExchangePair(Base):
     )
 
 
+class Symbol(Base):
+    """
+    Symbol dictionary: the compact history layout stores symbols.id instead of the symbol string
+    """
+
+    __tablename__ = "symbols"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    symbol = Column(String(20), nullable=False, unique=True)  # e.g., "BTC"
+
+
+class Exchange(Base):
+    """
+    Exchange dictionary: the compact history layout stores exchanges.id instead of the exchange name
+    """
+
+    __tablename__ = "exchanges"
+
+    id = Column(SmallInteger, primary_key=True, autoincrement=True)
+    name = Column(String(20), nullable=False, unique=True)  # "binance", "kraken", "mexc", "average"
+
+
 class PriceHistoryRaw(Base):
     """
-    Raw price data from exchanges (30-second intervals)
+    Raw price data from exchanges (30-second intervals, written on change)
     Retention: 24 hours
+    The compact layout has no surrogate id - a symbol can have several pairs on one exchange, so
+    (symbol_id, exchange_id, timestamp) isn't unique here and only identifies rows for the ORM
     """
 
     __tablename__ = "price_history_raw"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
-    symbol = Column(String(20), nullable=False)  # e.g., "BTC", "ETH"
-    exchange = Column(String(20), nullable=False)  # "binance", "kraken", "mexc", "average"
-    price_usd = Column(DECIMAL(20, 8), nullable=False)
-    volume_24h_usd = Column(DECIMAL(20, 2))
+    if not COMPACT_HISTORY_SCHEMA:
+        id = Column(BigInteger, primary_key=True, autoincrement=True)
+    symbol = history_symbol_column()  # e.g., "BTC", "ETH"
+    exchange = history_exchange_column()  # "binance", "kraken", "mexc", "average"
+    price_usd = Column(HistoryPrice, nullable=False)
+    volume_24h_usd = Column(HistoryVolume)
     timestamp = Column(DateTime, nullable=False, default=lambda: datetime.now(UTC))
 
-    __table_args__ = (
-        Index("idx_price_raw_symbol_time", "symbol", "timestamp"),
-        Index("idx_price_raw_exchange_time", "symbol", "exchange", "timestamp"),
-    )
+    if COMPACT_HISTORY_SCHEMA:
+        __mapper_args__ = {"primary_key": [symbol, exchange, timestamp]}
+
+    __table_args__ = history_indexes("price_history_raw")
 
 
 class PriceHistory5m(Base):
@@ -104,20 +184,18 @@ class PriceHistory5m(Base):
 
     __tablename__ = "price_history_5m"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
-    symbol = Column(String(20), nullable=False)
-    exchange = Column(String(20), nullable=False)
-    price_open = Column(DECIMAL(20, 8), nullable=False)
-    price_close = Column(DECIMAL(20, 8), nullable=False)
-    price_high = Column(DECIMAL(20, 8), nullable=False)
-    price_low = Column(DECIMAL(20, 8), nullable=False)
-    volume_sum = Column(DECIMAL(20, 2))
-    timestamp = Column(DateTime, nullable=False)  # Window start time
+    if not COMPACT_HISTORY_SCHEMA:
+        id = Column(BigInteger, primary_key=True, autoincrement=True)
+    symbol = history_symbol_column(primary_key=COMPACT_HISTORY_SCHEMA)
+    exchange = history_exchange_column(primary_key=COMPACT_HISTORY_SCHEMA)
+    price_open = Column(HistoryPrice, nullable=False)
+    price_close = Column(HistoryPrice, nullable=False)
+    price_high = Column(HistoryPrice, nullable=False)
+    price_low = Column(HistoryPrice, nullable=False)
+    volume_sum = Column(HistoryVolume)
+    timestamp = Column(DateTime, nullable=False, primary_key=COMPACT_HISTORY_SCHEMA)  # Window start time
 
-    __table_args__ = (
-        Index("idx_price_5m_symbol_time", "symbol", "timestamp"),
-        Index("idx_price_5m_exchange_time", "symbol", "exchange", "timestamp"),
-    )
+    __table_args__ = history_indexes("price_history_5m")
 
 
 class PriceHistory1h(Base):
@@ -128,20 +206,18 @@ class PriceHistory1h(Base):
 
     __tablename__ = "price_history_1h"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
-    symbol = Column(String(20), nullable=False)
-    exchange = Column(String(20), nullable=False)
-    price_open = Column(DECIMAL(20, 8), nullable=False)
-    price_close = Column(DECIMAL(20, 8), nullable=False)
-    price_high = Column(DECIMAL(20, 8), nullable=False)
-    price_low = Column(DECIMAL(20, 8), nullable=False)
-    volume_sum = Column(DECIMAL(20, 2))
-    timestamp = Column(DateTime, nullable=False)
+    if not COMPACT_HISTORY_SCHEMA:
+        id = Column(BigInteger, primary_key=True, autoincrement=True)
+    symbol = history_symbol_column(primary_key=COMPACT_HISTORY_SCHEMA)
+    exchange = history_exchange_column(primary_key=COMPACT_HISTORY_SCHEMA)
+    price_open = Column(HistoryPrice, nullable=False)
+    price_close = Column(HistoryPrice, nullable=False)
+    price_high = Column(HistoryPrice, nullable=False)
+    price_low = Column(HistoryPrice, nullable=False)
+    volume_sum = Column(HistoryVolume)
+    timestamp = Column(DateTime, nullable=False, primary_key=COMPACT_HISTORY_SCHEMA)
 
-    __table_args__ = (
-        Index("idx_price_1h_symbol_time", "symbol", "timestamp"),
-        Index("idx_price_1h_exchange_time", "symbol", "exchange", "timestamp"),
-    )
+    __table_args__ = history_indexes("price_history_1h")
 
 
 class PriceHistory1d(Base):
@@ -152,20 +228,18 @@ class PriceHistory1d(Base):
 
     __tablename__ = "price_history_1d"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
-    symbol = Column(String(20), nullable=False)
-    exchange = Column(String(20), nullable=False)
-    price_open = Column(DECIMAL(20, 8), nullable=False)
-    price_close = Column(DECIMAL(20, 8), nullable=False)
-    price_high = Column(DECIMAL(20, 8), nullable=False)
-    price_low = Column(DECIMAL(20, 8), nullable=False)
-    volume_sum = Column(DECIMAL(20, 2))
-    timestamp = Column(DateTime, nullable=False)
+    if not COMPACT_HISTORY_SCHEMA:
+        id = Column(BigInteger, primary_key=True, autoincrement=True)
+    symbol = history_symbol_column(primary_key=COMPACT_HISTORY_SCHEMA)
+    exchange = history_exchange_column(primary_key=COMPACT_HISTORY_SCHEMA)
+    price_open = Column(HistoryPrice, nullable=False)
+    price_close = Column(HistoryPrice, nullable=False)
+    price_high = Column(HistoryPrice, nullable=False)
+    price_low = Column(HistoryPrice, nullable=False)
+    volume_sum = Column(HistoryVolume)
+    timestamp = Column(DateTime, nullable=False, primary_key=COMPACT_HISTORY_SCHEMA)
 
-    __table_args__ = (
-        Index("idx_price_1d_symbol_time", "symbol", "timestamp"),
-        Index("idx_price_1d_exchange_time", "symbol", "exchange", "timestamp"),
-    )
+    __table_args__ = history_indexes("price_history_1d")
 
 
 class PriceHistory1w(Base):
@@ -176,17 +250,15 @@ class PriceHistory1w(Base):
 
     __tablename__ = "price_history_1w"
 
-    id = Column(BigInteger, primary_key=True, autoincrement=True)
-    symbol = Column(String(20), nullable=False)
-    exchange = Column(String(20), nullable=False)
-    price_open = Column(DECIMAL(20, 8), nullable=False)
-    price_close = Column(DECIMAL(20, 8), nullable=False)
-    price_high = Column(DECIMAL(20, 8), nullable=False)
-    price_low = Column(DECIMAL(20, 8), nullable=False)
-    volume_sum = Column(DECIMAL(20, 2))
-    timestamp = Column(DateTime, nullable=False)
-
-    __table_args__ = (
-        Index("idx_price_1w_symbol_time", "symbol", "timestamp"),
-        Index("idx_price_1w_exchange_time", "symbol", "exchange", "timestamp"),
-    )
+    if not COMPACT_HISTORY_SCHEMA:
+        id = Column(BigInteger, primary_key=True, autoincrement=True)
+    symbol = history_symbol_column(primary_key=COMPACT_HISTORY_SCHEMA)
+    exchange = history_exchange_column(primary_key=COMPACT_HISTORY_SCHEMA)
+    price_open = Column(HistoryPrice, nullable=False)
+    price_close = Column(HistoryPrice, nullable=False)
+    price_high = Column(HistoryPrice, nullable=False)
+    price_low = Column(HistoryPrice, nullable=False)
+    volume_sum = Column(HistoryVolume)
+    timestamp = Column(DateTime, nullable=False, primary_key=COMPACT_HISTORY_SCHEMA)
+
+    __table_args__ = history_indexes("price_history_1w")
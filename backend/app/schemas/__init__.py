@@ -29,6 +29,7 @@ from .schemas import (
     PricePoint,
     # WebSocket schemas
     PriceUpdate,
+    SparsePaginatedResponse,
     # Admin schemas
     SystemStatus,
 )
@@ -38,6 +39,7 @@ __all__ = [
     "APIResponse",
     "PaginationParams",
     "PaginatedResponse",
+    "SparsePaginatedResponse",
     "HealthResponse",
     "ErrorResponse",
     # Coins
@@ -40,6 +40,22 @@ class PaginatedResponse(BaseModel, Generic[T]):
     pages: int
     has_next: bool
     has_previous: bool
+    next_cursor: Optional[str] = None  # pass as ?cursor= for the next page (keyset, no OFFSET scan)
+
+
+class SparsePaginatedResponse(BaseModel):
+    """Paginated coin list with ?fields= or ?format=columns: rows as objects (items) or one array per field (columns)"""
+
+    fields: List[str]
+    items: Optional[List[Dict[str, Any]]] = None
+    columns: Optional[Dict[str, List[Any]]] = None
+    total: int
+    page: int
+    size: int
+    pages: int
+    has_next: bool
+    has_previous: bool
+    next_cursor: Optional[str] = None
 
 
 class HealthResponse(BaseModel):
@@ -3,17 +3,21 @@ Services package initialization
 """
 
 from .aggregation_service import AggregationService
+from .candle_builder import CandleBuilder
 from .coin_service import CoinService
 from .coingecko_service import CoinGeckoService
 from .exchange_service import ExchangeService
 from .historical_data_service import HistoricalDataService
 from .price_service import PriceService
+from .tick_batch import TickBatch
 
 __all__ = [
     "AggregationService",
+    "CandleBuilder",
     "CoinService",
     "CoinGeckoService",
     "ExchangeService",
     "HistoricalDataService",
     "PriceService",
+    "TickBatch",
 ]
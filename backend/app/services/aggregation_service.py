@@ -1,15 +1,81 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import UTC, datetime, timedelta
-from decimal import Decimal
-from typing import Dict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from sqlalchemy import and_, func
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, func, insert, update
+from sqlalchemy.orm import Session, sessionmaker
 
 from app.models import PriceHistory1d, PriceHistory1h, PriceHistory1w, PriceHistory5m, PriceHistoryRaw
+from app.models.key_dictionary import intern_history_keys
+from app.services.raw_history import CARRY_FORWARD_LIMIT, POLL_INTERVAL
 
 logger = logging.getLogger(__name__)
 
+# Rollup chain: interval -> (target table, source table, bucket size, re-aggregation slice size)
+AGGREGATION_INTERVALS = {
+    "5m": (PriceHistory5m, PriceHistoryRaw, timedelta(minutes=5), timedelta(hours=6)),
+    "1h": (PriceHistory1h, PriceHistory5m, timedelta(hours=1), timedelta(days=2)),
+    "1d": (PriceHistory1d, PriceHistory1h, timedelta(days=1), timedelta(days=60)),
+    "1w": (PriceHistory1w, PriceHistory1d, timedelta(weeks=1), timedelta(weeks=52)),
+}
+
+
+def as_utc(timestamp: Optional[datetime]) -> Optional[datetime]:
+    """Treat naive timestamps read back from the database as UTC"""
+    if timestamp is not None and timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=UTC)
+    return timestamp
+
+
+def floor_timestamp(timestamp: datetime, bucket_size: timedelta) -> datetime:
+    """Round a timestamp down to the start of its bucket (weekly buckets start on Monday)"""
+    timestamp = as_utc(timestamp)
+    if bucket_size == timedelta(weeks=1):
+        day = timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+        return day - timedelta(days=day.weekday())
+    epoch = datetime(1970, 1, 1, tzinfo=UTC)
+    return timestamp - (timestamp - epoch) % bucket_size
+
+
+def _ceil_div(span: timedelta, step: timedelta) -> int:
+    return -(-span // step)
+
+
+def carry_forward(
+    samples: Sequence[Tuple[datetime, float, Optional[float]]],
+    start_time: datetime,
+    end_time: datetime,
+    poll_interval: timedelta = POLL_INTERVAL,
+    limit: timedelta = CARRY_FORWARD_LIMIT,
+) -> Iterator[Tuple[datetime, int, float, Optional[float]]]:
+    """
+    Put one (symbol, exchange) series of raw rows back on the polling grid
+    Raw history is written change-only, so each row stands for its own poll plus every poll skipped until the
+    next row (at most `limit`). samples are (timestamp, price, volume) in time order and may start with the last
+    row before start_time. Yields (first poll, polls, price, volume) runs clipped to [start_time, end_time)
+    """
+    max_polls = max(1, round(limit / poll_interval))
+    # Rows sharing a timestamp (several pairs of one symbol on an exchange) are carried forward together
+    timestamps = [as_utc(sample[0]) for sample in samples]
+    next_timestamp = None
+    next_times = [None] * len(samples)
+    for i in range(len(samples) - 1, -1, -1):
+        next_times[i] = next_timestamp
+        if i == 0 or timestamps[i - 1] != timestamps[i]:
+            next_timestamp = timestamps[i]
+
+    for (_, price, volume), timestamp, next_time in zip(samples, timestamps, next_times):
+        if next_time is not None:
+            polls = max(1, round((next_time - timestamp) / poll_interval))
+        else:
+            polls = max_polls
+        polls = min(polls, max_polls, _ceil_div(end_time - timestamp, poll_interval))
+
+        skipped = _ceil_div(start_time - timestamp, poll_interval) if timestamp < start_time else 0
+        if polls > skipped:
+            yield timestamp + skipped * poll_interval, polls - skipped, price, volume
+
 
 class AggregationService:
     """
@@ -36,71 +102,18 @@ class AggregationService:
 
             logger.info(f"Creating 5m aggregates from {start_time} to {end_time}")
 
-            # Get all symbols and exchanges that have raw data in this window
-            symbols_exchanges = (
-                self.db.query(PriceHistoryRaw.symbol, PriceHistoryRaw.exchange)
-                .filter(and_(PriceHistoryRaw.timestamp >= start_time, PriceHistoryRaw.timestamp < end_time))
-                .distinct()
-                .all()
-            )
-
-            created_count = 0
-
-            for symbol, exchange in symbols_exchanges:
-                # Create 5-minute windows for this symbol/exchange
-                current_window = start_time
-                while current_window < end_time:
-                    window_end = current_window + timedelta(minutes=5)
-
-                    # Check if aggregate already exists
-                    existing = (
-                        self.db.query(PriceHistory5m)
-                        .filter(
-                            and_(
-                                PriceHistory5m.symbol == symbol,
-                                PriceHistory5m.exchange == exchange,
-                                PriceHistory5m.timestamp == current_window,
-                            )
-                        )
-                        .first()
-                    )
+            # Rows from before the window carry forward into it (raw history only stores changes)
+            candles = self._build_candles(self.db, PriceHistoryRaw, timedelta(minutes=5), None, start_time, end_time)
 
-                    if not existing:
-                        # Get raw data for this 5-minute window
-                        raw_data = (
-                            self.db.query(PriceHistoryRaw)
-                            .filter(
-                                and_(
-                                    PriceHistoryRaw.symbol == symbol,
-                                    PriceHistoryRaw.exchange == exchange,
-                                    PriceHistoryRaw.timestamp >= current_window,
-                                    PriceHistoryRaw.timestamp < window_end,
-                                )
-                            )
-                            .order_by(PriceHistoryRaw.timestamp.asc())
-                            .all()
-                        )
-
-                        if raw_data:
-                            # Calculate OHLC
-                            prices = [float(row.price_usd) for row in raw_data]
-                            volumes = [float(row.volume_24h_usd or 0) for row in raw_data]
-
-                            ohlc_data = PriceHistory5m(
-                                symbol=symbol,
-                                exchange=exchange,
-                                price_open=Decimal(str(prices[0])),
-                                price_close=Decimal(str(prices[-1])),
-                                price_high=Decimal(str(max(prices))),
-                                price_low=Decimal(str(min(prices))),
-                                volume_sum=Decimal(str(sum(volumes))),
-                                timestamp=current_window,
-                            )
-
-                            self.db.add(ohlc_data)
-                            created_count += 1
-
-                    current_window = window_end
+            # Buckets the live candle builder already flushed are left as they are
+            existing = {
+                (symbol, exchange, as_utc(timestamp))
+                for symbol, exchange, timestamp in self.db.query(
+                    PriceHistory5m.symbol, PriceHistory5m.exchange, PriceHistory5m.timestamp
+                ).filter(and_(PriceHistory5m.timestamp >= start_time, PriceHistory5m.timestamp < end_time))
+            }
+            missing = {key: candle for key, candle in candles.items() if key not in existing}
+            created_count = self.upsert_candles(PriceHistory5m, missing)
 
             self.db.commit()
             logger.info(f"Created {created_count} new 5-minute aggregates")
@@ -181,11 +194,11 @@ class AggregationService:
                             ohlc_data = PriceHistory1h(
                                 symbol=symbol,
                                 exchange=exchange,
-                                price_open=Decimal(str(open_price)),
-                                price_close=Decimal(str(close_price)),
-                                price_high=Decimal(str(high_price)),
-                                price_low=Decimal(str(low_price)),
-                                volume_sum=Decimal(str(total_volume)),
+                                price_open=open_price,
+                                price_close=close_price,
+                                price_high=high_price,
+                                price_low=low_price,
+                                volume_sum=total_volume,
                                 timestamp=current_window,
                             )
 
@@ -273,11 +286,11 @@ class AggregationService:
                             ohlc_data = PriceHistory1d(
                                 symbol=symbol,
                                 exchange=exchange,
-                                price_open=Decimal(str(open_price)),
-                                price_close=Decimal(str(close_price)),
-                                price_high=Decimal(str(high_price)),
-                                price_low=Decimal(str(low_price)),
-                                volume_sum=Decimal(str(total_volume)),
+                                price_open=open_price,
+                                price_close=close_price,
+                                price_high=high_price,
+                                price_low=low_price,
+                                volume_sum=total_volume,
                                 timestamp=current_window,
                             )
 
@@ -366,11 +379,11 @@ class AggregationService:
                             ohlc_data = PriceHistory1w(
                                 symbol=symbol,
                                 exchange=exchange,
-                                price_open=Decimal(str(open_price)),
-                                price_close=Decimal(str(close_price)),
-                                price_high=Decimal(str(high_price)),
-                                price_low=Decimal(str(low_price)),
-                                volume_sum=Decimal(str(total_volume)),
+                                price_open=open_price,
+                                price_close=close_price,
+                                price_high=high_price,
+                                price_low=low_price,
+                                volume_sum=total_volume,
                                 timestamp=current_window,
                             )
 
@@ -388,6 +401,264 @@ class AggregationService:
             self.db.rollback()
             return 0
 
+    # ==================== RANGE RE-AGGREGATION ====================
+
+    def reaggregate_range(
+        self,
+        interval: str,
+        start_time: datetime,
+        end_time: Optional[datetime] = None,
+        symbols: Optional[List[str]] = None,
+        max_workers: int = 4,
+        symbols_per_worker: int = 50,
+    ) -> Dict[str, Any]:
+        """
+        Rebuild OHLC aggregates for any time range from the next finer table
+        interval: "5m", "1h", "1d", "1w" or "all" (runs the whole chain in order)
+        Idempotent: buckets are upserted, so re-running a range rewrites the same rows.
+        Buckets with no source data are left untouched (e.g. backfilled history)
+        """
+        if interval == "all":
+            return {
+                name: self.reaggregate_range(name, start_time, end_time, symbols, max_workers, symbols_per_worker)
+                for name in AGGREGATION_INTERVALS
+            }
+
+        if interval not in AGGREGATION_INTERVALS:
+            raise ValueError(f"Unknown aggregation interval: {interval}")
+
+        target, source, bucket_size, slice_size = AGGREGATION_INTERVALS[interval]
+
+        # Only complete buckets are rebuilt - the one in progress belongs to the regular rollups
+        now = datetime.now(UTC)
+        start_time = floor_timestamp(start_time, bucket_size)
+        end_time = floor_timestamp(min(as_utc(end_time) if end_time else now, now), bucket_size)
+        if start_time >= end_time:
+            return {"interval": interval, "symbols": 0, "slices": 0, "buckets_written": 0}
+
+        if symbols is None:
+            lookback = CARRY_FORWARD_LIMIT if source is PriceHistoryRaw else timedelta(0)
+            symbols = [
+                symbol
+                for (symbol,) in self.db.query(source.symbol)
+                .filter(and_(source.timestamp >= start_time - lookback, source.timestamp < end_time))
+                .distinct()
+            ]
+        symbols = sorted({symbol.upper() for symbol in symbols})
+
+        # Time slices are aligned to buckets so no bucket straddles two slices
+        slices = []
+        slice_start = start_time
+        while slice_start < end_time:
+            slice_end = min(floor_timestamp(slice_start + slice_size, bucket_size), end_time)
+            if slice_end <= slice_start:
+                slice_end = min(slice_start + bucket_size, end_time)
+            slices.append((slice_start, slice_end))
+            slice_start = slice_end
+
+        logger.info(
+            f"Re-aggregating {interval} for {len(symbols)} symbols from {start_time} to {end_time} "
+            f"({len(slices)} slices)"
+        )
+
+        symbol_groups = [symbols[i : i + symbols_per_worker] for i in range(0, len(symbols), symbols_per_worker)]
+        session_factory = sessionmaker(bind=self.db.get_bind(), autocommit=False, autoflush=False)
+
+        buckets_written = 0
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            futures = [
+                executor.submit(self._reaggregate_symbol_group, session_factory, interval, group, slices)
+                for group in symbol_groups
+            ]
+            for future in futures:
+                buckets_written += future.result()
+
+        logger.info(f"Re-aggregated {buckets_written} {interval} buckets")
+        return {
+            "interval": interval,
+            "start_time": start_time.isoformat(),
+            "end_time": end_time.isoformat(),
+            "symbols": len(symbols),
+            "slices": len(slices),
+            "buckets_written": buckets_written,
+        }
+
+    def _reaggregate_symbol_group(self, session_factory, interval: str, symbols: List[str], slices) -> int:
+        """Rebuild every slice for one group of symbols on its own session (runs in a worker thread)"""
+        target, source, bucket_size, _ = AGGREGATION_INTERVALS[interval]
+        db = session_factory()
+        written_count = 0
+
+        try:
+            for slice_start, slice_end in slices:
+                try:
+                    candles = self._build_candles(db, source, bucket_size, symbols, slice_start, slice_end)
+                    written_count += self.upsert_candles(target, candles, db=db)
+                    db.commit()
+                except Exception as e:
+                    logger.error(f"Error re-aggregating {interval} slice {slice_start} - {slice_end}: {e}")
+                    db.rollback()
+        finally:
+            db.close()
+
+        return written_count
+
+    def _build_candles(
+        self,
+        db: Session,
+        source,
+        bucket_size: timedelta,
+        symbols: Optional[List[str]],
+        start_time: datetime,
+        end_time: datetime,
+    ) -> Dict[tuple, Dict[str, float]]:
+        """
+        Compute OHLC candles per (symbol, exchange, bucket) from one ordered scan of the source table
+        symbols=None covers every symbol. Raw rows are carried forward over the polls they stand for
+        """
+        if source is PriceHistoryRaw:
+            return self._build_raw_candles(db, bucket_size, symbols, start_time, end_time)
+
+        columns = (source.price_open, source.price_high, source.price_low, source.price_close, source.volume_sum)
+        conditions = [source.timestamp >= start_time, source.timestamp < end_time]
+        if symbols is not None:
+            conditions.append(source.symbol.in_(symbols))
+
+        rows = (
+            db.query(source.symbol, source.exchange, source.timestamp, *columns)
+            .filter(and_(*conditions))
+            .order_by(source.symbol, source.exchange, source.timestamp.asc())
+        )
+
+        candles: Dict[tuple, Dict[str, float]] = {}
+        for symbol, exchange, timestamp, open_, high, low, close, volume in rows:
+            key = (symbol, exchange, floor_timestamp(timestamp, bucket_size))
+            self._fold(candles, key, float(open_), float(high), float(low), float(close), float(volume or 0))
+
+        return candles
+
+    def _build_raw_candles(
+        self,
+        db: Session,
+        bucket_size: timedelta,
+        symbols: Optional[List[str]],
+        start_time: datetime,
+        end_time: datetime,
+    ) -> Dict[tuple, Dict[str, float]]:
+        """
+        Candles from change-only raw rows: every row counts once per poll it stands for, so a quiet pair still
+        gets flat candles and its volume sums the same as if it had been written on every tick
+        """
+        conditions = [
+            PriceHistoryRaw.timestamp >= start_time - CARRY_FORWARD_LIMIT,
+            PriceHistoryRaw.timestamp < end_time,
+        ]
+        if symbols is not None:
+            conditions.append(PriceHistoryRaw.symbol.in_(symbols))
+
+        rows = (
+            db.query(
+                PriceHistoryRaw.symbol,
+                PriceHistoryRaw.exchange,
+                PriceHistoryRaw.timestamp,
+                PriceHistoryRaw.price_usd,
+                PriceHistoryRaw.volume_24h_usd,
+            )
+            .filter(and_(*conditions))
+            .order_by(PriceHistoryRaw.symbol, PriceHistoryRaw.exchange, PriceHistoryRaw.timestamp.asc())
+        )
+
+        candles: Dict[tuple, Dict[str, float]] = {}
+
+        def flush(symbol: str, exchange: str, samples: List[tuple]):
+            for poll_time, polls, price, volume in carry_forward(samples, start_time, end_time):
+                while polls > 0:
+                    bucket = floor_timestamp(poll_time, bucket_size)
+                    in_bucket = min(polls, _ceil_div(bucket + bucket_size - poll_time, POLL_INTERVAL))
+                    self._fold(candles, (symbol, exchange, bucket), price, price, price, price, volume * in_bucket)
+                    poll_time += in_bucket * POLL_INTERVAL
+                    polls -= in_bucket
+
+        current_key, samples = None, []
+        for symbol, exchange, timestamp, price, volume in rows:
+            if (symbol, exchange) != current_key:
+                if samples:
+                    flush(*current_key, samples)
+                current_key, samples = (symbol, exchange), []
+            timestamp = as_utc(timestamp)
+            if timestamp <= start_time and samples and samples[-1][0] != timestamp:
+                # Only the last rows before the window matter
+                samples.clear()
+            samples.append((timestamp, float(price), float(volume or 0)))
+        if samples:
+            flush(*current_key, samples)
+
+        return candles
+
+    @staticmethod
+    def _fold(candles: Dict[tuple, Dict[str, float]], key: tuple, open_, high, low, close, volume):
+        candle = candles.get(key)
+        if candle is None:
+            candles[key] = {"open": open_, "high": high, "low": low, "close": close, "volume": volume}
+        else:
+            candle["high"] = max(candle["high"], high)
+            candle["low"] = min(candle["low"], low)
+            candle["close"] = close
+            candle["volume"] += volume
+
+    def upsert_candles(self, target, candles: Dict[tuple, Dict[str, float]], db: Optional[Session] = None) -> int:
+        """
+        Write (symbol, exchange, bucket) -> OHLCV candles into an OHLC table
+        Updates buckets that already exist and bulk inserts the rest (caller commits)
+        """
+        if not candles:
+            return 0
+
+        db = db or self.db
+        symbols = {symbol for symbol, _, _ in candles}
+        start_time = min(timestamp for _, _, timestamp in candles)
+        end_time = max(timestamp for _, _, timestamp in candles)
+
+        # Existing rows are addressed by their primary key: the surrogate id, or (symbol, exchange, timestamp) itself
+        # in the compact layout
+        key_columns = list(target.__table__.primary_key.columns)
+        existing_keys = {
+            (symbol, exchange, as_utc(timestamp)): dict(zip((column.key for column in key_columns), key))
+            for symbol, exchange, timestamp, *key in db.query(
+                target.symbol, target.exchange, target.timestamp, *key_columns
+            ).filter(
+                and_(
+                    target.symbol.in_(symbols),
+                    target.timestamp >= start_time,
+                    target.timestamp <= end_time,
+                )
+            )
+        }
+
+        updates = []
+        inserts = []
+        for (symbol, exchange, timestamp), candle in candles.items():
+            values = {
+                "price_open": candle["open"],
+                "price_close": candle["close"],
+                "price_high": candle["high"],
+                "price_low": candle["low"],
+                "volume_sum": round(candle["volume"], 2),
+            }
+            key = existing_keys.get((symbol, exchange, timestamp))
+            if key is not None:
+                updates.append({**key, **values})
+            else:
+                inserts.append({"symbol": symbol, "exchange": exchange, "timestamp": timestamp, **values})
+
+        if updates:
+            db.execute(update(target), updates)
+        if inserts:
+            intern_history_keys(db.get_bind(), symbols, {exchange for _, exchange, _ in candles})
+            db.execute(insert(target), inserts)
+
+        return len(updates) + len(inserts)
+
     # ==================== DATA CLEANUP ====================
 
     def cleanup_old_raw_data(self, hours_to_keep: int = 24) -> int:
@@ -0,0 +1,119 @@
+import logging
+import threading
+from datetime import UTC, datetime, timedelta
+from typing import Dict, Optional
+
+from app.services.aggregation_service import AGGREGATION_INTERVALS, floor_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+class CandleBuilder:
+    """
+    Incremental in-memory OHLC builder fed by the live tick stream
+    Keeps the current 5m, 1h, 1d and 1w bucket of every (symbol, exchange) up to date
+    so closed candles can be flushed in bulk and the open ones served as live candles
+    """
+
+    def __init__(self, tick_interval: timedelta = timedelta(seconds=30)):
+        self._lock = threading.Lock()
+        # interval -> (symbol, exchange) -> candle for the bucket currently being built
+        self._candles: Dict[str, Dict[tuple, Dict]] = {interval: {} for interval in AGGREGATION_INTERVALS}
+        # interval -> (symbol, exchange, bucket) -> closed candles waiting to be flushed
+        self._completed: Dict[str, Dict[tuple, Dict]] = {interval: {} for interval in AGGREGATION_INTERVALS}
+
+        # Buckets that were already open before the first tick we saw are missing data;
+        # they are never flushed and are left to the database rollups instead
+        self._tick_interval = tick_interval
+        self._first_tick_at: Optional[datetime] = None
+
+    # ==================== TICK INGESTION ====================
+
+    def add_tick(self, symbol: str, exchange: str, price: float, volume: float, timestamp: datetime):
+        """Fold a single tick into the open bucket of every interval"""
+        with self._lock:
+            if self._first_tick_at is None:
+                self._first_tick_at = timestamp
+
+            for interval, (_, _, bucket_size, _) in AGGREGATION_INTERVALS.items():
+                bucket = floor_timestamp(timestamp, bucket_size)
+                candles = self._candles[interval]
+                candle = candles.get((symbol, exchange))
+
+                if candle is not None and candle["timestamp"] != bucket:
+                    # Tick belongs to a new bucket - close the previous one
+                    self._close_candle(interval, symbol, exchange, candle)
+                    candle = None
+
+                if candle is None:
+                    candles[(symbol, exchange)] = {
+                        "timestamp": bucket,
+                        "open": price,
+                        "high": price,
+                        "low": price,
+                        "close": price,
+                        "volume": volume,
+                        "partial": self._first_tick_at - bucket > self._tick_interval,
+                    }
+                else:
+                    candle["high"] = max(candle["high"], price)
+                    candle["low"] = min(candle["low"], price)
+                    candle["close"] = price
+                    candle["volume"] += volume
+
+    def _close_candle(self, interval: str, symbol: str, exchange: str, candle: Dict):
+        """Move a finished candle to the flush queue (partial ones are dropped)"""
+        if candle["partial"]:
+            return
+        self._completed[interval][(symbol, exchange, candle["timestamp"])] = {
+            field: candle[field] for field in ("open", "high", "low", "close", "volume")
+        }
+
+    # ==================== FLUSHING ====================
+
+    def pop_completed(self, now: Optional[datetime] = None) -> Dict[str, Dict[tuple, Dict]]:
+        """
+        Return and forget every closed candle, grouped by interval
+        Open buckets whose end has passed are closed too, so symbols that stopped trading still flush
+        """
+        now = now or datetime.now(UTC)
+
+        with self._lock:
+            for interval, (_, _, bucket_size, _) in AGGREGATION_INTERVALS.items():
+                candles = self._candles[interval]
+                expired = [key for key, candle in candles.items() if candle["timestamp"] + bucket_size <= now]
+                for symbol, exchange in expired:
+                    self._close_candle(interval, symbol, exchange, candles.pop((symbol, exchange)))
+
+            completed = self._completed
+            self._completed = {interval: {} for interval in AGGREGATION_INTERVALS}
+
+        return completed
+
+    def requeue(self, completed: Dict[str, Dict[tuple, Dict]]):
+        """Put candles back after a failed flush so the next tick retries them"""
+        with self._lock:
+            for interval, candles in completed.items():
+                for key, candle in candles.items():
+                    self._completed[interval].setdefault(key, candle)
+
+    # ==================== LIVE CANDLES ====================
+
+    def get_live_candle(self, symbol: str, exchange: str, interval: str) -> Optional[Dict]:
+        """Current (still open) candle for a symbol/exchange, or None if unknown or incomplete"""
+        with self._lock:
+            candle = self._candles.get(interval, {}).get((symbol, exchange))
+            if candle is None or candle["partial"]:
+                return None
+            return dict(candle)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Open and queued candle counts per interval (for monitoring)"""
+        with self._lock:
+            stats = {f"open_{interval}": len(candles) for interval, candles in self._candles.items()}
+            stats.update({f"queued_{interval}": len(candles) for interval, candles in self._completed.items()})
+            return stats
+
+
+# Process-wide builder shared by the price pipeline and the read endpoints
+candle_builder = CandleBuilder()
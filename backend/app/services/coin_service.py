@@ -1,11 +1,28 @@
 from datetime import UTC, datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import and_, asc, desc, or_
-from sqlalchemy.orm import Session
+from sqlalchemy import DateTime, Row, and_, asc, case, desc, func, or_
+from sqlalchemy.orm import Query, Session
 
-from app.models import Coin, ExchangePair, PriceHistoryRaw
-from app.schemas import CoinCreate, CoinUpdate, ExchangePairInfo
+from app.config import COIN_SEARCH_BACKEND
+from app.models import Coin, ExchangePair
+from app.schemas import CoinCreate, CoinResponse, CoinUpdate
+from app.services.pagination import PageCursor, TickCounts, keyset_page, sort_order
+from app.services.raw_history import POLL_INTERVAL, price_at
+from app.services.search_index import MAX_LIMIT, coin_search_index
+
+COIN_COLUMNS = {column.key: getattr(Coin, column.key) for column in Coin.__table__.columns}
+# Columns /coins can sort by; anything else falls back to the market cap rank
+SORT_COLUMNS = {key: column for key, column in COIN_COLUMNS.items() if key != "categories"}
+DEFAULT_SORT = "market_cap_rank"
+
+# ?fields= of the coin lists: the CoinResponse fields, in schema order (exchange_pairs is a separate query)
+LIST_FIELDS = tuple(CoinResponse.model_fields)
+# Projected columns that need converting for JSON
+DATETIME_FIELDS = {key for key, column in COIN_COLUMNS.items() if isinstance(column.type, DateTime)}
+
+# List totals, recounted after every price tick (see PriceService.update_prices_and_rankings)
+coin_counts = TickCounts(POLL_INTERVAL)
 
 
 class CoinService:
@@ -23,24 +40,59 @@ class CoinService:
         """Get a single coin by symbol"""
         return self.db.query(Coin).filter(Coin.symbol == symbol.upper()).first()
 
+    @staticmethod
+    def resolve_sort(sort_by: str) -> str:
+        """The sortable column a sort_by parameter refers to"""
+        return sort_by if sort_by in SORT_COLUMNS else DEFAULT_SORT
+
     def get_coins(
-        self, skip: int = 0, limit: int = 100, sort_by: str = "market_cap_rank", sort_desc: bool = False
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        sort_by: str = DEFAULT_SORT,
+        sort_desc: bool = False,
+        after: Optional[PageCursor] = None,
     ) -> List[Coin]:
-        """Get multiple coins with pagination and sorting"""
-        query = self.db.query(Coin)
-
-        # Apply sorting
-        sort_column = getattr(Coin, sort_by, Coin.market_cap_rank)
-        if sort_desc:
-            query = query.order_by(desc(sort_column))
-        else:
-            query = query.order_by(asc(sort_column))
+        """
+        Get multiple coins sorted by a column (NULLs last, ties broken by symbol)
+        Pages by keyset when given the cursor of the previous page (or on the first page), by OFFSET otherwise
+        """
+        return self._page(self.db.query(Coin), skip, limit, sort_by, sort_desc, after)
+
+    def get_coin_rows(
+        self,
+        fields: List[str],
+        skip: int = 0,
+        limit: int = 100,
+        sort_by: str = DEFAULT_SORT,
+        sort_desc: bool = False,
+        after: Optional[PageCursor] = None,
+    ) -> List[Row]:
+        """get_coins as a projection: rows of symbol, the sort column and the requested columns (no ORM objects)"""
+        sort_by = self.resolve_sort(sort_by)
+        keys = dict.fromkeys(["symbol", sort_by, *(field for field in fields if field in COIN_COLUMNS)])
+        return self._page(self.db.query(*(COIN_COLUMNS[key] for key in keys)), skip, limit, sort_by, sort_desc, after)
+
+    def get_coin_rows_for_symbols(self, fields: List[str], symbols: List[str]) -> List[Row]:
+        """get_coin_rows for the given coins, in the order of symbols (a page of search results)"""
+        keys = dict.fromkeys(["symbol", *(field for field in fields if field in COIN_COLUMNS)])
+        rows = {
+            row.symbol: row
+            for row in self.db.query(*(COIN_COLUMNS[key] for key in keys)).filter(Coin.symbol.in_(symbols))
+        }
+        return [rows[symbol] for symbol in symbols if symbol in rows]
 
-        return query.offset(skip).limit(limit).all()
+    def _page(
+        self, query: Query, skip: int, limit: int, sort_by: str, sort_desc: bool, after: Optional[PageCursor]
+    ) -> List:
+        sort_column = SORT_COLUMNS[self.resolve_sort(sort_by)]
+        if after is not None or skip == 0:
+            return keyset_page(query, sort_column, Coin.symbol, sort_desc, limit, after)
+        return query.order_by(*sort_order(sort_column, Coin.symbol, sort_desc)).offset(skip).limit(limit).all()
 
     def get_total_coins(self) -> int:
-        """Get total number of coins"""
-        return self.db.query(Coin).count()
+        """Get total number of coins (cached until the next price tick)"""
+        return coin_counts.get("coins", lambda: self.db.query(Coin).count())
 
     def create_coin(self, coin_data: CoinCreate) -> Coin:
         """Create a new coin"""
@@ -48,6 +100,7 @@ class CoinService:
         self.db.add(db_coin)
         self.db.commit()
         self.db.refresh(db_coin)
+        coin_search_index.invalidate()
         return db_coin
 
     def update_coin(self, symbol: str, coin_data: CoinUpdate) -> Optional[Coin]:
@@ -83,27 +136,72 @@ class CoinService:
             self.db.add(new_coin)
             self.db.commit()
             self.db.refresh(new_coin)
+            coin_search_index.invalidate()
             return new_coin
 
     # ==================== BUSINESS LOGIC OPERATIONS ====================
 
-    def get_top_coins_by_market_cap(self, limit: int = 100) -> List[Coin]:
-        """Get top coins by market cap"""
-        return (
-            self.db.query(Coin)
-            .filter(Coin.market_cap.isnot(None))
-            .order_by(asc(Coin.market_cap_rank))
-            .limit(limit)
-            .all()
-        )
+    def get_top_coins_by_market_cap(
+        self, limit: int = 100, skip: int = 0, after: Optional[PageCursor] = None
+    ) -> List[Coin]:
+        """Get coins with a market cap by rank (unranked ones last), paged like get_coins"""
+        query = self.db.query(Coin).filter(Coin.market_cap > 0)
+
+        if after is not None or skip == 0:
+            return keyset_page(query, Coin.market_cap_rank, Coin.symbol, False, limit, after)
+        return query.order_by(*sort_order(Coin.market_cap_rank, Coin.symbol, False)).offset(skip).limit(limit).all()
+
+    def get_total_market_cap_coins(self) -> int:
+        """Number of coins get_top_coins_by_market_cap pages through (cached until the next price tick)"""
+        return coin_counts.get("market_cap", lambda: self.db.query(Coin).filter(Coin.market_cap > 0).count())
 
     def search_coins(self, query: str, limit: int = 10) -> List[Coin]:
-        """Search coins by name or symbol"""
-        search_term = f"%{query.upper()}%"
+        """
+        Search coins by name or symbol: exact symbol, then symbol / name prefix, substring and fuzzy (trigram)
+        matches, each by market cap. Answered by the in-process coin_search_index, or pg_trgm if configured
+        """
+        if COIN_SEARCH_BACKEND == "pg_trgm":
+            return self._search_trgm(query, limit, Coin)
+        return self.get_coins_by_symbols(coin_search_index.search(self.db, query, limit))
+
+    def search_page(self, query: str, skip: int, limit: int) -> Tuple[List[str], int]:
+        """
+        Symbols of one page of search results, plus the number of matches for the pagination fields
+        (searches stop at MAX_LIMIT matches, so the total is exact up to that)
+        """
+        if COIN_SEARCH_BACKEND == "pg_trgm":
+            symbols = [symbol for (symbol,) in self._search_trgm(query, MAX_LIMIT, Coin.symbol)]
+        else:
+            symbols = coin_search_index.search(self.db, query, MAX_LIMIT)
+        return symbols[skip : skip + limit], len(symbols)
+
+    def get_coins_by_symbols(self, symbols: List[str]) -> List[Coin]:
+        """Coins for the given symbols, in that order (unknown symbols are left out)"""
+        if not symbols:
+            return []
+        coins = {coin.symbol: coin for coin in self.db.query(Coin).filter(Coin.symbol.in_(symbols))}
+        return [coins[symbol] for symbol in symbols if symbol in coins]
+
+    def _search_trgm(self, query: str, limit: int, *entities) -> List:
+        """search_coins in SQL, for PostgreSQL with the idx_coins_search_trgm GIN index (pg_trgm), selecting entities"""
+        query = " ".join(query.split())
+        # Patterns are built here (not concatenated in SQL) so the planner sees constants it can match to the index
+        escaped = query.replace("/", "//").replace("%", "/%").replace("_", "/_")
+        symbol_contains = Coin.symbol.ilike(f"%{escaped}%", escape="/")
+        name_contains = Coin.name.ilike(f"%{escaped}%", escape="/")
+        name_prefix = or_(Coin.name.ilike(f"{escaped}%", escape="/"), Coin.name.ilike(f"% {escaped}%", escape="/"))
+        tier = case(
+            (func.upper(Coin.symbol) == query.upper(), 0),
+            (Coin.symbol.ilike(f"{escaped}%", escape="/"), 1),
+            (name_prefix, 2),
+            (or_(symbol_contains, name_contains), 3),
+            else_=4,
+        )
+        similarity = func.greatest(func.similarity(Coin.symbol, query), func.similarity(Coin.name, query))
         return (
-            self.db.query(Coin)
-            .filter(or_(Coin.symbol.ilike(search_term), Coin.name.ilike(search_term)))
-            .order_by(asc(Coin.market_cap_rank))
+            self.db.query(*entities)
+            .filter(or_(symbol_contains, name_contains, Coin.symbol.op("%")(query), Coin.name.op("%")(query)))
+            .order_by(tier, desc(similarity), desc(Coin.market_cap).nulls_last(), Coin.symbol)
             .limit(limit)
             .all()
         )
@@ -144,23 +242,31 @@ class CoinService:
         if not coin:
             return None
 
-        # Get exchange pairs
-        exchange_pairs = (
-            self.db.query(ExchangePair)
-            .filter(and_(ExchangePair.symbol == symbol.upper(), ExchangePair.is_active))
-            .all()
-        )
-
-        # Convert to response format
-        pairs_info = [
-            ExchangePairInfo(
-                exchange=pair.exchange, pair=pair.pair, quote_currency=pair.quote_currency, is_active=pair.is_active
+        return self._coin_dict(coin, self.get_exchange_pair_dicts([coin.symbol])[coin.symbol])
+
+    def get_exchange_pair_dicts(self, symbols: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """symbol -> its active pairs as ExchangePairInfo dicts, from one projected query"""
+        pairs_by_symbol: Dict[str, List[Dict[str, Any]]] = {symbol: [] for symbol in symbols}
+        if not pairs_by_symbol:
+            return pairs_by_symbol
+        rows = self.db.query(
+            ExchangePair.symbol, ExchangePair.exchange, ExchangePair.pair, ExchangePair.quote_currency
+        ).filter(and_(ExchangePair.symbol.in_(list(pairs_by_symbol)), ExchangePair.is_active))
+        for symbol, exchange, pair, quote_currency in rows:
+            pairs_by_symbol[symbol].append(
+                {"exchange": exchange, "pair": pair, "quote_currency": quote_currency, "is_active": True}
             )
-            for pair in exchange_pairs
-        ]
+        return pairs_by_symbol
 
-        # Create response
-        coin_dict = {
+    def get_coins_with_exchange_pairs(self, coins: List[Coin]) -> List[Dict[str, Any]]:
+        """get_coin_with_exchange_pairs for a list of coins, with one query for all of their pairs"""
+        pairs_by_symbol = self.get_exchange_pair_dicts([coin.symbol for coin in coins])
+        return [self._coin_dict(coin, pairs_by_symbol[coin.symbol]) for coin in coins]
+
+    @staticmethod
+    def _coin_dict(coin: Coin, exchange_pairs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """CoinResponse-shaped dict, JSON-ready as is (pairs from get_exchange_pair_dicts)"""
+        return {
             "symbol": coin.symbol,
             "name": coin.name,
             "price_usd": coin.price_usd,
@@ -179,10 +285,24 @@ class CoinService:
             "market_cap_rank": coin.market_cap_rank,
             "exchange_count": coin.exchange_count,
             "last_updated": coin.last_updated,
-            "exchange_pairs": pairs_info,
+            "exchange_pairs": exchange_pairs,
         }
 
-        return coin_dict
+    def coin_columns(self, rows: List[Any], fields: List[str]) -> Dict[str, List[Any]]:
+        """
+        One list per field from get_coin_rows rows (or Coin objects), JSON-ready
+        exchange_pairs, when asked for, is loaded for the whole page in one query
+        """
+        columns = {}
+        for field in fields:
+            if field == "exchange_pairs":
+                pairs = self.get_exchange_pair_dicts([row.symbol for row in rows])
+                columns[field] = [pairs[row.symbol] for row in rows]
+            elif field in DATETIME_FIELDS:
+                columns[field] = [value.isoformat() if value else None for value in (getattr(r, field) for r in rows)]
+            else:
+                columns[field] = [getattr(row, field) for row in rows]
+        return columns
 
     def calculate_price_changes(self, symbol: str) -> Dict[str, Optional[float]]:
         """Calculate price changes for a coin based on historical data"""
@@ -202,18 +322,7 @@ class CoinService:
         current_price = float(current_coin.price_usd)
 
         for period, time_threshold in time_ranges.items():
-            historical_price = (
-                self.db.query(PriceHistoryRaw)
-                .filter(
-                    and_(
-                        PriceHistoryRaw.symbol == symbol.upper(),
-                        PriceHistoryRaw.exchange == "average",
-                        PriceHistoryRaw.timestamp >= time_threshold,
-                    )
-                )
-                .order_by(PriceHistoryRaw.timestamp.asc())
-                .first()
-            )
+            historical_price = price_at(self.db, symbol, time_threshold)
 
             if historical_price and historical_price.price_usd:
                 old_price = float(historical_price.price_usd)
@@ -1,17 +1,66 @@
 import asyncio
+import json
 import logging
 import os
 from datetime import UTC, datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import httpx
+from sqlalchemy import and_, bindparam, case, cast, column, func, update, values
 from sqlalchemy.orm import Session
 
-from app.models import Coin, PriceHistoryRaw
+from app.config import CACHE_DIR
+from app.models import Coin
 from app.services import CoinService
+from app.services.http_cache import coingecko_client
+from app.services.rate_limiter import RateLimiter
+from app.services.search_index import coin_search_index
+from app.services.symbol_mapping_cache import symbol_mapping_cache
 
 logger = logging.getLogger(__name__)
 
+# CoinGecko free tier: ~10-50 requests/minute, shared by every service instance in the process
+coingecko_rate_limiter = RateLimiter(min_interval=1.2, max_concurrency=4)
+
+# Category crawl: coins fetched more recently than this are skipped, progress survives restarts
+METADATA_TTL = timedelta(days=7)
+METADATA_PROGRESS_PATH = os.path.join(CACHE_DIR, "coingecko_metadata_progress.json")
+
+
+# Coin columns the metadata crawl sets (apply_metadata_bulk)
+METADATA_COLUMNS = (
+    "symbol",
+    "name",
+    "circulating_supply",
+    "total_supply",
+    "max_supply",
+    "market_cap_rank",
+    "categories",
+)
+
+
+def _metadata_update(value_of: Callable[[str], Any], now: datetime):
+    """
+    UPDATE coins SET clause for apply_metadata_bulk, value_of(column) giving each incoming value
+    Same semantics as update_coin_with_metadata: keep our name if CoinGecko has none, and only recompute the
+    market cap from our price and the new circulating supply when both are positive
+    """
+    coins = Coin.__table__
+    circulating_supply = value_of("circulating_supply")
+    return update(coins).values(
+        name=func.coalesce(value_of("name"), coins.c.name),
+        circulating_supply=circulating_supply,
+        total_supply=value_of("total_supply"),
+        max_supply=value_of("max_supply"),
+        market_cap_rank=value_of("market_cap_rank"),
+        categories=value_of("categories"),
+        market_cap=case(
+            (and_(coins.c.price_usd > 0, circulating_supply > 0), coins.c.price_usd * circulating_supply),
+            else_=coins.c.market_cap,
+        ),
+        last_updated=now,
+    )
+
 
 class CoinGeckoService:
     """
@@ -24,66 +73,21 @@ class CoinGeckoService:
         self.coin_service = CoinService(db)
         self.base_url = os.getenv("COINGECKO_API_URL", "https://api.coingecko.com/api/v3")
 
-        # Rate limiting (CoinGecko free tier: ~10-50 requests/minute)
-        self.rate_limit_delay = 1.2  # seconds between requests
+        # Rate limiting is handled by the shared coingecko_rate_limiter
         self.timeout = 30.0
 
-        # Cache for symbol-to-id mapping
-        self._symbol_to_id_cache = {}
-        self._cache_timestamp = None
-        self._cache_duration = timedelta(hours=24)
-
     # ==================== SYMBOL MAPPING ====================
 
     async def get_symbol_to_id_mapping(self, force_refresh: bool = False) -> Dict[str, str]:
-        """Get mapping of symbols to CoinGecko IDs (cached for performance)"""
-        now = datetime.now(UTC)
-
-        # Return cached data if still valid
-        if (
-            not force_refresh
-            and self._symbol_to_id_cache
-            and self._cache_timestamp
-            and now - self._cache_timestamp < self._cache_duration
-        ):
-            return self._symbol_to_id_cache
-
-        logger.info("Fetching fresh symbol-to-ID mapping from CoinGecko")
-
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            try:
-                url = f"{self.base_url}/coins/list"
-                response = await client.get(url)
-                response.raise_for_status()
-
-                coins_list = response.json()
-
-                # Build symbol to ID mapping
-                symbol_to_id = {}
-                for coin in coins_list:
-                    symbol = coin.get("symbol", "").upper()
-                    coin_id = coin.get("id", "")
-
-                    if symbol and coin_id:
-                        # Handle duplicate symbols by preferring more popular coins
-                        if symbol not in symbol_to_id:
-                            symbol_to_id[symbol] = coin_id
-
-                # Update cache
-                self._symbol_to_id_cache = symbol_to_id
-                self._cache_timestamp = now
-
-                logger.info(f"Cached {len(symbol_to_id)} symbol mappings from CoinGecko")
-                return symbol_to_id
-
-            except Exception as e:
-                logger.error(f"Error fetching CoinGecko symbol mapping: {e}")
-                return self._symbol_to_id_cache or {}
+        """Get mapping of symbols to CoinGecko IDs (shared, persisted process-wide cache)"""
+        return await symbol_mapping_cache.get_mapping(force_refresh=force_refresh)
 
     # ==================== COMPLETE METADATA FETCHING ====================
 
-    async def fetch_complete_metadata_for_coin(self, symbol: str) -> Optional[Dict[str, Any]]:
-        """Fetch complete metadata for a single coin"""
+    async def fetch_complete_metadata_for_coin(
+        self, symbol: str, client: Optional[httpx.AsyncClient] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch complete metadata for a single coin (pass a client to reuse connections)"""
         symbol_to_id = await self.get_symbol_to_id_mapping()
         coin_id = symbol_to_id.get(symbol.upper())
 
@@ -91,7 +95,11 @@ class CoinGeckoService:
             logger.warning(f"No CoinGecko ID found for symbol {symbol}")
             return None
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
+        if client is None:
+            async with coingecko_client(timeout=self.timeout) as own_client:
+                return await self.fetch_complete_metadata_for_coin(symbol, own_client)
+
+        async with coingecko_rate_limiter.slot():
             try:
                 # Get complete coin data
                 url = f"{self.base_url}/coins/{coin_id}"
@@ -149,17 +157,15 @@ class CoinGeckoService:
 
         logger.info(f"Fetching bulk metadata for {len(coin_ids)} coins from CoinGecko")
 
-        # Process in batches
+        # Process batches concurrently - the shared rate limiter keeps us within quota
+        batches = [coin_ids[i : i + batch_size] for i in range(0, len(coin_ids), batch_size)]
+        async with coingecko_client(timeout=self.timeout) as client:
+            batch_results = await asyncio.gather(*(self._fetch_bulk_batch(client, batch_ids) for batch_ids in batches))
+
         all_metadata = {}
-        for i in range(0, len(coin_ids), batch_size):
-            batch_ids = coin_ids[i : i + batch_size]
-            batch_metadata = await self._fetch_bulk_batch(batch_ids)
+        for batch_metadata in batch_results:
             all_metadata.update(batch_metadata)
 
-            # Rate limiting delay between batches
-            if i + batch_size < len(coin_ids):
-                await asyncio.sleep(self.rate_limit_delay)
-
         # Map back to symbols
         symbol_metadata = {}
         for symbol in valid_symbols:
@@ -170,9 +176,9 @@ class CoinGeckoService:
         logger.info(f"Retrieved bulk metadata for {len(symbol_metadata)} coins")
         return symbol_metadata
 
-    async def _fetch_bulk_batch(self, coin_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    async def _fetch_bulk_batch(self, client: httpx.AsyncClient, coin_ids: List[str]) -> Dict[str, Dict[str, Any]]:
         """Fetch metadata for a batch of coins using markets endpoint"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
+        async with coingecko_rate_limiter.slot():
             try:
                 params = {
                     "vs_currency": "usd",
@@ -237,6 +243,7 @@ class CoinGeckoService:
             coin.last_updated = datetime.now(UTC)
 
             self.db.commit()
+            coin_search_index.invalidate()
             return True
 
         except Exception as e:
@@ -244,6 +251,62 @@ class CoinGeckoService:
             self.db.rollback()
             return False
 
+    def apply_metadata_bulk(self, metadata_by_symbol: Dict[str, Dict[str, Any]], chunk_size: int = 500) -> int:
+        """
+        Apply metadata to many coins at once, market cap recomputed in the same statement
+        PostgreSQL: one UPDATE ... FROM (VALUES ...) RETURNING per chunk, a single round trip
+        (an executemany UPDATE is still one round trip per row with psycopg2). Other databases run the same
+        SET clause as an executemany
+        """
+        if not metadata_by_symbol:
+            return 0
+
+        now = datetime.now(UTC)
+        rows = [
+            {
+                "symbol": symbol.upper(),
+                "name": metadata.get("name") or None,
+                "circulating_supply": metadata.get("circulating_supply"),
+                "total_supply": metadata.get("total_supply"),
+                "max_supply": metadata.get("max_supply"),
+                "market_cap_rank": metadata.get("market_cap_rank"),
+                "categories": metadata.get("categories", []),
+            }
+            for symbol, metadata in metadata_by_symbol.items()
+        ]
+
+        coins = Coin.__table__
+        on_postgresql = self.db.get_bind().dialect.name == "postgresql"
+        if not on_postgresql:
+            statement = _metadata_update(lambda name: bindparam(f"b_{name}", type_=coins.c[name].type), now).where(
+                coins.c.symbol == bindparam("b_symbol")
+            )
+
+        try:
+            updated_count = 0
+            for i in range(0, len(rows), chunk_size):
+                chunk = rows[i : i + chunk_size]
+                # Symbols without a coins row match nothing; count only the rows actually updated
+                if on_postgresql:
+                    source = values(*(column(name, coins.c[name].type) for name in METADATA_COLUMNS), name="metadata")
+                    source = source.data([tuple(row[name] for name in METADATA_COLUMNS) for row in chunk])
+                    # VALUES columns that are NULL in every row come back as text - cast to the column types
+                    statement = _metadata_update(lambda name: cast(source.c[name], coins.c[name].type), now)
+                    statement = statement.where(coins.c.symbol == source.c.symbol).returning(coins.c.symbol)
+                    updated_count += len(self.db.execute(statement).all())
+                else:
+                    chunk = [{f"b_{name}": value for name, value in row.items()} for row in chunk]
+                    updated_count += self.db.execute(statement, chunk).rowcount
+
+            self.db.commit()
+            coin_search_index.invalidate()
+            return updated_count
+
+        except Exception as e:
+            logger.error(f"Error applying bulk metadata: {e}")
+            self.db.rollback()
+            return 0
+
     # ==================== MAIN PUBLIC METHODS ====================
 
     async def enrich_new_coins_only(self) -> int:
@@ -263,20 +326,16 @@ class CoinGeckoService:
         # Get bulk metadata (fast)
         metadata_dict = await self.fetch_complete_metadata_bulk(symbols)
 
-        # Update coins
-        updated_count = 0
-        for symbol, metadata in metadata_dict.items():
-            if self.update_coin_with_metadata(symbol, metadata):
-                updated_count += 1
+        # Update coins in bulk
+        updated_count = self.apply_metadata_bulk(metadata_dict)
 
         logger.info(f"Successfully enriched {updated_count} new coins")
         return updated_count
 
     async def fetch_all_metadata(self, include_categories: bool = True) -> int:
         """Fetch complete metadata for ALL coins (admin endpoint - slow)"""
-        # Get all coins from database
-        all_coins = self.db.query(Coin).all()
-        symbols = [coin.symbol for coin in all_coins]
+        # All coin symbols, biggest first (the crawl's order; the bulk path doesn't care)
+        symbols = self._symbols_by_market_cap()
 
         if not symbols:
             logger.info("No coins in database to enrich")
@@ -285,202 +344,126 @@ class CoinGeckoService:
         logger.info(f"Starting complete metadata fetch for {len(symbols)} coins")
 
         if include_categories:
-            # Individual API calls for complete data including categories (slow)
-            updated_count = 0
-            for symbol in symbols:
-                try:
-                    metadata = await self.fetch_complete_metadata_for_coin(symbol)
-                    if metadata and self.update_coin_with_metadata(symbol, metadata):
-                        updated_count += 1
-
-                    # Rate limiting
-                    await asyncio.sleep(self.rate_limit_delay)
-
-                    # Progress logging
-                    if updated_count % 10 == 0:
-                        logger.info(f"Processed {updated_count}/{len(symbols)} coins")
-
-                except Exception as e:
-                    logger.warning(f"Error processing {symbol}: {e}")
-                    continue
+            # Individual API calls for complete data including categories (concurrent, rate limited)
+            updated_count = await self.crawl_complete_metadata(symbols)
         else:
             # Bulk API calls for basic data only (fast)
             metadata_dict = await self.fetch_complete_metadata_bulk(symbols)
-            updated_count = 0
-            for symbol, metadata in metadata_dict.items():
-                if self.update_coin_with_metadata(symbol, metadata):
-                    updated_count += 1
+            updated_count = self.apply_metadata_bulk(metadata_dict)
 
         logger.info(f"Completed metadata fetch: {updated_count} coins updated")
         return updated_count
 
-    def get_metadata_stats(self) -> Dict[str, int]:
-        """Get statistics about metadata completeness"""
-        total_coins = self.db.query(Coin).count()
-        coins_with_names = self.db.query(Coin).filter(Coin.name.isnot(None)).count()
-        coins_with_categories = self.db.query(Coin).filter(Coin.categories.isnot(None)).count()
-        coins_with_supply = self.db.query(Coin).filter(Coin.circulating_supply.isnot(None)).count()
-
-        return {
-            "total_coins": total_coins,
-            "coins_with_names": coins_with_names,
-            "coins_with_categories": coins_with_categories,
-            "coins_with_supply": coins_with_supply,
-            "names_percentage": round((coins_with_names / total_coins * 100), 1) if total_coins else 0,
-            "categories_percentage": round((coins_with_categories / total_coins * 100), 1) if total_coins else 0,
-            "supply_percentage": round((coins_with_supply / total_coins * 100), 1) if total_coins else 0,
-        }
-
-
-# ==================== HISTORICAL DATA BACKFILL ====================
-
-
-async def backfill_historical_data_for_new_coins(self, coin_symbols: List[str], days_back: int = 7) -> int:
-    """
-    Backfill historical data for newly discovered coins
-    Uses CoinGecko's historical data API
-    """
-    if not coin_symbols:
-        return 0
-
-    logger.info(f"Starting historical backfill for {len(coin_symbols)} new coins ({days_back} days)")
-
-    backfilled_count = 0
-
-    for symbol in coin_symbols:
-        try:
-            # Get CoinGecko ID for this symbol
-            symbol_to_id = await self.get_symbol_to_id_mapping()
-            coin_id = symbol_to_id.get(symbol.upper())
-
-            if not coin_id:
-                logger.warning(f"No CoinGecko ID found for {symbol}")
-                continue
-
-            # Fetch historical data from CoinGecko
-            historical_data = await self._fetch_historical_prices(coin_id, days_back)
-
-            if historical_data:
-                # Store historical data in PriceHistoryRaw with past timestamps
-                stored_count = await self._store_historical_data(symbol, historical_data)
-                if stored_count > 0:
-                    backfilled_count += 1
-                    logger.info(f"Backfilled {stored_count} data points for {symbol}")
-
-            # Rate limiting
-            await asyncio.sleep(self.rate_limit_delay)
-
-        except Exception as e:
-            logger.error(f"Error backfilling data for {symbol}: {e}")
-            continue
+    # ==================== CATEGORY CRAWLER ====================
+
+    async def crawl_complete_metadata(
+        self,
+        symbols: List[str],
+        max_in_flight: int = 4,
+        metadata_ttl: timedelta = METADATA_TTL,
+        flush_every: int = 50,
+    ) -> int:
+        """
+        Fetch /coins/{id} (categories included) for many coins concurrently
+        Keeps up to max_in_flight requests running under the shared rate limiter, skips coins
+        fetched within metadata_ttl and persists progress so an interrupted crawl resumes
+        """
+        progress = self._load_crawl_progress()
+        now = datetime.now(UTC)
 
-    logger.info(f"Historical backfill completed: {backfilled_count} coins processed")
-    return backfilled_count
+        pending = [
+            symbol
+            for symbol in symbols
+            if symbol not in progress or now - datetime.fromisoformat(progress[symbol]) >= metadata_ttl
+        ]
+        logger.info(f"Crawling metadata for {len(pending)} coins ({len(symbols) - len(pending)} still fresh)")
 
+        if not pending:
+            return 0
 
-async def _fetch_historical_prices(self, coin_id: str, days_back: int) -> List[Dict[str, Any]]:
-    """Fetch historical prices from CoinGecko"""
-    async with httpx.AsyncClient(timeout=self.timeout) as client:
-        try:
-            url = f"{self.base_url}/coins/{coin_id}/market_chart"
-            params = {
-                "vs_currency": "usd",
-                "days": days_back,
-                "interval": "hourly",  # Get hourly data
-            }
+        queue: asyncio.Queue = asyncio.Queue()
+        for symbol in pending:
+            queue.put_nowait(symbol)
 
-            response = await client.get(url, params=params)
-            response.raise_for_status()
+        fetched: Dict[str, Dict[str, Any]] = {}
+        updated_count = 0
 
-            data = response.json()
-            prices = data.get("prices", [])
-            volumes = data.get("total_volumes", [])
+        def flush():
+            nonlocal updated_count
+            if not fetched:
+                return
+            updated_count += self.apply_metadata_bulk(fetched)
+            fetched_at = datetime.now(UTC).isoformat()
+            progress.update({symbol: fetched_at for symbol in fetched})
+            self._save_crawl_progress(progress)
+            fetched.clear()
+            logger.info(f"Processed {len(pending) - queue.qsize()}/{len(pending)} coins")
+
+        async def worker(client: httpx.AsyncClient):
+            while True:
+                try:
+                    symbol = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
 
-            # Convert to our format
-            historical_points = []
-            for i, price_point in enumerate(prices):
-                timestamp_ms, price = price_point
-                volume = volumes[i][1] if i < len(volumes) else 0
+                try:
+                    metadata = await self.fetch_complete_metadata_for_coin(symbol, client)
+                    if metadata:
+                        fetched[symbol] = metadata
+                        if len(fetched) >= flush_every:
+                            flush()
 
-                historical_points.append(
-                    {
-                        "timestamp": datetime.fromtimestamp(timestamp_ms / 1000, tz=UTC),
-                        "price_usd": price,
-                        "volume_24h_usd": volume,
-                    }
-                )
+                except Exception as e:
+                    logger.warning(f"Error processing {symbol}: {e}")
 
-            return historical_points
+        async with coingecko_client(timeout=self.timeout) as client:
+            try:
+                await asyncio.gather(*(worker(client) for _ in range(max(1, max_in_flight))))
+            finally:
+                flush()
 
-        except Exception as e:
-            logger.error(f"Error fetching historical data for {coin_id}: {e}")
-            return []
+        return updated_count
 
+    def _symbols_by_market_cap(self) -> List[str]:
+        """All coin symbols, biggest market cap first (coins without market cap last)"""
+        rows = self.db.query(Coin.symbol).order_by(Coin.market_cap.desc().nulls_last(), Coin.symbol).all()
+        return [symbol for (symbol,) in rows]
 
-async def _fetch_historical_prices(self, coin_id: str, days_back: int) -> List[Dict[str, Any]]:
-    """Fetch historical prices from CoinGecko"""
-    async with httpx.AsyncClient(timeout=self.timeout) as client:
+    def _load_crawl_progress(self) -> Dict[str, str]:
+        """symbol -> ISO timestamp of the last successful /coins/{id} fetch"""
         try:
-            url = f"{self.base_url}/coins/{coin_id}/market_chart"
-            params = {
-                "vs_currency": "usd",
-                "days": days_back,
-                "interval": "hourly",  # Get hourly data
-            }
-
-            response = await client.get(url, params=params)
-            response.raise_for_status()
-
-            data = response.json()
-            prices = data.get("prices", [])
-            volumes = data.get("total_volumes", [])
-
-            # Convert to our format
-            historical_points = []
-            for i, price_point in enumerate(prices):
-                timestamp_ms, price = price_point
-                volume = volumes[i][1] if i < len(volumes) else 0
-
-                historical_points.append(
-                    {
-                        "timestamp": datetime.fromtimestamp(timestamp_ms / 1000, tz=UTC),
-                        "price_usd": price,
-                        "volume_24h_usd": volume,
-                    }
-                )
-
-            return historical_points
-
+            with open(METADATA_PROGRESS_PATH, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
         except Exception as e:
-            logger.error(f"Error fetching historical data for {coin_id}: {e}")
-            return []
-
-
-async def _store_historical_data(self, symbol: str, historical_data: List[Dict[str, Any]]) -> int:
-    """Store historical data in PriceHistoryRaw"""
-    from decimal import Decimal
-
-    stored_count = 0
+            logger.warning(f"Ignoring unreadable metadata crawl progress: {e}")
+            return {}
 
-    for data_point in historical_data:
+    def _save_crawl_progress(self, progress: Dict[str, str]):
+        """Persist crawl progress atomically"""
         try:
-            # Store as "average" exchange with historical timestamp
-            historical_record = PriceHistoryRaw(
-                symbol=symbol.upper(),
-                exchange="average",
-                price_usd=Decimal(str(data_point["price_usd"])),
-                volume_24h_usd=Decimal(str(data_point["volume_24h_usd"])) if data_point["volume_24h_usd"] else None,
-                timestamp=data_point["timestamp"],
-            )
-
-            self.db.add(historical_record)
-            stored_count += 1
-
+            os.makedirs(os.path.dirname(METADATA_PROGRESS_PATH) or ".", exist_ok=True)
+            tmp_path = f"{METADATA_PROGRESS_PATH}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(progress, f, separators=(",", ":"))
+            os.replace(tmp_path, METADATA_PROGRESS_PATH)
         except Exception as e:
-            logger.warning(f"Error storing historical point for {symbol}: {e}")
-            continue
+            logger.warning(f"Could not persist metadata crawl progress: {e}")
 
-    if stored_count > 0:
-        self.db.commit()
+    def get_metadata_stats(self) -> Dict[str, int]:
+        """Get statistics about metadata completeness"""
+        total_coins = self.db.query(Coin).count()
+        coins_with_names = self.db.query(Coin).filter(Coin.name.isnot(None)).count()
+        coins_with_categories = self.db.query(Coin).filter(Coin.categories.isnot(None)).count()
+        coins_with_supply = self.db.query(Coin).filter(Coin.circulating_supply.isnot(None)).count()
 
-    return stored_count
+        return {
+            "total_coins": total_coins,
+            "coins_with_names": coins_with_names,
+            "coins_with_categories": coins_with_categories,
+            "coins_with_supply": coins_with_supply,
+            "names_percentage": round((coins_with_names / total_coins * 100), 1) if total_coins else 0,
+            "categories_percentage": round((coins_with_categories / total_coins * 100), 1) if total_coins else 0,
+            "supply_percentage": round((coins_with_supply / total_coins * 100), 1) if total_coins else 0,
+        }
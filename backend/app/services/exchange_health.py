@@ -0,0 +1,206 @@
+import logging
+import time
+from datetime import UTC, datetime
+from typing import Any, Dict, Optional
+
+from app.config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_MAX_OPEN_SECONDS,
+    CIRCUIT_OPEN_SECONDS,
+    EXCHANGE_MAX_POLL_SECONDS,
+    EXCHANGE_POLL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class ExchangeCircuit:
+    """
+    Circuit breaker plus adaptive polling schedule for one exchange adapter
+    closed: polled on its own interval, which stretches with latency and error rate.
+    open: not polled until the cooldown ends (cooldown doubles on every failed probe).
+    half_open: exactly one probe request; success closes the circuit, failure re-opens it
+    The last good batch is kept so ticks that skip (or fail) a closed exchange reuse it instead of dropping the
+    exchange's pairs from the aggregates for a tick
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deadline: float,
+        base_interval: float = EXCHANGE_POLL_SECONDS,
+        max_interval: float = EXCHANGE_MAX_POLL_SECONDS,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        open_seconds: float = CIRCUIT_OPEN_SECONDS,
+        max_open_seconds: float = CIRCUIT_MAX_OPEN_SECONDS,
+        max_batch_age: float = EXCHANGE_MAX_POLL_SECONDS,
+    ):
+        self.name = name
+        self.deadline = deadline
+        self.base_interval = base_interval
+        self.max_interval = max_interval
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.max_batch_age = max_batch_age
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.cooldown = open_seconds
+        self.opened_at: Optional[float] = None
+        self.probe_in_flight = False
+
+        # Exponentially weighted moving averages of latency and failure (0/1)
+        self.latency_ewma: Optional[float] = None
+        self.error_rate = 0.0
+
+        self.interval = base_interval
+        self.last_attempt: Optional[float] = None
+        self.last_success: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.calls = 0
+        self.failures = 0
+        self.skipped = 0
+
+        # Last successful fetch (a TickBatch) and when it arrived
+        self.last_batch: Optional[Any] = None
+        self.last_batch_at: Optional[float] = None
+
+    # ==================== POLLING DECISION ====================
+
+    def should_poll(self, now: Optional[float] = None) -> bool:
+        """Whether this tick should call the exchange (also moves open -> half_open once the cooldown ends)"""
+        now = time.monotonic() if now is None else now
+
+        if self.state == OPEN:
+            if now - self.opened_at < self.cooldown:
+                self.skipped += 1
+                return False
+            self.state = HALF_OPEN
+            logger.info(f"{self.name}: circuit half-open, probing")
+
+        if self.state == HALF_OPEN:
+            if self.probe_in_flight:
+                self.skipped += 1
+                return False
+            self.probe_in_flight = True
+            self.last_attempt = now
+            return True
+
+        # Scheduler ticks jitter a little, so allow one second of slack against the interval
+        if self.last_attempt is not None and now - self.last_attempt < self.interval - 1.0:
+            self.skipped += 1
+            return False
+        self.last_attempt = now
+        return True
+
+    # ==================== OUTCOMES ====================
+
+    def record_success(self, latency: float):
+        self._observe(latency, failed=False)
+        self.consecutive_failures = 0
+        self.last_success = datetime.now(UTC)
+
+        if self.state != CLOSED:
+            logger.info(f"{self.name}: circuit closed after successful probe")
+        self.state = CLOSED
+        self.cooldown = self.open_seconds
+        self.probe_in_flight = False
+
+    def record_failure(self, latency: float, error: BaseException):
+        self._observe(latency, failed=True)
+        self.consecutive_failures += 1
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"
+
+        if self.state == HALF_OPEN:
+            # Failed probe: back off harder before the next one
+            self.cooldown = min(self.cooldown * 2, self.max_open_seconds)
+            self._open()
+        elif self.consecutive_failures >= self.failure_threshold:
+            self._open()
+        self.probe_in_flight = False
+
+    def remember_batch(self, batch: Any, now: Optional[float] = None):
+        self.last_batch = batch
+        self.last_batch_at = time.monotonic() if now is None else now
+
+    def usable_batch(self, now: Optional[float] = None) -> Optional[Any]:
+        """The last good batch, while the circuit is closed and the batch at most max_batch_age old"""
+        now = time.monotonic() if now is None else now
+        if self.state != CLOSED or self.last_batch is None or now - self.last_batch_at > self.max_batch_age:
+            return None
+        return self.last_batch
+
+    def _open(self):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        logger.warning(
+            f"{self.name}: circuit open for {self.cooldown:.0f}s after {self.consecutive_failures} failures "
+            f"({self.last_error})"
+        )
+
+    def _observe(self, latency: float, failed: bool):
+        self.calls += 1
+        self.latency_ewma = latency if self.latency_ewma is None else 0.3 * latency + 0.7 * self.latency_ewma
+        self.error_rate = 0.2 * float(failed) + 0.8 * self.error_rate
+
+        # Healthy adapters are polled every tick; slow (over half the deadline) or repeatedly failing ones less often.
+        # A single failure (error rate 0.2) doesn't stretch the interval
+        slowness = max(1.0, self.latency_ewma / (self.deadline / 2))
+        unreliability = 1 + 4 * self.error_rate if self.error_rate >= 0.25 else 1.0
+        self.interval = min(self.max_interval, self.base_interval * slowness * unreliability)
+
+    # ==================== METRICS ====================
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        if self.state == OPEN:
+            next_poll_in = max(0.0, self.cooldown - (now - self.opened_at))
+        elif self.last_attempt is None or self.state == HALF_OPEN:
+            next_poll_in = 0.0
+        else:
+            next_poll_in = max(0.0, self.interval - (now - self.last_attempt))
+
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ms": round(self.latency_ewma * 1000, 1) if self.latency_ewma is not None else None,
+            "error_rate": round(self.error_rate, 3),
+            "poll_interval_seconds": round(self.interval, 1),
+            "next_poll_in_seconds": round(next_poll_in, 1),
+            "open_cooldown_seconds": round(self.cooldown, 1) if self.state != CLOSED else None,
+            "last_success": self.last_success.isoformat() if self.last_success else None,
+            "last_batch_age_seconds": round(now - self.last_batch_at, 1) if self.last_batch_at is not None else None,
+            "last_error": self.last_error,
+            "calls": self.calls,
+            "failures": self.failures,
+            "skipped_ticks": self.skipped,
+        }
+
+
+class ExchangeHealthRegistry:
+    """
+    One ExchangeCircuit per exchange, shared by every ExchangeService instance in the process
+    Keyword arguments are passed to each circuit (benchmarks use base_interval=0 to poll on every tick)
+    """
+
+    def __init__(self, **circuit_options):
+        self.circuit_options = circuit_options
+        self._circuits: Dict[str, ExchangeCircuit] = {}
+
+    def get(self, exchange: str, deadline: float) -> ExchangeCircuit:
+        circuit = self._circuits.get(exchange)
+        if circuit is None:
+            circuit = self._circuits[exchange] = ExchangeCircuit(exchange, deadline, **self.circuit_options)
+        return circuit
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        return {name: circuit.snapshot() for name, circuit in self._circuits.items()}
+
+
+exchange_health = ExchangeHealthRegistry()
@@ -0,0 +1,261 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import UTC, datetime, timedelta
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import httpx
+
+from app.config import CACHE_DIR
+from app.services import ticker_parsing
+
+logger = logging.getLogger(__name__)
+
+EXCHANGES = ("binance", "kraken", "mexc")
+
+# Exchange-specific asset codes -> the symbol used everywhere else
+ASSET_ALIASES = {"XBT": "BTC", "XDG": "DOGE"}
+
+# Kraken's legacy asset codes carry an X (crypto) / Z (fiat) class prefix. Only these are stripped;
+# newer assets are listed under their plain ticker, which may itself start with X or Z
+KRAKEN_LEGACY_ASSETS = {
+    "XXBT": "XBT",
+    "XETH": "ETH",
+    "XETC": "ETC",
+    "XLTC": "LTC",
+    "XMLN": "MLN",
+    "XREP": "REP",
+    "XXDG": "XDG",
+    "XXLM": "XLM",
+    "XXMR": "XMR",
+    "XXRP": "XRP",
+    "XZEC": "ZEC",
+    "ZAUD": "AUD",
+    "ZCAD": "CAD",
+    "ZCHF": "CHF",
+    "ZEUR": "EUR",
+    "ZGBP": "GBP",
+    "ZJPY": "JPY",
+    "ZUSD": "USD",
+}
+
+
+class PairInfo(NamedTuple):
+    base: str
+    quote: str
+    canonical: str  # "BASE/QUOTE", the same key for a market on every exchange
+
+
+def canonical_asset(code: str) -> str:
+    """Normalize an exchange asset code (XXBT, XBT, btc) to the app's symbol (BTC)"""
+    code = code.upper()
+    code = KRAKEN_LEGACY_ASSETS.get(code, code)
+    return ASSET_ALIASES.get(code, code)
+
+
+def pair_info(base: str, quote: str) -> PairInfo:
+    base, quote = canonical_asset(base), canonical_asset(quote)
+    return PairInfo(base, quote, f"{base}/{quote}")
+
+
+class ExchangeMetadataCache:
+    """
+    Process-wide pair -> (base, quote) tables built from each exchange's own metadata
+    (Binance / MEXC exchangeInfo, Kraken AssetPairs) instead of guessing from symbol suffixes.
+    The metadata changes on listings only, so it is fetched on a slow cadence, persisted to a JSON file
+    and compiled into one dict per exchange for O(1) lookups in the parsing loop
+    """
+
+    def __init__(
+        self,
+        cache_path: str,
+        ttl: timedelta = timedelta(hours=24),
+        retry_after: timedelta = timedelta(minutes=5),
+        timeout: float = 30.0,
+    ):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.retry_after = retry_after
+        self.timeout = timeout
+
+        self._tables: Dict[str, Dict[str, PairInfo]] = {}
+        self._fetched_at: Dict[str, datetime] = {}
+        self._failed_at: Dict[str, datetime] = {}
+
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    # ==================== PUBLIC API ====================
+
+    def table(self, exchange: str) -> Dict[str, PairInfo]:
+        """Compiled pair -> PairInfo dict for one exchange (empty until metadata is available)"""
+        return self._tables.get(exchange, {})
+
+    def lookup(self, exchange: str, pair: str) -> Optional[PairInfo]:
+        """Single-pair lookup (parsers hold on to table() instead)"""
+        return self._tables.get(exchange, {}).get(pair)
+
+    def is_stale(self, exchange: str) -> bool:
+        """True when an exchange's table is missing or older than the TTL"""
+        fetched_at = self._fetched_at.get(exchange)
+        return fetched_at is None or datetime.now(UTC) - fetched_at >= self.ttl
+
+    async def ensure_loaded(self):
+        """
+        Make sure every exchange has a table before a tick is parsed
+        Missing tables are fetched now; stale ones are served as-is and refreshed in the background
+        """
+        if not self._tables:
+            self.load()
+
+        # An exchange whose metadata endpoint just failed isn't retried on every tick
+        missing = [
+            exchange for exchange in EXCHANGES if exchange not in self._tables and not self._recently_failed(exchange)
+        ]
+        if missing:
+            await self.refresh(missing)
+        elif any(self.is_stale(exchange) for exchange in EXCHANGES):
+            self._schedule_refresh()
+
+    async def refresh(self, exchanges: Optional[List[str]] = None) -> int:
+        """Fetch metadata for the given (default: stale) exchanges concurrently. Returns the number refreshed"""
+        async with self._lock:
+            exchanges = [exchange for exchange in (exchanges or EXCHANGES) if self.is_stale(exchange)]
+            if not exchanges:
+                return 0
+
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                results = await asyncio.gather(
+                    *(self._fetch(client, exchange) for exchange in exchanges), return_exceptions=True
+                )
+
+            refreshed = 0
+            for exchange, result in zip(exchanges, results):
+                if isinstance(result, Exception):
+                    # Keep serving the previous table (if any) until the next attempt
+                    logger.error(f"Error fetching {exchange} metadata: {result}")
+                    self._failed_at[exchange] = datetime.now(UTC)
+                    continue
+                self.update(exchange, result)
+                refreshed += 1
+
+            if refreshed:
+                self.save()
+            return refreshed
+
+    def update(self, exchange: str, table: Dict[str, PairInfo]):
+        """Replace an exchange's table (e.g. from a Kraken AssetPairs body fetched for a tick)"""
+        self._tables[exchange] = table
+        self._fetched_at[exchange] = datetime.now(UTC)
+        logger.info(f"Compiled {len(table)} {exchange} pairs from exchange metadata")
+
+    # ==================== FETCH & COMPILE ====================
+
+    @staticmethod
+    def metadata_url(exchange: str) -> str:
+        """Metadata endpoint, read from the environment at call time (same variables as ExchangeService)"""
+        if exchange == "binance":
+            return os.getenv("BINANCE_INFO_URL") or "https://api.binance.com/api/v3/exchangeInfo"
+        if exchange == "mexc":
+            return f"{os.getenv('MEXC_API_URL') or 'https://www.mexc.com/open/api/v3'}/exchangeInfo"
+        return f"{os.getenv('KRAKEN_API_URL') or 'https://api.kraken.com'}/0/public/AssetPairs"
+
+    async def _fetch(self, client: httpx.AsyncClient, exchange: str) -> Dict[str, PairInfo]:
+        response = await client.get(self.metadata_url(exchange))
+        response.raise_for_status()
+
+        data = ticker_parsing.loads(response.content)
+        if exchange == "kraken":
+            return compile_kraken_asset_pairs(data)
+        return compile_exchange_info(data)
+
+    # ==================== PERSISTENCE ====================
+
+    def load(self) -> int:
+        """Load persisted tables from disk (called at startup). Returns the number of pairs"""
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+
+            for exchange, entry in cached.items():
+                self._tables[exchange] = {
+                    pair: pair_info(base, quote) for pair, (base, quote) in entry["pairs"].items()
+                }
+                self._fetched_at[exchange] = datetime.fromisoformat(entry["fetched_at"])
+
+            total = sum(len(table) for table in self._tables.values())
+            logger.info(f"Loaded {total} cached exchange pairs for {', '.join(self._tables)}")
+            return total
+
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable exchange metadata cache {self.cache_path}: {e}")
+            return 0
+
+    def save(self):
+        """Persist the tables atomically (write to a temp file, then rename)"""
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        exchange: {
+                            "fetched_at": self._fetched_at[exchange].isoformat(),
+                            "pairs": {pair: [info.base, info.quote] for pair, info in table.items()},
+                        }
+                        for exchange, table in self._tables.items()
+                    },
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp_path, self.cache_path)
+
+        except Exception as e:
+            logger.warning(f"Could not persist exchange metadata cache: {e}")
+
+    # ==================== INTERNALS ====================
+
+    def _recently_failed(self, exchange: str) -> bool:
+        failed_at = self._failed_at.get(exchange)
+        return failed_at is not None and datetime.now(UTC) - failed_at < self.retry_after
+
+    def _schedule_refresh(self):
+        """Refresh in the background unless a refresh is already running"""
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self.refresh())
+
+
+def compile_exchange_info(data: Dict[str, Any]) -> Dict[str, PairInfo]:
+    """Binance / MEXC /exchangeInfo -> pair table (both list symbols with baseAsset / quoteAsset)"""
+    table = {}
+    for market in data.get("symbols", []):
+        pair, base, quote = market.get("symbol"), market.get("baseAsset"), market.get("quoteAsset")
+        if pair and base and quote:
+            table[pair] = pair_info(base, quote)
+    return table
+
+
+def compile_kraken_asset_pairs(data: Dict[str, Any]) -> Dict[str, PairInfo]:
+    """
+    Kraken /AssetPairs -> pair table, keyed like the Ticker response
+    wsname ("XBT/USD") is the clean base/quote; base/quote codes are the fallback
+    """
+    table = {}
+    for pair, market in data.get("result", {}).items():
+        wsname = market.get("wsname", "")
+        if "/" in wsname:
+            base, quote = wsname.split("/", 1)
+        else:
+            base, quote = market.get("base", ""), market.get("quote", "")
+        if base and quote:
+            table[pair] = pair_info(base, quote)
+    return table
+
+
+# Shared by every ExchangeService instance in the process
+exchange_metadata = ExchangeMetadataCache(os.path.join(CACHE_DIR, "exchange_metadata.json"))
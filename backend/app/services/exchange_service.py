@@ -1,16 +1,35 @@
 import asyncio
 import logging
 import os
+import time
 from datetime import UTC, datetime
-from typing import Any, Dict, List, Optional
+from typing import Awaitable, Callable, Dict, Optional
 
 import httpx
 from sqlalchemy.orm import Session
 
+from app.config import EXCHANGE_DEADLINE_SECONDS, STREAM_TICKER_PARSING
 from app.models import ExchangePair
+from app.services import ticker_parsing
+from app.services.exchange_health import ExchangeCircuit, exchange_health
+from app.services.exchange_metadata import compile_kraken_asset_pairs, exchange_metadata
+from app.services.quote_conversion import QuoteConversionGraph
+from app.services.tick_batch import TickBatch
 
 logger = logging.getLogger(__name__)
 
+# Quote currencies tried as symbol suffixes (longest first, so FDUSD/TUSD aren't read as ...USD)
+BINANCE_QUOTE_CURRENCIES = sorted(
+    "USDT FDUSD USDC TUSD BUSD DAI USD EUR TRY BRL GBP AUD JPY ARS MXN PLN RON UAH ZAR IDR BTC ETH BNB ADA XRP DOT".split(),
+    key=len,
+    reverse=True,
+)
+MEXC_QUOTE_CURRENCIES = ["USDT", "USDC", "USDE", "EUR", "TRY", "BRL", "BTC", "ETH"]
+
+# Field readers for the incremental parse path (raw ticker object -> value, no full decode)
+_binance_quote_volume = ticker_parsing.numeric_field("quoteVolume")
+_mexc_volume = ticker_parsing.numeric_field("volume")
+
 
 class ExchangeService:
     """
@@ -19,7 +38,9 @@ class ExchangeService:
 
     def __init__(self, db: Session):
         self.db = db
-        self.timeout = 30.0
+        # Each exchange gets a deadline shorter than the tick; requests can't outlive it
+        self.deadline = EXCHANGE_DEADLINE_SECONDS
+        self.timeout = EXCHANGE_DEADLINE_SECONDS
         self.max_retries = 3
 
         # Load URLs from environment
@@ -29,9 +50,21 @@ class ExchangeService:
         self.mexc_api_url = os.getenv("MEXC_API_URL", "https://www.mexc.com/open/api/v3")
         self.coingecko_api_url = os.getenv("COINGECKO_API_URL", "https://api.coingecko.com/api/v3")
 
+        # Filter ticker rows while decoding instead of decoding the whole body first
+        self.stream_parsing = STREAM_TICKER_PARSING
+
+        # Pair -> (base, quote) tables from exchangeInfo / AssetPairs, shared by the process
+        self.metadata = exchange_metadata
+
+        # Circuit breakers / poll schedules, shared by the process
+        self.health = exchange_health
+
+        # USD conversion rates of the last fetch_all_exchange_data tick
+        self.conversion_graph: Optional[QuoteConversionGraph] = None
+
     # ==================== BINANCE API ====================
 
-    async def fetch_binance_data(self) -> List[Dict[str, Any]]:
+    async def fetch_binance_data(self) -> TickBatch:
         """Fetch ticker data from Binance - ALL pairs"""
         url = self.binance_24hr_url
 
@@ -39,71 +72,67 @@ class ExchangeService:
             try:
                 response = await client.get(url)
                 response.raise_for_status()
-                data = response.json()
+                batch = self.parse_binance_tickers(response.content)
 
-                processed_data = []
-                usd_reference_prices = {}
-
-                # First pass: collect USDT prices for conversion
-                for ticker in data:
-                    symbol = ticker["symbol"]
-                    if symbol.endswith("USDT"):
-                        base_symbol, _ = self._parse_binance_symbol(symbol)
-                        if base_symbol:
-                            usd_reference_prices[base_symbol] = float(ticker["lastPrice"])
-
-                # Second pass: process all pairs
-                for ticker in data:
-                    try:
-                        symbol = ticker["symbol"]
-
-                        # Skip very low volume pairs (less than $10k daily volume)
-                        quote_volume = float(ticker.get("quoteVolume", 0))
-                        if quote_volume < 10000:
-                            continue
-
-                        # Parse symbol
-                        base_symbol, quote_currency = self._parse_binance_symbol(symbol)
-                        if not base_symbol or not quote_currency:
-                            continue
-
-                        last_price = float(ticker["lastPrice"])
-
-                        # Convert to USD
-                        price_usd = self._convert_to_usd(last_price, quote_currency, usd_reference_prices)
-
-                        processed_data.append(
-                            {
-                                "symbol": base_symbol,
-                                "exchange": "binance",
-                                "pair": symbol,
-                                "quote_currency": quote_currency,
-                                "price_usd": price_usd,
-                                "price_24h_high": float(ticker["highPrice"]),
-                                "price_24h_low": float(ticker["lowPrice"]),
-                                "price_change_24h": float(ticker["priceChangePercent"]),
-                                "volume_24h_base": float(ticker["volume"]),
-                                "volume_24h_usd": quote_volume,
-                                "timestamp": datetime.now(UTC),
-                            }
-                        )
-                    except (ValueError, KeyError) as e:
-                        logger.warning(f"Error processing Binance ticker {symbol}: {e}")
-                        continue
-
-                logger.info(f"Fetched {len(processed_data)} pairs from Binance")
-                return processed_data
+                logger.info(f"Fetched {len(batch)} pairs from Binance")
+                return batch
 
             except httpx.HTTPError as e:
                 logger.error(f"Binance API error: {e}")
-                return []
+                raise
 
-    def _parse_binance_symbol(self, symbol: str) -> tuple[Optional[str], Optional[str]]:
-        """Parse Binance symbol into base and quote (simple but effective)"""
-        # Common quote currencies (order matters - longest first)
-        quote_currencies = ["USDT", "BUSD", "USDC", "TUSD", "BTC", "ETH", "BNB", "ADA", "XRP", "DOT", "USD"]
+    def parse_binance_tickers(self, body: bytes) -> TickBatch:
+        """Normalize a raw /ticker/24hr response body"""
+        if self.stream_parsing:
+            # Only pairs above the volume floor are decoded, the rest are skipped as raw bytes
+            data = ticker_parsing.loads_filtered(body, lambda raw: _binance_quote_volume(raw) >= 10000)
+        else:
+            data = ticker_parsing.loads(body)
+
+        batch = TickBatch("binance")
+        pair_table = self.metadata.table("binance")
+
+        # Prices stay in the quote currency; QuoteConversionGraph fills the USD columns
+        for ticker in data:
+            try:
+                symbol = ticker["symbol"]
+
+                # Skip very low volume pairs (less than $10k daily volume)
+                quote_volume = float(ticker.get("quoteVolume", 0))
+                if quote_volume < 10000:
+                    continue
+
+                # Metadata first; suffix guessing only for pairs listed since the last metadata refresh
+                info = pair_table.get(symbol)
+                if info:
+                    base_symbol, quote_currency = info.base, info.quote
+                else:
+                    base_symbol, quote_currency = self._parse_binance_symbol(symbol)
+                if not base_symbol or not quote_currency:
+                    continue
 
-        for quote in quote_currencies:
+                batch.append(
+                    base_symbol,
+                    symbol,
+                    quote_currency,
+                    None,
+                    float(ticker["highPrice"]),
+                    float(ticker["lowPrice"]),
+                    float(ticker["priceChangePercent"]),
+                    float(ticker["volume"]),
+                    None,
+                    float(ticker["lastPrice"]),
+                    quote_volume,
+                )
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Error processing Binance ticker {symbol}: {e}")
+                continue
+
+        return batch
+
+    def _parse_binance_symbol(self, symbol: str) -> tuple[Optional[str], Optional[str]]:
+        """Guess base and quote from the symbol suffix (fallback for pairs missing from exchangeInfo)"""
+        for quote in BINANCE_QUOTE_CURRENCIES:
             if symbol.endswith(quote):
                 base = symbol[: -len(quote)]
                 if len(base) > 0:
@@ -111,102 +140,89 @@ class ExchangeService:
 
         return None, None
 
-    def _convert_to_usd(self, price: float, quote_currency: str, reference_prices: Dict[str, float]) -> Optional[float]:
-        """Convert price to USD using reference prices"""
-        if quote_currency in ["USDT", "BUSD", "USDC", "TUSD", "USD"]:
-            return price
-        elif quote_currency in reference_prices:
-            return price * reference_prices[quote_currency]
-        else:
-            return None
-
     # ==================== KRAKEN API ====================
 
-    async def fetch_kraken_data(self) -> List[Dict[str, Any]]:
+    async def fetch_kraken_data(self) -> TickBatch:
         """Fetch ticker data from Kraken - ALL pairs"""
         pairs_url = f"{self.kraken_api_url}/0/public/AssetPairs"
         ticker_url = f"{self.kraken_api_url}/0/public/Ticker"
 
         async with httpx.AsyncClient(timeout=self.timeout) as client:
             try:
-                # Get asset pairs
-                pairs_response = await client.get(pairs_url)
-                pairs_response.raise_for_status()
-                pairs_data = pairs_response.json()["result"]
+                # Asset pairs only when the metadata cache has no Kraken table yet
+                pairs_body = None
+                if not self.metadata.table("kraken"):
+                    pairs_response = await client.get(pairs_url)
+                    pairs_response.raise_for_status()
+                    pairs_body = pairs_response.content
 
                 # Get ticker data for all pairs
                 ticker_response = await client.get(ticker_url)
                 ticker_response.raise_for_status()
-                ticker_data = ticker_response.json()["result"]
-
-                processed_data = []
-                usd_reference_prices = {}
-
-                # First pass: collect USD prices for conversion
-                for pair, ticker in ticker_data.items():
-                    if pair.endswith("USD") or pair.endswith("ZUSD"):
-                        pair_info = pairs_data.get(pair, {})
-                        base = pair_info.get("base", "").replace("X", "").replace("Z", "")
-                        if base == "XBT":
-                            base = "BTC"
-                        usd_reference_prices[base] = float(ticker["c"][0])
-
-                # Second pass: process all pairs
-                for pair, ticker in ticker_data.items():
-                    try:
-                        pair_info = pairs_data.get(pair, {})
-                        base = pair_info.get("base", "").replace("X", "").replace("Z", "")
-                        quote = pair_info.get("quote", "").replace("X", "").replace("Z", "")
-
-                        # Normalize symbols
-                        if base == "XBT":
-                            base = "BTC"
-                        if quote == "XBT":
-                            quote = "BTC"
-
-                        last_price = float(ticker["c"][0])
-                        volume_24h = float(ticker["v"][1])
-
-                        # Skip very low volume pairs
-                        if volume_24h < 1:
-                            continue
-
-                        # Convert to USD
-                        price_usd = self._convert_to_usd(last_price, quote, usd_reference_prices)
-
-                        # Calculate price change
-                        open_price = float(ticker["o"])
-                        price_change_24h = ((last_price - open_price) / open_price * 100) if open_price else 0
-
-                        processed_data.append(
-                            {
-                                "symbol": base,
-                                "exchange": "kraken",
-                                "pair": pair,
-                                "quote_currency": quote,
-                                "price_usd": price_usd,
-                                "price_24h_high": float(ticker["h"][1]),
-                                "price_24h_low": float(ticker["l"][1]),
-                                "price_change_24h": price_change_24h,
-                                "volume_24h_base": volume_24h,
-                                "volume_24h_usd": volume_24h * last_price if price_usd else None,
-                                "timestamp": datetime.now(UTC),
-                            }
-                        )
-                    except (ValueError, KeyError, IndexError) as e:
-                        logger.warning(f"Error processing Kraken ticker {pair}: {e}")
-                        continue
-
-                logger.info(f"Fetched {len(processed_data)} pairs from Kraken")
-                return processed_data
+
+                batch = self.parse_kraken_tickers(ticker_response.content, pairs_body)
+
+                logger.info(f"Fetched {len(batch)} pairs from Kraken")
+                return batch
 
             except httpx.HTTPError as e:
                 logger.error(f"Kraken API error: {e}")
-                return []
+                raise
+
+    def parse_kraken_tickers(self, ticker_body: bytes, pairs_body: Optional[bytes] = None) -> TickBatch:
+        """
+        Normalize a raw Ticker response body (keyed objects, so always a full decode)
+        An AssetPairs body, if given, replaces the cached Kraken pair table first
+        """
+        if pairs_body is not None:
+            self.metadata.update("kraken", compile_kraken_asset_pairs(ticker_parsing.loads(pairs_body)))
+        pair_table = self.metadata.table("kraken")
+        ticker_data = ticker_parsing.loads(ticker_body)["result"]
+
+        batch = TickBatch("kraken")
+
+        # Prices stay in the quote currency; QuoteConversionGraph fills the USD columns
+        for pair, ticker in ticker_data.items():
+            try:
+                # Kraken pair names can't be split reliably (XXBTZUSD, XBTUSDT, SOLUSD), so unknown pairs are skipped
+                info = pair_table.get(pair)
+                if not info:
+                    continue
+                base, quote = info.base, info.quote
+
+                last_price = float(ticker["c"][0])
+                volume_24h = float(ticker["v"][1])
+
+                # Skip very low volume pairs
+                if volume_24h < 1:
+                    continue
+
+                # Calculate price change
+                open_price = float(ticker["o"])
+                price_change_24h = ((last_price - open_price) / open_price * 100) if open_price else 0
+
+                batch.append(
+                    base,
+                    pair,
+                    quote,
+                    None,
+                    float(ticker["h"][1]),
+                    float(ticker["l"][1]),
+                    price_change_24h,
+                    volume_24h,
+                    None,
+                    last_price,
+                    volume_24h * last_price,
+                )
+            except (ValueError, KeyError, IndexError) as e:
+                logger.warning(f"Error processing Kraken ticker {pair}: {e}")
+                continue
+
+        return batch
 
     # ==================== MEXC API ====================
 
-    async def fetch_mexc_data(self) -> List[Dict[str, Any]]:
+    async def fetch_mexc_data(self) -> TickBatch:
         """Fetch ticker data from MEXC - ALL pairs"""
         # MEXC v3 API endpoint for tickers
         url = f"{self.mexc_api_url}/ticker/24hr"
@@ -215,85 +231,83 @@ class ExchangeService:
             try:
                 response = await client.get(url)
                 response.raise_for_status()
-                data = response.json()
+                batch = self.parse_mexc_tickers(response.content)
 
-                # MEXC v3 returns a direct list, not nested in "data"
-                if not isinstance(data, list):
-                    logger.warning(f"MEXC returned unexpected format: {type(data)}")
-                    return []
-
-                if not data:
-                    logger.warning("MEXC returned empty ticker data")
-                    return []
-
-                processed_data = []
-                usd_reference_prices = {}
-
-                # First pass: collect USDT prices for conversion
-                for ticker in data:
-                    symbol = ticker.get("symbol", "")
-                    if symbol.endswith("USDT"):
-                        base_symbol, _ = self._parse_mexc_symbol(symbol)
-                        if base_symbol:
-                            last_price = ticker.get("lastPrice", "0")
-                            if last_price and float(last_price) > 0:
-                                usd_reference_prices[base_symbol] = float(last_price)
-
-                # Second pass: process all pairs
-                for ticker in data:
-                    try:
-                        symbol = ticker.get("symbol", "")
-
-                        # Skip very low volume pairs
-                        volume = float(ticker.get("volume", 0))
-                        if volume < 1000:  # Lower threshold for MEXC
-                            continue
-
-                        base_symbol, quote_currency = self._parse_mexc_symbol(symbol)
-                        if not base_symbol or not quote_currency:
-                            continue
-
-                        last_price = float(ticker.get("lastPrice", 0))
-                        if last_price <= 0:
-                            continue
-
-                        # Convert to USD
-                        price_usd = self._convert_to_usd(last_price, quote_currency, usd_reference_prices)
-
-                        # Calculate 24h change - MEXC v3 provides priceChangePercent
-                        price_change_24h = float(ticker.get("priceChangePercent", 0))
-
-                        processed_data.append(
-                            {
-                                "symbol": base_symbol,
-                                "exchange": "mexc",
-                                "pair": symbol,
-                                "quote_currency": quote_currency,
-                                "price_usd": price_usd,
-                                "price_24h_high": float(ticker.get("highPrice", last_price)),
-                                "price_24h_low": float(ticker.get("lowPrice", last_price)),
-                                "price_change_24h": price_change_24h,
-                                "volume_24h_base": volume,
-                                "volume_24h_usd": volume * last_price if price_usd else None,
-                                "timestamp": datetime.now(UTC),
-                            }
-                        )
-                    except (ValueError, KeyError) as e:
-                        logger.warning(f"Error processing MEXC ticker {symbol}: {e}")
-                        continue
-
-                logger.info(f"Fetched {len(processed_data)} pairs from MEXC")
-                return processed_data
+                logger.info(f"Fetched {len(batch)} pairs from MEXC")
+                return batch
 
             except httpx.HTTPError as e:
                 logger.error(f"MEXC API error: {e}")
-                return []
+                raise
 
-    def _parse_mexc_symbol(self, symbol: str) -> tuple[Optional[str], Optional[str]]:
-        """Parse MEXC symbol into base and quote"""
-        quote_currencies = ["USDT", "USDC", "BTC", "ETH"]
+    def parse_mexc_tickers(self, body: bytes) -> TickBatch:
+        """Normalize a raw /ticker/24hr response body"""
+        if self.stream_parsing:
+            # Only pairs above the volume floor are decoded, the rest are skipped as raw bytes
+            data = ticker_parsing.loads_filtered(body, lambda raw: _mexc_volume(raw) >= 1000)
+        else:
+            data = ticker_parsing.loads(body)
+
+        # MEXC v3 returns a direct list, not nested in "data"
+        if not isinstance(data, list):
+            logger.warning(f"MEXC returned unexpected format: {type(data)}")
+            return TickBatch("mexc")
+
+        if not data:
+            logger.warning("MEXC returned empty ticker data")
+            return TickBatch("mexc")
+
+        batch = TickBatch("mexc")
+        pair_table = self.metadata.table("mexc")
+
+        # Prices stay in the quote currency; QuoteConversionGraph fills the USD columns
+        for ticker in data:
+            try:
+                symbol = ticker.get("symbol", "")
+
+                # Skip very low volume pairs
+                volume = float(ticker.get("volume", 0))
+                if volume < 1000:  # Lower threshold for MEXC
+                    continue
+
+                # Metadata first; suffix guessing only for pairs listed since the last metadata refresh
+                info = pair_table.get(symbol)
+                if info:
+                    base_symbol, quote_currency = info.base, info.quote
+                else:
+                    base_symbol, quote_currency = self._parse_mexc_symbol(symbol)
+                if not base_symbol or not quote_currency:
+                    continue
+
+                last_price = float(ticker.get("lastPrice", 0))
+                if last_price <= 0:
+                    continue
 
-        for quote in quote_currencies:
+                # Calculate 24h change - MEXC v3 provides priceChangePercent
+                price_change_24h = float(ticker.get("priceChangePercent", 0))
+
+                batch.append(
+                    base_symbol,
+                    symbol,
+                    quote_currency,
+                    None,
+                    float(ticker.get("highPrice", last_price)),
+                    float(ticker.get("lowPrice", last_price)),
+                    price_change_24h,
+                    volume,
+                    None,
+                    last_price,
+                    volume * last_price,
+                )
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Error processing MEXC ticker {symbol}: {e}")
+                continue
+
+        return batch
+
+    def _parse_mexc_symbol(self, symbol: str) -> tuple[Optional[str], Optional[str]]:
+        """Guess base and quote from the symbol suffix (fallback for pairs missing from exchangeInfo)"""
+        for quote in MEXC_QUOTE_CURRENCIES:
             if symbol.endswith(quote):
                 base = symbol[: -len(quote)]
                 if len(base) > 0:
@@ -303,79 +317,128 @@ class ExchangeService:
 
     # ==================== AGGREGATE DATA ====================
 
-    async def fetch_all_exchange_data(self) -> Dict[str, List[Dict[str, Any]]]:
-        """Fetch data from all exchanges concurrently"""
+    async def fetch_all_exchange_data(self) -> Dict[str, TickBatch]:
+        """
+        Fetch data from all exchanges concurrently
+        Each exchange runs behind its own circuit breaker and deadline, so a slow or failing exchange doesn't hold
+        up the others. An exchange that isn't polled (or fails) this tick contributes its last good batch, or an
+        empty one once that is too old or its circuit is open
+        """
         logger.info("Starting to fetch data from all exchanges")
 
-        # Run all exchange fetches concurrently
-        tasks = [self.fetch_binance_data(), self.fetch_kraken_data(), self.fetch_mexc_data()]
+        fetchers = {
+            "binance": self.fetch_binance_data,
+            "kraken": self.fetch_kraken_data,
+            "mexc": self.fetch_mexc_data,
+        }
 
         try:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-
-            exchange_data = {
-                "binance": results[0] if not isinstance(results[0], Exception) else [],
-                "kraken": results[1] if not isinstance(results[1], Exception) else [],
-                "mexc": results[2] if not isinstance(results[2], Exception) else [],
-            }
-
-            # Log results
-            for exchange, data in exchange_data.items():
-                if isinstance(data, list):
-                    logger.info(f"{exchange}: {len(data)} pairs fetched")
-                else:
-                    logger.error(f"{exchange}: Failed to fetch data")
+            # Pair metadata is fetched on first use and refreshed in the background once stale
+            await self.metadata.ensure_loaded()
+
+            results = await asyncio.gather(
+                *(self._fetch_guarded(exchange, fetch) for exchange, fetch in fetchers.items())
+            )
+            exchange_data = dict(zip(fetchers, results))
+
+            # One conversion graph over every exchange's pairs, reused for all batches this tick
+            self.conversion_graph = QuoteConversionGraph.from_batches(exchange_data)
+            self.conversion_graph.apply_all(exchange_data)
 
             return exchange_data
 
         except Exception as e:
             logger.error(f"Error fetching exchange data: {e}")
-            return {"binance": [], "kraken": [], "mexc": []}
+            return {exchange: TickBatch(exchange) for exchange in fetchers}
+
+    async def _fetch_guarded(self, exchange: str, fetch: Callable[[], Awaitable[TickBatch]]) -> TickBatch:
+        """Run one exchange fetch through its circuit breaker, with retries inside the deadline"""
+        circuit = self.health.get(exchange, self.deadline)
+        if not circuit.should_poll():
+            logger.info(f"{exchange}: skipped this tick (circuit {circuit.state}, interval {circuit.interval:.0f}s)")
+            return self._last_good_batch(exchange, circuit)
 
-    def update_exchange_pairs(self, exchange_data: Dict[str, List[Dict[str, Any]]]) -> int:
+        started = time.monotonic()
+        try:
+            batch = await asyncio.wait_for(self._with_retries(exchange, fetch), timeout=self.deadline)
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                e = TimeoutError(f"no response within the {self.deadline:.0f}s deadline")
+            circuit.record_failure(time.monotonic() - started, e)
+            logger.error(f"{exchange}: Failed to fetch data ({e})")
+            return self._last_good_batch(exchange, circuit)
+        finally:
+            # record_success / record_failure clear it too, but a cancelled probe (CancelledError isn't an Exception)
+            # would otherwise leave the circuit half-open and skipped forever
+            circuit.probe_in_flight = False
+
+        circuit.record_success(time.monotonic() - started)
+        circuit.remember_batch(batch)
+        logger.info(f"{exchange}: {len(batch)} pairs fetched")
+        return batch
+
+    @staticmethod
+    def _last_good_batch(exchange: str, circuit: ExchangeCircuit) -> TickBatch:
+        """
+        The exchange's last good batch if still usable, else an empty one (the exchange drops out of the tick)
+        Reused batches are marked stale so they only feed the coin table, not history
+        """
+        batch = circuit.usable_batch()
+        if batch is None:
+            return TickBatch(exchange)
+        batch.stale = True
+        logger.info(f"{exchange}: reusing the batch from {time.monotonic() - circuit.last_batch_at:.0f}s ago")
+        return batch
+
+    async def _with_retries(self, exchange: str, fetch: Callable[[], Awaitable[TickBatch]]) -> TickBatch:
+        """Retry transport errors, 429s and 5xx responses with a short backoff; other errors fail immediately"""
+        for attempt in range(self.max_retries):
+            try:
+                return await fetch()
+            except httpx.HTTPError as e:
+                status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+                retryable = status is None or status == 429 or status >= 500
+                if not retryable or attempt == self.max_retries - 1:
+                    raise
+                logger.warning(f"{exchange}: attempt {attempt + 1} failed, retrying")
+                await asyncio.sleep(0.5 * 2**attempt)
+
+    def update_exchange_pairs(self, exchange_data: Dict[str, TickBatch]) -> int:
         """Update exchange pairs table with current data"""
         updated_count = 0
+        current_time = datetime.now(UTC)
+
+        # Mark pairs inactive first - only for exchanges polled this tick (a skipped or failed exchange keeps its pairs)
+        polled = [exchange for exchange, batch in exchange_data.items() if len(batch)]
+        self.db.query(ExchangePair).filter(ExchangePair.exchange.in_(polled)).update({ExchangePair.is_active: False})
+
+        # Load existing pairs once instead of querying per pair
+        existing_pairs = {(pair.exchange, pair.pair): pair for pair in self.db.query(ExchangePair).all()}
 
-        # Mark all pairs as inactive first
-        self.db.query(ExchangePair).update({ExchangePair.is_active: False})
-
-        for exchange, pairs_data in exchange_data.items():
-            for pair_data in pairs_data:
-                try:
-                    symbol = pair_data["symbol"]
-                    pair = pair_data["pair"]
-                    quote_currency = pair_data["quote_currency"]
-
-                    # Check if pair exists
-                    existing_pair = (
-                        self.db.query(ExchangePair)
-                        .filter(ExchangePair.exchange == exchange, ExchangePair.pair == pair)
-                        .first()
+        for exchange, batch in exchange_data.items():
+            for symbol, pair, quote_currency in zip(batch.symbols, batch.pairs, batch.quote_currencies):
+                existing_pair = existing_pairs.get((exchange, pair))
+
+                if existing_pair:
+                    # Update existing
+                    existing_pair.symbol = symbol
+                    existing_pair.quote_currency = quote_currency
+                    existing_pair.is_active = True
+                    existing_pair.last_seen = current_time
+                else:
+                    # Create new
+                    new_pair = ExchangePair(
+                        symbol=symbol,
+                        exchange=exchange,
+                        pair=pair,
+                        quote_currency=quote_currency,
+                        is_active=True,
+                        last_seen=current_time,
                     )
+                    self.db.add(new_pair)
+                    existing_pairs[(exchange, pair)] = new_pair
 
-                    if existing_pair:
-                        # Update existing
-                        existing_pair.symbol = symbol
-                        existing_pair.quote_currency = quote_currency
-                        existing_pair.is_active = True
-                        existing_pair.last_seen = datetime.now(UTC)
-                    else:
-                        # Create new
-                        new_pair = ExchangePair(
-                            symbol=symbol,
-                            exchange=exchange,
-                            pair=pair,
-                            quote_currency=quote_currency,
-                            is_active=True,
-                            last_seen=datetime.now(UTC),
-                        )
-                        self.db.add(new_pair)
-
-                    updated_count += 1
-
-                except Exception as e:
-                    logger.warning(f"Error updating exchange pair {pair_data}: {e}")
-                    continue
+                updated_count += 1
 
         self.db.commit()
         logger.info(f"Updated {updated_count} exchange pairs")
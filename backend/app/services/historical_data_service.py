@@ -1,19 +1,33 @@
 import asyncio
 import logging
 from datetime import UTC, datetime, timedelta
-from decimal import Decimal
+from statistics import median
 from typing import Any, Dict, List
 
-import httpx
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, insert
 from sqlalchemy.orm import Session
 
-from app.models import Coin, PriceHistoryRaw
-from app.services import CoinGeckoService
-from app.tasks.scheduler import pause_scheduler, resume_scheduler
+from app.models import Coin, PriceHistory1d, PriceHistory1h, PriceHistory1w, PriceHistory5m, PriceHistoryRaw
+from app.models.key_dictionary import intern_history_keys
+from app.services import AggregationService, CoinGeckoService
+from app.services.aggregation_service import AGGREGATION_INTERVALS, as_utc, floor_timestamp
+from app.services.coingecko_service import coingecko_rate_limiter
+from app.services.http_cache import coingecko_client
 
 logger = logging.getLogger(__name__)
 
+# Coarser intervals to rebuild from each backfilled granularity once a backfill completes
+# (weekly candles for daily backfills are derived directly in store_historical_data)
+REAGGREGATE_AFTER_BACKFILL = {"5m": ["1h", "1d", "1w"], "1h": ["1d", "1w"], "1d": []}
+
+# OHLC table and bucket size for each granularity CoinGecko's market_chart can return
+# (1 day -> 5-minute points, 2-90 days -> hourly points, longer ranges -> daily points)
+BACKFILL_RESOLUTIONS = {
+    "5m": (PriceHistory5m, timedelta(minutes=5)),
+    "1h": (PriceHistory1h, timedelta(hours=1)),
+    "1d": (PriceHistory1d, timedelta(days=1)),
+}
+
 
 class HistoricalDataService:
     """
@@ -25,9 +39,15 @@ class HistoricalDataService:
         self.db = db
         self.coingecko_service = CoinGeckoService(db)
         self.base_url = "https://api.coingecko.com/api/v3"
-        self.rate_limit_delay = 1.2  # CoinGecko free tier rate limit
+        # Rate limiting is handled by the shared coingecko_rate_limiter (the metadata crawl may run at the same time)
         self.timeout = 30.0
 
+        # Progress of the running backfill (read by the startup job tracker)
+        self.progress: Dict[str, Any] = {"total": 0, "processed": 0, "successful": 0, "current_symbol": None}
+
+        # granularity -> (symbols, earliest, latest) stored since the last re-aggregation
+        self._backfilled_ranges: Dict[str, tuple] = {}
+
     # ==================== GAP DETECTION ====================
 
     def detect_data_gaps(self) -> Dict[str, Any]:
@@ -43,23 +63,14 @@ class HistoricalDataService:
         # Get all coins that should have data
         all_coins = self.db.query(Coin).all()
 
+        # Backfilled history lives in the OHLC tables, so the newest point may be in any of them
+        latest_timestamps = self._get_latest_average_timestamps()
+
         for coin in all_coins:
             symbol = coin.symbol
+            latest_timestamp = latest_timestamps.get(symbol)
 
-            # Get the latest data point for this coin
-            latest_data = (
-                self.db.query(PriceHistoryRaw)
-                .filter(
-                    and_(
-                        PriceHistoryRaw.symbol == symbol,
-                        PriceHistoryRaw.exchange == "average",  # Use average prices for gap detection
-                    )
-                )
-                .order_by(PriceHistoryRaw.timestamp.desc())
-                .first()
-            )
-
-            if not latest_data:
+            if not latest_timestamp:
                 # No data at all - need complete backfill
                 gaps_detected[symbol] = {
                     "type": "complete_missing",
@@ -70,7 +81,7 @@ class HistoricalDataService:
                 }
             else:
                 # Check how old the latest data is
-                time_since_last = now - latest_data.timestamp
+                time_since_last = now - latest_timestamp
                 gap_hours = time_since_last.total_seconds() / 3600
                 gap_days = gap_hours / 24
 
@@ -78,7 +89,7 @@ class HistoricalDataService:
                 if gap_hours > 2:
                     gaps_detected[symbol] = {
                         "type": "gap_detected",
-                        "last_data": latest_data.timestamp.isoformat(),
+                        "last_data": latest_timestamp.isoformat(),
                         "gap_hours": round(gap_hours, 1),
                         "gap_days": round(gap_days, 1),
                         "needs_backfill": True,
@@ -98,6 +109,25 @@ class HistoricalDataService:
             "scan_timestamp": now.isoformat(),
         }
 
+    def _get_latest_average_timestamps(self) -> Dict[str, datetime]:
+        """Latest "average" data per symbol across the raw and OHLC tables (end of the newest bucket)"""
+        latest_timestamps: Dict[str, datetime] = {}
+        tables = [(PriceHistoryRaw, timedelta(0))] + list(BACKFILL_RESOLUTIONS.values())
+
+        for table, bucket_size in tables:
+            rows = (
+                self.db.query(table.symbol, func.max(table.timestamp))
+                .filter(table.exchange == "average")
+                .group_by(table.symbol)
+                .all()
+            )
+            for symbol, timestamp in rows:
+                timestamp = as_utc(timestamp) + bucket_size
+                if symbol not in latest_timestamps or timestamp > latest_timestamps[symbol]:
+                    latest_timestamps[symbol] = timestamp
+
+        return latest_timestamps
+
     # ==================== HISTORICAL DATA FETCHING ====================
 
     async def fetch_historical_prices_for_coin(
@@ -115,7 +145,7 @@ class HistoricalDataService:
             logger.warning(f"No CoinGecko ID found for symbol {symbol}")
             return []
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
+        async with coingecko_client(timeout=self.timeout) as client:
             try:
                 url = f"{self.base_url}/coins/{coin_id}/market_chart"
 
@@ -133,7 +163,8 @@ class HistoricalDataService:
                     params = {"vs_currency": "usd", "days": days_back, "interval": interval}
                     logger.info(f"Fetching {days_back} days of historical data for {symbol}")
 
-                response = await client.get(url, params=params)
+                async with coingecko_rate_limiter.slot():
+                    response = await client.get(url, params=params)
                 response.raise_for_status()
 
                 data = response.json()
@@ -175,60 +206,164 @@ class HistoricalDataService:
 
     def store_historical_data(self, historical_data: List[Dict[str, Any]]) -> int:
         """
-        Store historical data points in PriceHistoryRaw
-        Avoids duplicates by checking existing timestamps
+        Store historical data points directly in the OHLC table matching their granularity
+        Daily data is also rolled up into PriceHistory1w, raw table is never touched
+        Avoids duplicates by skipping buckets that already exist
         """
-        stored_count = 0
-        skipped_count = 0
+        if not historical_data:
+            return 0
 
+        symbol = historical_data[0]["symbol"]
+        granularity = self._detect_granularity(historical_data)
+        table, bucket_size = BACKFILL_RESOLUTIONS[granularity]
+
+        # Each CoinGecko point is a single sample, so it becomes a flat candle for its bucket.
+        # The bucket still in progress is skipped and left to the regular rollups.
+        now = datetime.now(UTC)
+        candles: Dict[datetime, Dict[str, float]] = {}
         for data_point in historical_data:
-            try:
-                symbol = data_point["symbol"]
-                timestamp = data_point["timestamp"]
-
-                # Check if this data point already exists
-                existing = (
-                    self.db.query(PriceHistoryRaw)
-                    .filter(
-                        and_(
-                            PriceHistoryRaw.symbol == symbol,
-                            PriceHistoryRaw.exchange == "average",
-                            PriceHistoryRaw.timestamp == timestamp,
-                        )
-                    )
-                    .first()
-                )
+            bucket = floor_timestamp(data_point["timestamp"], bucket_size)
+            if bucket + bucket_size > now:
+                continue
 
-                if existing:
-                    skipped_count += 1
-                    continue
+            price = float(data_point["price_usd"])
+            volume = float(data_point["volume_24h_usd"] or 0)
+            candle = candles.get(bucket)
+            if candle is None:
+                candles[bucket] = {"open": price, "high": price, "low": price, "close": price, "volume": volume}
+            else:
+                candle["high"] = max(candle["high"], price)
+                candle["low"] = min(candle["low"], price)
+                candle["close"] = price
+                candle["volume"] = volume
 
-                # Store new data point
-                historical_record = PriceHistoryRaw(
-                    symbol=symbol,
-                    exchange="average",  # Mark as average/historical data
-                    price_usd=Decimal(str(data_point["price_usd"])),
-                    volume_24h_usd=Decimal(str(data_point["volume_24h_usd"])) if data_point["volume_24h_usd"] else None,
-                    timestamp=timestamp,
-                )
+        stored_count = self._insert_candles(table, symbol, candles)
+        if stored_count > 0:
+            self._record_backfilled_range(granularity, symbol, min(candles), max(candles) + bucket_size)
 
-                self.db.add(historical_record)
-                stored_count += 1
+        if granularity == "1d":
+            stored_count += self._store_weekly_from_daily(symbol, candles)
 
-                # Commit in batches to avoid memory issues
-                if stored_count % 100 == 0:
-                    self.db.commit()
+        logger.info(f"Stored {stored_count} historical {granularity} candles for {symbol}")
+        return stored_count
 
-            except Exception as e:
-                logger.warning(f"Error storing historical point: {e}")
+    def _record_backfilled_range(self, granularity: str, symbol: str, start_time: datetime, end_time: datetime):
+        """Remember what was backfilled so the coarser tables can be rebuilt afterwards"""
+        symbols, earliest, latest = self._backfilled_ranges.get(granularity, (set(), start_time, end_time))
+        symbols.add(symbol)
+        self._backfilled_ranges[granularity] = (symbols, min(earliest, start_time), max(latest, end_time))
+
+    def reaggregate_backfilled_ranges(self) -> Dict[str, Any]:
+        """
+        Rebuild the coarser OHLC tables over everything backfilled since the last call
+        Ranges are trimmed to whole buckets so partial first days/weeks don't overwrite complete candles
+        """
+        aggregation_service = AggregationService(self.db)
+        results = {}
+
+        for granularity, (symbols, start_time, end_time) in self._backfilled_ranges.items():
+            for interval in REAGGREGATE_AFTER_BACKFILL[granularity]:
+                bucket_size = AGGREGATION_INTERVALS[interval][2]
+                first_full_bucket = floor_timestamp(start_time, bucket_size)
+                if first_full_bucket < start_time:
+                    first_full_bucket += bucket_size
+
+                try:
+                    results[interval] = aggregation_service.reaggregate_range(
+                        interval, first_full_bucket, end_time, symbols=sorted(symbols)
+                    )
+                except Exception as e:
+                    logger.error(f"Error re-aggregating {interval} after backfill: {e}")
+                    results[interval] = {"error": str(e)}
+
+        self._backfilled_ranges = {}
+        return results
+
+    def _detect_granularity(self, historical_data: List[Dict[str, Any]]) -> str:
+        """Classify CoinGecko points as 5m, 1h or 1d data from their median spacing"""
+        timestamps = sorted(as_utc(point["timestamp"]) for point in historical_data)
+        if len(timestamps) < 2:
+            return "1d"
+
+        spacing = median((b - a).total_seconds() for a, b in zip(timestamps, timestamps[1:]))
+        if spacing <= 15 * 60:
+            return "5m"
+        if spacing <= 3 * 3600:
+            return "1h"
+        return "1d"
+
+    def _store_weekly_from_daily(self, symbol: str, daily_candles: Dict[datetime, Dict[str, float]]) -> int:
+        """Roll daily candles into Monday-aligned weekly candles (complete weeks only)"""
+        now = datetime.now(UTC)
+        current_week_start = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+
+        weekly_candles: Dict[datetime, Dict[str, float]] = {}
+        for day in sorted(daily_candles):
+            week_start = day - timedelta(days=day.weekday())
+            if week_start >= current_week_start:
                 continue
 
-        # Final commit
-        if stored_count > 0:
-            self.db.commit()
+            daily = daily_candles[day]
+            weekly = weekly_candles.get(week_start)
+            if weekly is None:
+                weekly_candles[week_start] = dict(daily)
+            else:
+                weekly["high"] = max(weekly["high"], daily["high"])
+                weekly["low"] = min(weekly["low"], daily["low"])
+                weekly["close"] = daily["close"]
+                weekly["volume"] += daily["volume"]
+
+        return self._insert_candles(PriceHistory1w, symbol, weekly_candles)
+
+    def _insert_candles(
+        self, table, symbol: str, candles: Dict[datetime, Dict[str, float]], chunk_size: int = 1000
+    ) -> int:
+        """Bulk insert "average" candles for buckets that don't exist yet"""
+        if not candles:
+            return 0
+
+        # One range query for existing buckets instead of one lookup per point
+        existing = {
+            as_utc(timestamp)
+            for (timestamp,) in self.db.query(table.timestamp).filter(
+                and_(
+                    table.symbol == symbol,
+                    table.exchange == "average",
+                    table.timestamp >= min(candles),
+                    table.timestamp <= max(candles),
+                )
+            )
+        }
 
-        logger.info(f"Stored {stored_count} new historical points, skipped {skipped_count} duplicates")
-        return stored_count
+        rows = [
+            {
+                "symbol": symbol,
+                "exchange": "average",
+                "price_open": candle["open"],
+                "price_close": candle["close"],
+                "price_high": candle["high"],
+                "price_low": candle["low"],
+                "volume_sum": round(candle["volume"], 2),
+                "timestamp": timestamp,
+            }
+            for timestamp, candle in sorted(candles.items())
+            if timestamp not in existing
+        ]
+
+        try:
+            intern_history_keys(self.db.get_bind(), [symbol], ["average"])
+            for i in range(0, len(rows), chunk_size):
+                self.db.execute(insert(table), rows[i : i + chunk_size])
+                self.db.commit()
+        except Exception as e:
+            logger.error(f"Error storing historical candles for {symbol} in {table.__tablename__}: {e}")
+            self.db.rollback()
+            return 0
+
+        skipped_count = len(candles) - len(rows)
+        if skipped_count:
+            logger.debug(f"Skipped {skipped_count} existing {table.__tablename__} candles for {symbol}")
+        return len(rows)
 
     # ==================== BULK OPERATIONS ====================
 
@@ -242,20 +377,23 @@ class HistoricalDataService:
         """
         logger.info(f"Starting bulk historical backfill for all coins ({days_back} days)")
 
+        from app.tasks.scheduler import pause_scheduler, resume_scheduler
+
         if pause_real_time:
             logger.info("Pausing real-time data fetching...")
             pause_scheduler()
 
         try:
             # Get all coins
-            all_coins = self.db.query(Coin).all()
+            all_coins = await asyncio.to_thread(self.db.query(Coin).all)
             symbols = [coin.symbol for coin in all_coins]
 
             total_coins = len(symbols)
             processed_count = 0
             success_count = 0
+            self._reset_progress(total_coins)
 
-            # Process in batches to manage rate limits
+            # Process in batches (for progress logging; the shared limiter paces the requests)
             for i in range(0, total_coins, batch_size):
                 batch_symbols = symbols[i : i + batch_size]
                 logger.info(
@@ -263,13 +401,14 @@ class HistoricalDataService:
                 )
 
                 for symbol in batch_symbols:
+                    self.progress.update(processed=processed_count, successful=success_count, current_symbol=symbol)
                     try:
                         # Fetch historical data
                         historical_data = await self.fetch_historical_prices_for_coin(symbol, days_back=days_back)
 
                         if historical_data:
-                            # Store the data
-                            stored_count = self.store_historical_data(historical_data)
+                            # Store the data (off the event loop, only the HTTP fetches run on it)
+                            stored_count = await asyncio.to_thread(self.store_historical_data, historical_data)
                             if stored_count > 0:
                                 success_count += 1
                                 logger.info(f"✓ {symbol}: {stored_count} points stored")
@@ -280,28 +419,22 @@ class HistoricalDataService:
 
                         processed_count += 1
 
-                        # Rate limiting delay
-                        await asyncio.sleep(self.rate_limit_delay)
-
                     except Exception as e:
                         logger.error(f"Error processing {symbol}: {e}")
                         processed_count += 1
                         continue
 
-                # Longer delay between batches
-                if i + batch_size < total_coins:
-                    logger.info("Batch complete. Waiting 10 seconds before next batch...")
-                    await asyncio.sleep(10)
-
             result = {
                 "total_coins": total_coins,
                 "processed": processed_count,
                 "successful": success_count,
                 "failed": processed_count - success_count,
                 "days_backfilled": days_back,
+                "reaggregation": await asyncio.to_thread(self.reaggregate_backfilled_ranges),
                 "completion_time": datetime.now(UTC).isoformat(),
             }
 
+            self.progress.update(processed=processed_count, successful=success_count, current_symbol=None)
             logger.info(f"Bulk backfill complete: {success_count}/{total_coins} coins successful")
             return result
 
@@ -310,19 +443,49 @@ class HistoricalDataService:
                 logger.info("Resuming real-time data fetching...")
                 resume_scheduler()
 
-    async def backfill_missing_data_gaps(self) -> Dict[str, Any]:
+    async def backfill_new_coins(self, symbols: List[str], days_back: str | int = 7) -> int:
+        """
+        Backfill recent history for newly discovered coins
+        Short ranges come back hourly from CoinGecko and land in PriceHistory1h
+        """
+        if not symbols:
+            return 0
+
+        logger.info(f"Starting historical backfill for {len(symbols)} new coins ({days_back} days)")
+
+        backfilled_count = 0
+        for symbol in symbols:
+            try:
+                historical_data = await self.fetch_historical_prices_for_coin(symbol, days_back=days_back)
+                if historical_data and await asyncio.to_thread(self.store_historical_data, historical_data) > 0:
+                    backfilled_count += 1
+
+            except Exception as e:
+                logger.error(f"Error backfilling data for {symbol}: {e}")
+                continue
+
+        if backfilled_count > 0:
+            await asyncio.to_thread(self.reaggregate_backfilled_ranges)
+
+        logger.info(f"Historical backfill completed: {backfilled_count} coins processed")
+        return backfilled_count
+
+    async def backfill_missing_data_gaps(self, pause_real_time: bool = True) -> Dict[str, Any]:
         """
         Detect and backfill only the missing data gaps
         More efficient than full backfill
         """
+        from app.tasks.scheduler import pause_scheduler, resume_scheduler
+
         logger.info("Starting intelligent gap backfill...")
 
         # Pause real-time fetching
-        pause_scheduler()
+        if pause_real_time:
+            pause_scheduler()
 
         try:
-            # Detect gaps
-            gap_analysis = self.detect_data_gaps()
+            # Detect gaps (a query per coin - keep it off the event loop)
+            gap_analysis = await asyncio.to_thread(self.detect_data_gaps)
             gaps = gap_analysis["gaps"]
 
             if not gaps:
@@ -335,8 +498,10 @@ class HistoricalDataService:
 
             processed_count = 0
             success_count = 0
+            self._reset_progress(len(gaps))
 
             for symbol, gap_info in gaps.items():
+                self.progress.update(processed=processed_count, successful=success_count, current_symbol=symbol)
                 try:
                     days_to_fetch = gap_info["recommended_days"]
 
@@ -351,7 +516,7 @@ class HistoricalDataService:
                     historical_data = await self.fetch_historical_prices_for_coin(symbol, days_back=days_to_fetch)
 
                     if historical_data:
-                        stored_count = self.store_historical_data(historical_data)
+                        stored_count = await asyncio.to_thread(self.store_historical_data, historical_data)
                         if stored_count > 0:
                             success_count += 1
                             logger.info(f"✓ {symbol}: {stored_count} points backfilled")
@@ -360,9 +525,6 @@ class HistoricalDataService:
 
                     processed_count += 1
 
-                    # Rate limiting
-                    await asyncio.sleep(self.rate_limit_delay)
-
                 except Exception as e:
                     logger.error(f"Error backfilling {symbol}: {e}")
                     processed_count += 1
@@ -374,25 +536,30 @@ class HistoricalDataService:
                 "processed": processed_count,
                 "successful": success_count,
                 "failed": processed_count - success_count,
+                "reaggregation": await asyncio.to_thread(self.reaggregate_backfilled_ranges),
                 "completion_time": datetime.now(UTC).isoformat(),
             }
 
+            self.progress.update(processed=processed_count, successful=success_count, current_symbol=None)
             logger.info(f"Gap backfill complete: {success_count}/{len(gaps)} gaps filled")
             return result
 
         finally:
-            resume_scheduler()
+            if pause_real_time:
+                resume_scheduler()
 
     # ==================== STARTUP GAP CHECK ====================
 
-    async def startup_gap_check_and_fill(self, max_gap_hours: int = 2) -> Dict[str, Any]:
+    async def startup_gap_check_and_fill(self, max_gap_hours: int = 2, pause_real_time: bool = True) -> Dict[str, Any]:
         """
         Check for gaps on startup and automatically backfill if needed
         Call this when your API starts up after being offline
+        pause_real_time=False keeps live fetching running (used by the background startup job)
         """
         logger.info("Running startup gap check...")
 
-        gap_analysis = self.detect_data_gaps()
+        # The blocking database work runs in worker threads so real-time ticks and requests keep being served
+        gap_analysis = await asyncio.to_thread(self.detect_data_gaps)
 
         # Check if we have any significant gaps
         significant_gaps = {}
@@ -414,7 +581,7 @@ class HistoricalDataService:
         logger.info(f"Found {len(significant_gaps)} coins with significant gaps - starting automatic backfill")
 
         # Automatically backfill the gaps
-        backfill_result = await self.backfill_missing_data_gaps()
+        backfill_result = await self.backfill_missing_data_gaps(pause_real_time=pause_real_time)
 
         return {
             "status": "gaps_filled",
@@ -425,6 +592,10 @@ class HistoricalDataService:
 
     # ==================== UTILITY FUNCTIONS ====================
 
+    def _reset_progress(self, total: int):
+        """Start progress tracking for a new backfill run"""
+        self.progress.update(total=total, processed=0, successful=0, current_symbol=None)
+
     def get_data_coverage_stats(self) -> Dict[str, Any]:
         """
         Get statistics about data coverage for monitoring
@@ -0,0 +1,282 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import UTC, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from app.config import CACHE_DIR, HTTP_CACHE_ENABLED, HTTP_CACHE_MAX_MB
+
+logger = logging.getLogger(__name__)
+
+# Closed history (a market_chart/range ending before this) never changes again
+CLOSED_HISTORY_AGE = timedelta(days=1)
+
+
+def _coingecko_ttl(request: httpx.Request) -> Optional[timedelta]:
+    """Cache lifetime for a CoinGecko request by endpoint class (None = don't cache)"""
+    path = request.url.path
+    params = request.url.params
+
+    if path.endswith("/coins/list"):
+        return timedelta(hours=24)
+
+    if path.endswith("/coins/markets"):
+        return timedelta(minutes=5)
+
+    if path.endswith("/market_chart/range"):
+        try:
+            range_end = datetime.fromtimestamp(float(params.get("to", "")), UTC)
+        except ValueError:
+            return timedelta(minutes=5)
+        if datetime.now(UTC) - range_end > CLOSED_HISTORY_AGE:
+            return timedelta(days=365)
+        return timedelta(minutes=5)
+
+    if path.endswith("/market_chart"):
+        # Daily series only gain a point per day; intraday series move every few minutes
+        if params.get("interval") == "daily" or params.get("days") == "max":
+            return timedelta(hours=6)
+        return timedelta(minutes=30)
+
+    if re.search(r"/coins/[^/]+$", path):
+        return timedelta(hours=24)
+
+    return None
+
+
+class HttpResponseCache:
+    """
+    On-disk cache of successful GET responses, keyed by URL + query params
+    Entries are gzip-compressed JSON; the directory is capped at max_bytes by evicting least-recently-used files
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+
+    # ==================== PUBLIC API ====================
+
+    @staticmethod
+    def cache_key(request: httpx.Request) -> str:
+        """Stable key for a request: method + URL with query params in sorted order"""
+        params = sorted(request.url.params.multi_items())
+        url = request.url.copy_with(query=None)
+        return hashlib.sha256(f"{request.method} {url} {params}".encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Load an entry (marking it as recently used), or None if missing/unreadable"""
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path)
+            return entry
+
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Dropping unreadable HTTP cache entry {path}: {e}")
+            self.delete(key)
+            return None
+
+    def put(self, key: str, entry: Dict[str, Any]):
+        """Store an entry atomically, then evict old entries if the cache is over its size cap"""
+        path = self._path(key)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+
+            with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(entry, f, separators=(",", ":"))
+
+            old_size = self._size(path)
+            os.replace(tmp_path, path)
+            self._adjust_total(self._size(path) - old_size)
+
+        except Exception as e:
+            logger.warning(f"Could not write HTTP cache entry: {e}")
+            return
+
+        if self._current_total() > self.max_bytes:
+            self.evict()
+
+    def delete(self, key: str):
+        """Remove an entry if present"""
+        path = self._path(key)
+        size = self._size(path)
+        try:
+            os.remove(path)
+            self._adjust_total(-size)
+        except FileNotFoundError:
+            pass
+
+    def evict(self, target_ratio: float = 0.9) -> int:
+        """Delete least-recently-used entries until the cache is under target_ratio of max_bytes"""
+        files = self._scan()
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * target_ratio
+
+        removed = 0
+        for path, size, _ in sorted(files, key=lambda f: f[2]):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except FileNotFoundError:
+                continue
+
+        with self._lock:
+            self._total_bytes = total
+
+        if removed:
+            logger.info(f"Evicted {removed} HTTP cache entries ({total / 1024 / 1024:.1f} MB left)")
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Entry count and size of the cache directory"""
+        files = self._scan()
+        return {
+            "entries": len(files),
+            "size_bytes": sum(size for _, size, _ in files),
+            "max_bytes": self.max_bytes,
+        }
+
+    # ==================== INTERNALS ====================
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _scan(self) -> List[Tuple[str, int, float]]:
+        """(path, size, last used) for every entry"""
+        files = []
+        try:
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json.gz"):
+                        stat = entry.stat()
+                        files.append((entry.path, stat.st_size, stat.st_mtime))
+        except FileNotFoundError:
+            pass
+        return files
+
+    def _current_total(self) -> int:
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            return self._total_bytes
+
+    def _adjust_total(self, delta: int):
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += delta
+
+
+class CachingTransport(httpx.AsyncBaseTransport):
+    """
+    httpx transport that answers GETs from an HttpResponseCache while fresh
+    Expired entries are revalidated with If-None-Match / If-Modified-Since, so a 304 costs no body download.
+    Requests that already carry their own validators are passed through untouched
+    """
+
+    def __init__(
+        self,
+        cache: HttpResponseCache,
+        ttl_for: Callable[[httpx.Request], Optional[timedelta]],
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.cache = cache
+        self.ttl_for = ttl_for
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        ttl = self.ttl_for(request) if request.method == "GET" else None
+        if ttl is None or "If-None-Match" in request.headers or "If-Modified-Since" in request.headers:
+            return await self.transport.handle_async_request(request)
+
+        key = self.cache.cache_key(request)
+        entry = self.cache.get(key)
+
+        if entry and time.time() - entry["stored_at"] < ttl.total_seconds():
+            return self._cached_response(request, entry)
+
+        if entry:
+            if entry.get("etag"):
+                request.headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                request.headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = await self.transport.handle_async_request(request)
+
+        if response.status_code == 304 and entry:
+            await response.aclose()
+            entry["stored_at"] = time.time()
+            self.cache.put(key, entry)
+            return self._cached_response(request, entry)
+
+        if response.status_code != 200:
+            return response
+
+        content = await response.aread()
+        await response.aclose()
+
+        self.cache.put(
+            key,
+            {
+                "url": str(request.url),
+                "stored_at": time.time(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "content_type": response.headers.get("Content-Type", "application/json"),
+                "body": content.decode("utf-8"),
+            },
+        )
+
+        # Body is already decoded, so drop the wire-level encoding/length headers
+        headers = [
+            (k, v)
+            for k, v in response.headers.multi_items()
+            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")
+        ]
+        return httpx.Response(200, headers=headers, content=content, request=request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+    @staticmethod
+    def _cached_response(request: httpx.Request, entry: Dict[str, Any]) -> httpx.Response:
+        headers = {"Content-Type": entry["content_type"], "X-Cache": "HIT"}
+        if entry.get("etag"):
+            headers["ETag"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["Last-Modified"] = entry["last_modified"]
+        return httpx.Response(200, headers=headers, content=entry["body"].encode("utf-8"), request=request)
+
+
+# Shared CoinGecko response cache
+coingecko_http_cache = HttpResponseCache(os.path.join(CACHE_DIR, "http", "coingecko"), HTTP_CACHE_MAX_MB * 1024 * 1024)
+
+
+def coingecko_client(timeout: float = 30.0) -> httpx.AsyncClient:
+    """AsyncClient for CoinGecko calls, backed by the on-disk response cache unless HTTP_CACHE_ENABLED is off"""
+    if not HTTP_CACHE_ENABLED:
+        return httpx.AsyncClient(timeout=timeout)
+    return httpx.AsyncClient(timeout=timeout, transport=CachingTransport(coingecko_http_cache, _coingecko_ttl))
@@ -0,0 +1,148 @@
+import base64
+import binascii
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import DateTime, asc, desc, tuple_
+from sqlalchemy.orm import Query
+
+
+class InvalidCursor(ValueError):
+    """A cursor that wasn't issued by this API (or no longer decodes)"""
+
+
+class PageCursor(NamedTuple):
+    """
+    Position after the last row of a page: the sort it was issued for and that row's (sort value, symbol)
+    value is None when the row was in the NULL tail. page is the number of the page the row was on
+    """
+
+    sort_by: str
+    sort_desc: bool
+    value: Any
+    symbol: str
+    page: int
+
+
+# ==================== CURSOR ENCODING ====================
+
+
+def encode_cursor(cursor: PageCursor) -> str:
+    """Opaque, URL-safe token for a cursor"""
+    value = cursor.value.isoformat() if isinstance(cursor.value, datetime) else cursor.value
+    payload = json.dumps([cursor.sort_by, cursor.sort_desc, value, cursor.symbol, cursor.page], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> PageCursor:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        sort_by, sort_desc, value, symbol, page = payload
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {token!r}") from e
+
+    if not (isinstance(sort_by, str) and isinstance(sort_desc, bool) and isinstance(symbol, str)):
+        raise InvalidCursor(f"Invalid cursor: {token!r}")
+    if not isinstance(page, int) or page < 1 or isinstance(value, (list, dict)):
+        raise InvalidCursor(f"Invalid cursor: {token!r}")
+    return PageCursor(sort_by, sort_desc, value, symbol, page)
+
+
+# ==================== KEYSET QUERIES ====================
+
+
+def sort_order(column, tiebreak, sort_desc: bool) -> Tuple:
+    """ORDER BY of a keyset list: the column (NULLs last either way), then the unique tiebreak in the same direction"""
+    order = desc if sort_desc else asc
+    return order(column).nulls_last(), order(tiebreak)
+
+
+def keyset_page(query: Query, column, tiebreak, sort_desc: bool, limit: int, after: Optional[PageCursor]) -> List:
+    """
+    Up to limit rows after a cursor (from the start without one) in sort_order()
+    Runs as two index range scans on (column, tiebreak): rows with a value, then the NULL tail if the page
+    isn't full yet. Each is a plain ascending / descending walk that a B-tree answers without sorting
+    """
+    order = desc if sort_desc else asc
+    key = tuple_(column, tiebreak)
+
+    rows: List = []
+    if after is None or after.value is not None:
+        valued = query.filter(column.isnot(None))
+        if after is not None:
+            value = _column_value(column, after.value)
+            valued = valued.filter(
+                key < tuple_(value, after.symbol) if sort_desc else key > tuple_(value, after.symbol)
+            )
+        rows = valued.order_by(order(column), order(tiebreak)).limit(limit).all()
+
+    if len(rows) < limit:
+        tail = query.filter(column.is_(None))
+        if after is not None and after.value is None:
+            tail = tail.filter(tiebreak < after.symbol if sort_desc else tiebreak > after.symbol)
+        rows += tail.order_by(order(tiebreak)).limit(limit - len(rows)).all()
+
+    return rows
+
+
+def _column_value(column, value: Any) -> Any:
+    """Cursor value (JSON) back in the column's Python type"""
+    if value is not None and isinstance(column.type, DateTime):
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError) as e:
+            raise InvalidCursor(f"Invalid cursor value for {column.key}: {value!r}") from e
+    if isinstance(value, str) and column.type.python_type is not str:
+        raise InvalidCursor(f"Invalid cursor value for {column.key}: {value!r}")
+    return value
+
+
+def split_page(rows: List, size: int, sort_by: str, sort_desc: bool, page: int) -> Tuple[List, Optional[str]]:
+    """Trim a fetch of size + 1 rows to the page, plus the next page's cursor when the extra row came back"""
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, encode_cursor(PageCursor(sort_by, sort_desc, getattr(last, sort_by), last.symbol, page))
+
+
+# ==================== TOTALS ====================
+
+
+class TickCounts:
+    """
+    Row counts behind the paginated lists, computed once per price tick instead of a COUNT(*) per request
+    The tick job calls invalidate(); max_age bounds staleness for writers in other processes
+    """
+
+    def __init__(self, max_age: timedelta):
+        self.max_age = max_age.total_seconds()
+
+        self._lock = threading.Lock()
+        # name -> (count, monotonic time computed)
+        self._counts: Dict[str, Tuple[int, float]] = {}
+        # Bumped by invalidate(), so a count that was running across a tick isn't cached as current
+        self._generation = 0
+
+    def get(self, name: str, count: Callable[[], int]) -> int:
+        """Cached count, or count() if missing / older than max_age"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._counts.get(name)
+            generation = self._generation
+        if cached and now - cached[1] < self.max_age:
+            return cached[0]
+
+        value = count()
+        with self._lock:
+            if generation == self._generation:
+                self._counts[name] = (value, now)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._counts.clear()
+            self._generation += 1
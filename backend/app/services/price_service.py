@@ -1,13 +1,21 @@
 import logging
 from datetime import UTC, datetime, timedelta
-from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from itertools import compress
+from typing import Any, Dict, List, Optional, Tuple
 
-from sqlalchemy import and_
+import numpy as np
+from sqlalchemy import desc, insert
 from sqlalchemy.orm import Session
 
 from app.models import Coin, ExchangePair, PriceHistoryRaw
-from app.services import CoinService
+from app.models.key_dictionary import intern_history_keys
+from app.services import AggregationService, CoinService
+from app.services.aggregation_service import AGGREGATION_INTERVALS
+from app.services.candle_builder import candle_builder
+from app.services.coin_service import coin_counts
+from app.services.raw_history import price_at, raw_history_writer
+from app.services.search_index import coin_search_index
+from app.services.tick_batch import TickBatch
 
 logger = logging.getLogger(__name__)
 
@@ -23,195 +31,238 @@ class PriceService:
 
     # ==================== PRICE AGGREGATION ====================
 
-    def aggregate_exchange_data(self, exchange_data: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    def aggregate_exchange_data(self, exchange_data: Dict[str, TickBatch]) -> List[Dict[str, Any]]:
         """
         Aggregate price data from multiple exchanges into average prices
+        Pairs are packed into columnar arrays and reduced per symbol in one pass (compute once per tick)
         """
-        # Group all data by symbol
-        symbol_data = {}
-
-        for exchange, pairs_data in exchange_data.items():
-            for pair_data in pairs_data:
-                symbol = pair_data["symbol"]
-                price_usd = pair_data.get("price_usd")
-
-                # Skip pairs without USD price
-                if not price_usd or price_usd <= 0:
-                    continue
-
-                if symbol not in symbol_data:
-                    symbol_data[symbol] = {
-                        "symbol": symbol,
-                        "exchanges": [],
-                        "prices": [],
-                        "volumes": [],
-                        "price_changes": [],
-                        "highs": [],
-                        "lows": [],
-                        "timestamp": datetime.now(UTC),
-                    }
-
-                # Add exchange data
-                symbol_data[symbol]["exchanges"].append(exchange)
-                symbol_data[symbol]["prices"].append(float(price_usd))
-                symbol_data[symbol]["volumes"].append(float(pair_data.get("volume_24h_usd", 0)))
-                symbol_data[symbol]["price_changes"].append(float(pair_data.get("price_change_24h", 0)))
-                symbol_data[symbol]["highs"].append(float(pair_data.get("price_24h_high", price_usd)))
-                symbol_data[symbol]["lows"].append(float(pair_data.get("price_24h_low", price_usd)))
-
-        # Calculate averages for each symbol
-        aggregated_coins = []
-        for symbol, data in symbol_data.items():
-            try:
-                aggregated_coin = self._calculate_averages(data)
-                if aggregated_coin:
-                    aggregated_coins.append(aggregated_coin)
-            except Exception as e:
-                logger.warning(f"Error aggregating data for {symbol}: {e}")
-                continue
+        symbols, columns = self._pack_exchange_data(exchange_data)
+        if not symbols:
+            logger.info("Aggregated data for 0 coins from exchanges")
+            return []
+
+        codes, prices, volumes, price_changes, highs, lows = columns
+        n_symbols = len(symbols)
+
+        # Grouped sums per symbol code
+        pair_counts = np.bincount(codes, minlength=n_symbols)
+        volume_sums = np.bincount(codes, weights=volumes, minlength=n_symbols)
+        price_volume_sums = np.bincount(codes, weights=prices * volumes, minlength=n_symbols)
+        price_sums = np.bincount(codes, weights=prices, minlength=n_symbols)
+        change_sums = np.bincount(codes, weights=price_changes, minlength=n_symbols)
+
+        # Grouped max/min need contiguous groups: sort by code, reduce at each group start
+        order = np.argsort(codes, kind="stable")
+        group_starts = np.concatenate(([0], np.cumsum(pair_counts)[:-1]))
+        max_highs = np.maximum.reduceat(highs[order], group_starts)
+        min_lows = np.minimum.reduceat(lows[order], group_starts)
+
+        # Volume-weighted average price (VWAP) if possible, simple average if no volume data
+        has_volume = volume_sums > 0
+        weighted_prices = np.where(
+            has_volume, price_volume_sums / np.where(has_volume, volume_sums, 1), price_sums / pair_counts
+        )
+        avg_price_changes = change_sums / pair_counts
+
+        timestamp = datetime.now(UTC)
+        aggregated_coins = [
+            {
+                "symbol": symbol,
+                "price_usd": price,
+                "price_24h_high": high,
+                "price_24h_low": low,
+                "price_change_24h": change,
+                "volume_24h_usd": volume,
+                "exchange_count": count,
+                "last_updated": timestamp,
+            }
+            for symbol, price, high, low, change, volume, count in zip(
+                symbols,
+                np.round(weighted_prices, 8).tolist(),
+                np.round(max_highs, 8).tolist(),
+                np.round(min_lows, 8).tolist(),
+                np.round(avg_price_changes, 4).tolist(),
+                np.round(volume_sums, 2).tolist(),
+                pair_counts.tolist(),
+            )
+        ]
 
         logger.info(f"Aggregated data for {len(aggregated_coins)} coins from exchanges")
         return aggregated_coins
 
-    def _calculate_averages(self, symbol_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Calculate average price and other metrics for a symbol"""
-        prices = symbol_data["prices"]
-        volumes = symbol_data["volumes"]
-        price_changes = symbol_data["price_changes"]
-        highs = symbol_data["highs"]
-        lows = symbol_data["lows"]
-
-        if not prices:
-            return None
-
-        # Calculate volume-weighted average price (VWAP) if possible
-        total_volume = sum(volumes)
-        if total_volume > 0:
-            # Volume-weighted average
-            weighted_price = sum(p * v for p, v in zip(prices, volumes)) / total_volume
-        else:
-            # Simple average if no volume data
-            weighted_price = sum(prices) / len(prices)
-
-        # Calculate other averages
-        avg_price_change = sum(price_changes) / len(price_changes) if price_changes else 0
-        max_high = max(highs) if highs else weighted_price
-        min_low = min(lows) if lows else weighted_price
-        total_volume_24h = sum(volumes)
-
-        return {
-            "symbol": symbol_data["symbol"],
-            "price_usd": round(weighted_price, 8),
-            "price_24h_high": round(max_high, 8),
-            "price_24h_low": round(min_low, 8),
-            "price_change_24h": round(avg_price_change, 4),
-            "volume_24h_usd": round(total_volume_24h, 2),
-            "exchange_count": len(symbol_data["exchanges"]),
-            "last_updated": symbol_data["timestamp"],
-        }
+    def _pack_exchange_data(self, exchange_data: Dict[str, TickBatch]) -> Tuple[List[str], Tuple]:
+        """
+        Concatenate the priced pairs of every batch into columnar arrays
+        Returns (symbols, (codes, prices, volumes, price_changes, highs, lows)) where codes index into symbols
+        """
+        symbol_index: Dict[str, int] = {}
+        parts: List[Tuple[np.ndarray, ...]] = []
+
+        for batch in exchange_data.values():
+            if not len(batch):
+                continue
+
+            # Skip pairs without USD price
+            mask = batch.priced_mask()
+            prices = batch.array("price_usd")[mask]
+            priced_symbols = compress(batch.symbols, mask.tolist())
+            codes = np.fromiter(
+                (symbol_index.setdefault(symbol, len(symbol_index)) for symbol in priced_symbols),
+                dtype=np.intp,
+                count=len(prices),
+            )
+
+            # Missing volume/change count as 0, missing high/low fall back to the price
+            highs = batch.array("price_24h_high")[mask]
+            lows = batch.array("price_24h_low")[mask]
+            parts.append(
+                (
+                    codes,
+                    prices,
+                    np.nan_to_num(batch.array("volume_24h_usd")[mask]),
+                    np.nan_to_num(batch.array("price_change_24h")[mask]),
+                    np.where(np.isnan(highs) | (highs == 0), prices, highs),
+                    np.where(np.isnan(lows) | (lows == 0), prices, lows),
+                )
+            )
+
+        if not parts:
+            return [], ()
+
+        columns = tuple(np.concatenate(column) for column in zip(*parts))
+        return list(symbol_index), columns
 
     # ==================== HISTORICAL PRICE MANAGEMENT ====================
 
-    def store_price_history(self, exchange_data: Dict[str, List[Dict[str, Any]]]) -> int:
-        """Store individual exchange prices and calculated averages in RAW price history"""
-        stored_count = 0
+    def store_price_history(
+        self, exchange_data: Dict[str, TickBatch], aggregated_coins: Optional[List[Dict[str, Any]]] = None
+    ) -> int:
+        """
+        Store individual exchange prices and calculated averages in RAW price history
+        Pass aggregated_coins when the tick has already been aggregated to avoid recomputing it.
+        Rows go through the change-only writer (unchanged pairs are skipped until their heartbeat);
+        the live candles still see every tick. Stale (reused) batches are left out of the history, the candles and
+        the "average" rows. Returns the number of rows written
+        """
         current_time = datetime.now(UTC)
+        rows = []
 
-        # Store individual exchange prices in RAW table
-        for exchange, pairs_data in exchange_data.items():
-            for pair_data in pairs_data:
-                symbol = pair_data["symbol"]
-                price_usd = pair_data.get("price_usd")
-                volume_usd = pair_data.get("volume_24h_usd")
+        fresh_data = {exchange: batch for exchange, batch in exchange_data.items() if not batch.stale}
+        if len(fresh_data) < len(exchange_data):
+            # The tick's aggregate includes the reused prices - average the fresh batches only
+            aggregated_coins = None
 
+        # Individual exchange prices, read straight from the batch columns
+        for exchange, batch in fresh_data.items():
+            for symbol, price_usd, volume_usd in zip(batch.symbols, batch.price_usd, batch.volume_24h_usd):
                 if price_usd and price_usd > 0:
-                    try:
-                        # Store to PriceHistoryRaw
-                        price_history = PriceHistoryRaw(
-                            symbol=symbol,
-                            exchange=exchange,
-                            price_usd=Decimal(str(price_usd)),
-                            volume_24h_usd=Decimal(str(volume_usd)) if volume_usd else None,
-                            timestamp=current_time,
-                        )
-                        self.db.add(price_history)
-                        stored_count += 1
-                    except Exception as e:
-                        logger.warning(f"Error storing raw price history for {symbol} on {exchange}: {e}")
-
-        # Store aggregated averages in RAW table with exchange="average"
-        aggregated_data = self.aggregate_exchange_data(exchange_data)
-        for coin_data in aggregated_data:
-            try:
-                # Store average to PriceHistoryRaw
-                avg_price_history = PriceHistoryRaw(
-                    symbol=coin_data["symbol"],
-                    exchange="average",  # Special exchange name for averages
-                    price_usd=Decimal(str(coin_data["price_usd"])),
-                    volume_24h_usd=Decimal(str(coin_data["volume_24h_usd"])),
-                    timestamp=current_time,
-                )
-                self.db.add(avg_price_history)
-                stored_count += 1
-            except Exception as e:
-                logger.warning(f"Error storing average price history for {coin_data['symbol']}: {e}")
+                    rows.append(
+                        {
+                            "symbol": symbol,
+                            "exchange": exchange,
+                            "price_usd": price_usd,
+                            "volume_24h_usd": volume_usd or None,
+                            "timestamp": current_time,
+                        }
+                    )
+                    candle_builder.add_tick(symbol, exchange, price_usd, volume_usd or 0.0, current_time)
+
+        # Aggregated averages with exchange="average"
+        if aggregated_coins is None:
+            aggregated_coins = self.aggregate_exchange_data(fresh_data)
+        for coin_data in aggregated_coins:
+            rows.append(
+                {
+                    "symbol": coin_data["symbol"],
+                    "exchange": "average",  # Special exchange name for averages
+                    "price_usd": coin_data["price_usd"],
+                    "volume_24h_usd": coin_data["volume_24h_usd"],
+                    "timestamp": current_time,
+                }
+            )
+            candle_builder.add_tick(
+                coin_data["symbol"], "average", coin_data["price_usd"], coin_data["volume_24h_usd"], current_time
+            )
 
+        changed_rows = raw_history_writer.select(rows)
+        if changed_rows:
+            intern_history_keys(
+                self.db.get_bind(), {row["symbol"] for row in changed_rows}, {row["exchange"] for row in changed_rows}
+            )
+            self.db.execute(insert(PriceHistoryRaw), changed_rows)
         self.db.commit()
-        logger.info(f"Stored {stored_count} RAW price history records")
-        return stored_count
+        raw_history_writer.remember(changed_rows)
+        logger.info(
+            f"Stored {len(changed_rows)} RAW price history records ({len(rows) - len(changed_rows)} unchanged skipped)"
+        )
+
+        self.flush_completed_candles(current_time)
+        return len(changed_rows)
+
+    def flush_completed_candles(self, now: Optional[datetime] = None) -> int:
+        """Bulk write candles the live builder has closed since the last tick into the OHLC tables"""
+        completed = candle_builder.pop_completed(now)
+        if not any(completed.values()):
+            return 0
+
+        aggregation_service = AggregationService(self.db)
+        try:
+            flushed_count = 0
+            for interval, candles in completed.items():
+                flushed_count += aggregation_service.upsert_candles(AGGREGATION_INTERVALS[interval][0], candles)
+            self.db.commit()
+
+            logger.info(f"Flushed {flushed_count} completed live candles")
+            return flushed_count
+
+        except Exception as e:
+            logger.error(f"Error flushing live candles: {e}")
+            self.db.rollback()
+            candle_builder.requeue(completed)
+            return 0
 
-    def store_exchange_pairs(self, exchange_data: Dict[str, List[Dict[str, Any]]]) -> int:
+    def store_exchange_pairs(self, exchange_data: Dict[str, TickBatch]) -> int:
         """Update exchange pairs table with current trading pairs"""
         updated_count = 0
         current_time = datetime.now(UTC)
 
-        # Mark all pairs as inactive first
-        self.db.query(ExchangePair).update({ExchangePair.is_active: False})
-
-        for exchange, pairs_data in exchange_data.items():
-            for pair_data in pairs_data:
-                try:
-                    symbol = pair_data["symbol"]
-                    pair = pair_data["pair"]
-                    quote_currency = pair_data["quote_currency"]
-
-                    # Check if pair exists
-                    existing_pair = (
-                        self.db.query(ExchangePair)
-                        .filter(and_(ExchangePair.exchange == exchange, ExchangePair.pair == pair))
-                        .first()
-                    )
+        # Mark pairs inactive first - only for exchanges polled this tick (a skipped or failed exchange keeps its pairs)
+        exchange_data = {exchange: batch for exchange, batch in exchange_data.items() if not batch.stale}
+        polled = [exchange for exchange, batch in exchange_data.items() if len(batch)]
+        self.db.query(ExchangePair).filter(ExchangePair.exchange.in_(polled)).update({ExchangePair.is_active: False})
 
-                    if existing_pair:
-                        # Update existing
-                        existing_pair.symbol = symbol
-                        existing_pair.quote_currency = quote_currency
-                        existing_pair.is_active = True
-                        existing_pair.last_seen = current_time
-                    else:
-                        # Create new
-                        new_pair = ExchangePair(
-                            symbol=symbol,
-                            exchange=exchange,
-                            pair=pair,
-                            quote_currency=quote_currency,
-                            is_active=True,
-                            last_seen=current_time,
-                        )
-                        self.db.add(new_pair)
+        # Load existing pairs once instead of querying per pair
+        existing_pairs = {(pair.exchange, pair.pair): pair for pair in self.db.query(ExchangePair).all()}
 
-                    updated_count += 1
+        for exchange, batch in exchange_data.items():
+            for symbol, pair, quote_currency in zip(batch.symbols, batch.pairs, batch.quote_currencies):
+                existing_pair = existing_pairs.get((exchange, pair))
 
-                except Exception as e:
-                    logger.warning(f"Error updating exchange pair {pair_data}: {e}")
-                    continue
+                if existing_pair:
+                    # Update existing
+                    existing_pair.symbol = symbol
+                    existing_pair.quote_currency = quote_currency
+                    existing_pair.is_active = True
+                    existing_pair.last_seen = current_time
+                else:
+                    # Create new
+                    new_pair = ExchangePair(
+                        symbol=symbol,
+                        exchange=exchange,
+                        pair=pair,
+                        quote_currency=quote_currency,
+                        is_active=True,
+                        last_seen=current_time,
+                    )
+                    self.db.add(new_pair)
+                    existing_pairs[(exchange, pair)] = new_pair
+
+                updated_count += 1
 
         self.db.commit()
         logger.info(f"Updated {updated_count} exchange pairs")
         return updated_count
 
-    # ==================== PRICE CHANGE CALCULATIONS ====================
-
     def calculate_historical_price_changes(self, symbol: str) -> Dict[str, Optional[float]]:
         """Calculate price changes based on historical data"""
         current_coin = self.coin_service.get_coin(symbol)
@@ -232,19 +283,8 @@ class PriceService:
 
         for period, time_threshold in time_periods.items():
             try:
-                # Use PriceHistoryRaw
-                historical_price = (
-                    self.db.query(PriceHistoryRaw)
-                    .filter(
-                        and_(
-                            PriceHistoryRaw.symbol == symbol.upper(),
-                            PriceHistoryRaw.exchange == "average",
-                            PriceHistoryRaw.timestamp >= time_threshold,
-                        )
-                    )
-                    .order_by(PriceHistoryRaw.timestamp.asc())
-                    .first()
-                )
+                # Use PriceHistoryRaw (price in effect at the threshold, carried forward)
+                historical_price = price_at(self.db, symbol, time_threshold)
 
                 if historical_price and historical_price.price_usd:
                     old_price = float(historical_price.price_usd)
@@ -303,7 +343,7 @@ class PriceService:
 
     # ==================== MAIN PROCESSING FUNCTION ====================
 
-    async def update_prices_and_rankings(self, exchange_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+    async def update_prices_and_rankings(self, exchange_data: Dict[str, TickBatch]) -> Dict[str, int]:
         """
         Enhanced main function to process all exchange data including rankings:
         1. Store price history
@@ -315,14 +355,16 @@ class PriceService:
         results = {}
 
         try:
+            # Aggregate once per tick - reused for the "average" history rows and the coin table
+            aggregated_coins = self.aggregate_exchange_data(exchange_data)
+
             # 1. Store individual and average price history
-            results["price_history"] = self.store_price_history(exchange_data)
+            results["price_history"] = self.store_price_history(exchange_data, aggregated_coins)
 
             # 2. Update exchange pairs
             results["exchange_pairs"] = self.store_exchange_pairs(exchange_data)
 
-            # 3. Aggregate and store/update main coin data
-            aggregated_coins = self.aggregate_exchange_data(exchange_data)
+            # 3. Store/update main coin data
             results["coins_updated"] = self.coin_service.bulk_upsert_coins(aggregated_coins)
 
             # 4. Update price changes based on historical data
@@ -331,6 +373,11 @@ class PriceService:
             # 5. Update market cap rankings (NEW)
             results["rankings_updated"] = await self.update_market_cap_rankings()
 
+            # List totals are recounted on the next request
+            coin_counts.invalidate()
+            # Rebuild the search index here rather than in a search request when coins were added or renamed
+            coin_search_index.refresh(self.db)
+
             logger.info(f"Successfully processed exchange data with rankings: {results}")
             return results
 
@@ -345,10 +392,6 @@ class PriceService:
         Called after price updates to keep rankings current
         """
         try:
-            from sqlalchemy import desc
-
-            from app.models.coin import Coin
-
             # Get all coins with market cap, ordered by market cap descending
             coins_with_market_cap = (
                 self.db.query(Coin)
@@ -391,7 +434,7 @@ class PriceService:
             self.db.rollback()
             return 0
 
-    def process_exchange_data(self, exchange_data: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+    def process_exchange_data(self, exchange_data: Dict[str, TickBatch]) -> Dict[str, int]:
         """
         Original main function to process all exchange data (without rankings):
         1. Store price history
@@ -405,19 +448,23 @@ class PriceService:
         results = {}
 
         try:
+            # Aggregate once per tick - reused for the "average" history rows and the coin table
+            aggregated_coins = self.aggregate_exchange_data(exchange_data)
+
             # 1. Store individual and average price history
-            results["price_history"] = self.store_price_history(exchange_data)
+            results["price_history"] = self.store_price_history(exchange_data, aggregated_coins)
 
             # 2. Update exchange pairs
             results["exchange_pairs"] = self.store_exchange_pairs(exchange_data)
 
-            # 3. Aggregate and store/update main coin data
-            aggregated_coins = self.aggregate_exchange_data(exchange_data)
+            # 3. Store/update main coin data
             results["coins_updated"] = self.coin_service.bulk_upsert_coins(aggregated_coins)
 
             # 4. Update price changes based on historical data
             results["price_changes_updated"] = self.update_all_price_changes()
 
+            coin_counts.invalidate()
+
             logger.info(f"Successfully processed exchange data: {results}")
             return results
 
@@ -0,0 +1,129 @@
+import logging
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.tick_batch import TickBatch
+
+logger = logging.getLogger(__name__)
+
+# Quote currencies priced at exactly 1 USD (every other currency is resolved through pairs)
+USD_ANCHORS = ("USD", "USDT", "USDC", "BUSD", "TUSD")
+
+
+class QuoteConversionGraph:
+    """
+    Currency -> USD rates for one tick, resolved from the pairs of every exchange at once
+    Every traded pair is an edge between its base and quote. Rates spread outwards from the USD anchors one hop
+    at a time, and when several edges reach the same currency the one with the most USD liquidity wins (the
+    bottleneck along the path), so EUR/TRY/FDUSD/BRL quotes resolve through e.g. EURUSDT or USDTTRY without
+    any extra reference requests. Each edge is visited at most twice, so building the graph is O(pairs), and the
+    search stops once every quote currency has a rate
+    """
+
+    def __init__(self, edges: List[Tuple[str, str, float, float, float]]):
+        # (base, quote, last_price, base_volume, quote_volume)
+        self.edges = edges
+        self.rates: Dict[str, float] = {}
+        self.liquidity: Dict[str, float] = {}
+        self.hops: Dict[str, int] = {}
+        self._resolve()
+
+    @classmethod
+    def from_batches(cls, exchange_data: Dict[str, TickBatch]) -> "QuoteConversionGraph":
+        """Build the graph from freshly parsed batches (quote-currency columns)"""
+        edges = []
+        for batch in exchange_data.values():
+            for base, quote, price, base_volume, quote_volume in zip(
+                batch.symbols, batch.quote_currencies, batch.last_price, batch.volume_24h_base, batch.volume_24h_quote
+            ):
+                if price and price > 0 and base != quote:
+                    edges.append((base, quote, price, base_volume or 0.0, quote_volume or 0.0))
+        return cls(edges)
+
+    def _resolve(self):
+        """Breadth-first from the anchors, keeping the widest (most liquid) edge into each currency per hop"""
+        adjacency: Dict[str, List[int]] = defaultdict(list)
+        quotes = set()
+        for i, (base, quote, _, _, _) in enumerate(self.edges):
+            adjacency[base].append(i)
+            adjacency[quote].append(i)
+            quotes.add(quote)
+
+        for anchor in USD_ANCHORS:
+            self.rates[anchor] = 1.0
+            self.liquidity[anchor] = math.inf
+            self.hops[anchor] = 0
+
+        # Only quote currencies need a rate; stop as soon as all of them have one
+        unresolved = quotes.difference(USD_ANCHORS)
+        frontier = list(USD_ANCHORS)
+        hop = 0
+        while frontier and unresolved:
+            hop += 1
+            candidates: Dict[str, Tuple[float, float]] = {}
+
+            for currency in frontier:
+                rate, width = self.rates[currency], self.liquidity[currency]
+                for i in adjacency.get(currency, ()):
+                    base, quote, price, base_volume, quote_volume = self.edges[i]
+                    if currency == quote:
+                        other, other_rate, edge_usd = base, price * rate, quote_volume * rate
+                    else:
+                        other, other_rate, edge_usd = quote, rate / price, base_volume * rate
+                    if other in self.rates:
+                        continue
+
+                    path_width = min(width, edge_usd)
+                    best = candidates.get(other)
+                    if best is None or path_width > best[0]:
+                        candidates[other] = (path_width, other_rate)
+
+            for currency, (path_width, rate) in candidates.items():
+                self.rates[currency] = rate
+                self.liquidity[currency] = path_width
+                self.hops[currency] = hop
+            unresolved.difference_update(candidates)
+            frontier = list(candidates)
+
+    def rate(self, currency: str) -> Optional[float]:
+        """USD value of one unit of currency, None if it isn't reached this tick (only quotes are guaranteed)"""
+        return self.rates.get(currency)
+
+    # ==================== BATCH CONVERSION ====================
+
+    def apply(self, batch: TickBatch) -> int:
+        """
+        Fill a batch's USD columns from its quote-currency columns (price, high/low, volume) in one vectorized pass
+        Pairs whose quote can't be resolved get None. Returns the number of priced pairs (high/low are converted
+        in place, so a batch is only converted once)
+        """
+        if batch.usd_resolved:
+            return int(np.count_nonzero(batch.priced_mask()))
+        if not len(batch):
+            return 0
+
+        quote_rates = np.fromiter(
+            (self.rates.get(quote, np.nan) for quote in batch.quote_currencies), dtype=np.float64, count=len(batch)
+        )
+
+        def converted(column: str) -> List[Optional[float]]:
+            values = batch.array(column) * quote_rates
+            return [None if math.isnan(value) else value for value in values.tolist()]
+
+        batch.set_column("price_usd", converted("last_price"))
+        batch.set_column("price_24h_high", converted("price_24h_high"))
+        batch.set_column("price_24h_low", converted("price_24h_low"))
+        batch.set_column("volume_24h_usd", converted("volume_24h_quote"))
+        batch.usd_resolved = True
+
+        return int(np.count_nonzero(~np.isnan(quote_rates)))
+
+    def apply_all(self, exchange_data: Dict[str, TickBatch]) -> int:
+        """apply() to every batch; returns the total number of priced pairs"""
+        priced = sum(self.apply(batch) for batch in exchange_data.values())
+        total = sum(len(batch) for batch in exchange_data.values())
+        logger.info(f"Resolved USD rates for {len(self.rates)} currencies, priced {priced}/{total} pairs")
+        return priced
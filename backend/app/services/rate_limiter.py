@@ -0,0 +1,29 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+
+class RateLimiter:
+    """
+    Async rate limiter for quota-bound APIs
+    Spaces request starts at least min_interval apart and caps requests in flight,
+    so callers can run concurrently without exceeding the provider's quota
+    """
+
+    def __init__(self, min_interval: float, max_concurrency: int = 1):
+        self.min_interval = min_interval
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for a free slot and the next allowed start time, then hold the slot for the request"""
+        async with self._semaphore:
+            async with self._lock:
+                now = time.monotonic()
+                wait = self._next_start - now
+                self._next_start = max(now, self._next_start) + self.min_interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield
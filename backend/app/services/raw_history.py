@@ -0,0 +1,151 @@
+import logging
+import threading
+from datetime import UTC, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import Row, and_
+from sqlalchemy.orm import Session
+
+from app.config import (
+    EXCHANGE_POLL_SECONDS,
+    RAW_HISTORY_HEARTBEAT_MINUTES,
+    RAW_HISTORY_PRICE_EPSILON,
+    RAW_HISTORY_VOLUME_EPSILON,
+)
+from app.models import PriceHistoryRaw
+
+logger = logging.getLogger(__name__)
+
+POLL_INTERVAL = timedelta(seconds=EXCHANGE_POLL_SECONDS)
+HEARTBEAT = timedelta(minutes=RAW_HISTORY_HEARTBEAT_MINUTES)
+
+# How long a stored row stands in for the polls after it. A pair that keeps trading gets a new row
+# (change or heartbeat) within this window, so a longer gap means it wasn't quoted at all
+CARRY_FORWARD_LIMIT = HEARTBEAT + POLL_INTERVAL
+
+
+class RawHistoryWriter:
+    """
+    Change-only filter in front of PriceHistoryRaw
+    Remembers the last stored price and volume of every (symbol, exchange) and drops rows that moved
+    less than the epsilons since then, except for a heartbeat row every HEARTBEAT. Readers treat a
+    missing poll as carry-forward of the previous row (see aggregation_service.carry_forward)
+    """
+
+    def __init__(
+        self,
+        price_epsilon: float = RAW_HISTORY_PRICE_EPSILON,
+        volume_epsilon: float = RAW_HISTORY_VOLUME_EPSILON,
+        heartbeat: timedelta = HEARTBEAT,
+    ):
+        self.price_epsilon = price_epsilon
+        self.volume_epsilon = volume_epsilon
+        self.heartbeat = heartbeat
+
+        self._lock = threading.Lock()
+        # (symbol, exchange) -> ([(price, volume) per pair], timestamp) of the last rows written
+        self._last: Dict[Tuple[str, str], Tuple[List[Tuple[float, float]], datetime]] = {}
+        self.written = 0
+        self.skipped = 0
+
+    # ==================== FILTERING ====================
+
+    def select(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Rows that need storing this tick (changed, heartbeat due, or never seen)
+        A symbol can have several pairs on one exchange (BTCUSDT, BTCFDUSD), so the rows of a (symbol, exchange)
+        are kept or skipped together. Doesn't update the remembered values - call remember() after the commit
+        """
+        if self.heartbeat <= timedelta(0):
+            return rows
+
+        groups: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault((row["symbol"], row["exchange"]), []).append(row)
+
+        kept = []
+        with self._lock:
+            for key, group in groups.items():
+                last = self._last.get(key)
+                if last is None or self._changed(group, last):
+                    kept.extend(group)
+            self.skipped += len(rows) - len(kept)
+        return kept
+
+    def _changed(self, group: List[Dict[str, Any]], last: Tuple[List[Tuple[float, float]], datetime]) -> bool:
+        last_values, last_timestamp = last
+        if group[0]["timestamp"] - last_timestamp >= self.heartbeat or len(group) != len(last_values):
+            return True
+        for row, (last_price, last_volume) in zip(group, last_values):
+            if abs(row["price_usd"] - last_price) > self.price_epsilon * last_price:
+                return True
+            volume = row["volume_24h_usd"] or 0.0
+            if abs(volume - last_volume) > self.volume_epsilon * last_volume:
+                return True
+        return False
+
+    def remember(self, rows: List[Dict[str, Any]]):
+        """Record rows as the last stored values (after a successful commit)"""
+        groups: Dict[Tuple[str, str], Tuple[List[Tuple[float, float]], datetime]] = {}
+        for row in rows:
+            values, _ = groups.setdefault((row["symbol"], row["exchange"]), ([], row["timestamp"]))
+            values.append((row["price_usd"], row["volume_24h_usd"] or 0.0))
+        with self._lock:
+            self._last.update(groups)
+            self.written += len(rows)
+
+    def reset(self):
+        """Forget every stored value, so the next tick writes all rows"""
+        with self._lock:
+            self._last.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Rows written vs skipped since startup (for monitoring)"""
+        with self._lock:
+            total = self.written + self.skipped
+            return {
+                "tracked_pairs": len(self._last),
+                "rows_written": self.written,
+                "rows_skipped": self.skipped,
+                "skip_ratio": round(self.skipped / total, 3) if total else 0.0,
+                "heartbeat_minutes": self.heartbeat.total_seconds() / 60,
+            }
+
+
+def price_at(db: Session, symbol: str, timestamp: datetime, exchange: str = "average") -> Optional[Row]:
+    """
+    Raw (timestamp, price_usd, volume_24h_usd) in effect at a point in time: the last row stored at or before it
+    (carried forward), otherwise the oldest one after it (history younger than the requested point).
+    Reads only columns in the chart index, so PostgreSQL answers it with an index-only scan
+    """
+    query = db.query(PriceHistoryRaw.timestamp, PriceHistoryRaw.price_usd, PriceHistoryRaw.volume_24h_usd).filter(
+        and_(PriceHistoryRaw.symbol == symbol.upper(), PriceHistoryRaw.exchange == exchange)
+    )
+
+    # One query when nothing is carried into the point (the usual case for lookbacks past raw retention)
+    first = (
+        query.filter(PriceHistoryRaw.timestamp > timestamp - CARRY_FORWARD_LIMIT)
+        .order_by(PriceHistoryRaw.timestamp.asc())
+        .first()
+    )
+    if first is None or _as_utc(first.timestamp) >= timestamp:
+        return first
+
+    return (
+        query.filter(
+            and_(
+                PriceHistoryRaw.timestamp <= timestamp,
+                PriceHistoryRaw.timestamp > timestamp - CARRY_FORWARD_LIMIT,
+            )
+        )
+        .order_by(PriceHistoryRaw.timestamp.desc())
+        .first()
+    )
+
+
+def _as_utc(timestamp: datetime) -> datetime:
+    return timestamp if timestamp.tzinfo else timestamp.replace(tzinfo=UTC)
+
+
+# Process-wide writer state shared by every PriceService instance
+raw_history_writer = RawHistoryWriter()
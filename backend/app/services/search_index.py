@@ -0,0 +1,240 @@
+import logging
+import math
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models import Coin
+
+logger = logging.getLogger(__name__)
+
+# Ranks only drift with market caps, so the index is rebuilt for popularity this often (metadata changes rebuild it
+# right away)
+POPULARITY_MAX_AGE = timedelta(minutes=10)
+
+MAX_LIMIT = 50
+# Prefixes up to this length match thousands of keys; their top MAX_LIMIT results are precomputed
+SHORT_PREFIX_LENGTH = 2
+# pg_trgm's default similarity threshold
+SIMILARITY_THRESHOLD = 0.3
+
+# Match tiers, best first
+EXACT_SYMBOL, SYMBOL_PREFIX, NAME_PREFIX, SUBSTRING, FUZZY = range(5)
+
+_WORD = re.compile(r"[0-9a-z]+")
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def trigrams(text: str) -> Set[str]:
+    """pg_trgm trigrams: each lowercase alphanumeric word padded with two leading spaces and one trailing"""
+    grams = set()
+    for word in _WORD.findall(text.lower()):
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class _TrigramIndex:
+    """Posting lists of one text field: trigram -> doc ids (ascending, i.e. by popularity)"""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.grams = [trigrams(text) for text in texts]
+        postings = defaultdict(list)
+        for doc, grams in enumerate(self.grams):
+            for gram in grams:
+                postings[gram].append(doc)
+        self.postings: Dict[str, List[int]] = dict(postings)
+
+    def containing(self, query: str, limit: Optional[int] = None) -> Set[int]:
+        """
+        Docs whose text contains query (candidates from its inner trigrams, then checked)
+        A query without a whole trigram ("bt", "a b") is matched by a scan in doc order that stops after limit docs
+        """
+        inner = {word[i : i + 3] for word in _WORD.findall(query) for i in range(len(word) - 2)}
+        if not inner:
+            found = set()
+            for doc, text in enumerate(self.texts):
+                if query in text:
+                    found.add(doc)
+                    if limit is not None and len(found) >= limit:
+                        break
+            return found
+        lists = sorted((self.postings.get(gram, []) for gram in inner), key=len)
+        candidates = set(lists[0]).intersection(*lists[1:])
+        return {doc for doc in candidates if query in self.texts[doc]}
+
+    def similar(self, query_grams: Set[str]) -> Dict[int, float]:
+        """doc -> trigram similarity (shared / union, as pg_trgm's similarity()) for docs over the threshold"""
+        if not query_grams:
+            return {}
+        # Reaching the threshold takes at least `needed` shared trigrams, and a doc that shares that many is in
+        # one of the len - needed + 1 shortest posting lists - so the long ones ("  b") are never walked
+        needed = max(1, math.ceil(SIMILARITY_THRESHOLD * len(query_grams) - 1e-9))
+        lists = sorted((self.postings.get(gram, []) for gram in query_grams), key=len)
+        scores = {}
+        for doc in set().union(*lists[: len(lists) - needed + 1]):
+            shared = len(query_grams & self.grams[doc])
+            score = shared / (len(query_grams) + len(self.grams[doc]) - shared)
+            if score >= SIMILARITY_THRESHOLD:
+                scores[doc] = score
+        return scores
+
+
+class _Snapshot(NamedTuple):
+    symbols: List[str]  # doc id -> symbol; doc ids are in market cap order (0 = largest)
+    symbol_docs: Dict[str, int]  # lowercase symbol -> doc
+    keys: List[str]  # sorted prefix keys: lowercase symbol, name, and every later word of the name
+    key_docs: List[int]
+    key_tiers: List[int]  # SYMBOL_PREFIX or NAME_PREFIX
+    short_prefixes: Dict[str, List[Tuple[int, int]]]  # prefix -> best (tier, doc) matches, at most MAX_LIMIT
+    symbol_grams: _TrigramIndex
+    name_grams: _TrigramIndex
+    built_at: float
+
+
+class CoinSearchIndex:
+    """
+    In-process typeahead index over coin symbols and names
+    Prefix matches come from a sorted key array (bisect), substring and fuzzy matches from trigram posting lists
+    (substrings shorter than a trigram from a scan of the cached texts).
+    Results are ordered by tier (exact symbol, symbol prefix, name prefix, substring, fuzzy), then by market cap.
+    Searches read an immutable snapshot; invalidate() makes the next search rebuild it from a (symbol, name,
+    market_cap) projection
+    """
+
+    def __init__(self, max_age: timedelta = POPULARITY_MAX_AGE):
+        self.max_age = max_age.total_seconds()
+
+        self._snapshot: Optional[_Snapshot] = None
+        self._stale = True
+        self._rebuild_lock = threading.Lock()
+
+    # ==================== PUBLIC API ====================
+
+    def search(self, db: Session, query: str, limit: int = 10) -> List[str]:
+        """Symbols matching query, best first"""
+        snapshot = self._current(db)
+        query = normalize(query)
+        if not query or snapshot is None:
+            return []
+        return [snapshot.symbols[doc] for _, doc in self._matches(snapshot, query, min(limit, MAX_LIMIT))]
+
+    def invalidate(self):
+        """Coins were added or renamed: rebuild before the next search"""
+        self._stale = True
+
+    def refresh(self, db: Session):
+        """Rebuild now if stale, so searches don't pay for it (called after each price tick)"""
+        self._current(db)
+
+    def rebuild(self, rows: Iterable[Tuple[str, Optional[str], Optional[float]]]) -> int:
+        """Build a snapshot from current (symbol, name, market_cap) rows and swap it in. Returns the number of coins"""
+        self._stale = False
+        return self._build(rows)
+
+    # ==================== INTERNALS ====================
+
+    def _build(self, rows: Iterable[Tuple[str, Optional[str], Optional[float]]]) -> int:
+        started = time.perf_counter()
+        ordered = sorted(rows, key=lambda row: (-(row[2] or 0), row[0]))
+        symbols = [symbol for symbol, _, _ in ordered]
+        names = [normalize(name or "") for _, name, _ in ordered]
+
+        entries = []
+        for doc, (symbol, name) in enumerate(zip(symbols, names)):
+            entries.append((symbol.lower(), doc, SYMBOL_PREFIX))
+            words = name.split()
+            for i in range(len(words)):
+                entries.append((" ".join(words[i:]), doc, NAME_PREFIX))
+        entries.sort()
+
+        short_prefixes: Dict[str, Dict[int, int]] = {}
+        for key, doc, tier in entries:
+            for length in range(1, min(SHORT_PREFIX_LENGTH, len(key)) + 1):
+                best = short_prefixes.setdefault(key[:length], {})
+                best[doc] = min(tier, best.get(doc, tier))
+
+        self._snapshot = _Snapshot(
+            symbols=symbols,
+            symbol_docs={symbol.lower(): doc for doc, symbol in enumerate(symbols)},
+            keys=[key for key, _, _ in entries],
+            key_docs=[doc for _, doc, _ in entries],
+            key_tiers=[tier for _, _, tier in entries],
+            short_prefixes={
+                prefix: sorted((tier, doc) for doc, tier in best.items())[:MAX_LIMIT]
+                for prefix, best in short_prefixes.items()
+            },
+            symbol_grams=_TrigramIndex([symbol.lower() for symbol in symbols]),
+            name_grams=_TrigramIndex(names),
+            built_at=time.monotonic(),
+        )
+        logger.info(f"Built coin search index: {len(symbols)} coins in {(time.perf_counter() - started) * 1000:.0f} ms")
+        return len(symbols)
+
+    def _current(self, db: Session) -> Optional[_Snapshot]:
+        """The snapshot to search, rebuilding it first if stale (one thread rebuilds, the others use the old one)"""
+        snapshot = self._snapshot
+        expired = snapshot is None or time.monotonic() - snapshot.built_at > self.max_age
+        if not (self._stale or expired):
+            return snapshot
+
+        if self._rebuild_lock.acquire(blocking=snapshot is None):
+            try:
+                if self._snapshot is snapshot:
+                    # Cleared before reading, so an invalidate() during the rebuild triggers another one
+                    self._stale = False
+                    self._build(db.query(Coin.symbol, Coin.name, Coin.market_cap).all())
+            finally:
+                self._rebuild_lock.release()
+        return self._snapshot
+
+    def _matches(self, snapshot: _Snapshot, query: str, limit: int) -> List[Tuple[int, int]]:
+        """(tier, doc) of the best limit matches"""
+        best: Dict[int, int] = {}
+
+        exact = snapshot.symbol_docs.get(query)
+        if exact is not None:
+            best[exact] = EXACT_SYMBOL
+
+        if len(query) <= SHORT_PREFIX_LENGTH:
+            for tier, doc in snapshot.short_prefixes.get(query, ()):
+                best.setdefault(doc, tier)
+        else:
+            start = bisect_left(snapshot.keys, query)
+            end = bisect_left(snapshot.keys, query + "\U0010ffff", start)
+            for i in range(start, end):
+                doc, tier = snapshot.key_docs[i], snapshot.key_tiers[i]
+                if tier < best.get(doc, FUZZY + 1):
+                    best[doc] = tier
+
+        if len(best) < limit:
+            # Doc order is popularity order, so each field's first limit matches include the best ones overall
+            substring = snapshot.symbol_grams.containing(query, limit) | snapshot.name_grams.containing(query, limit)
+            for doc in substring:
+                best.setdefault(doc, SUBSTRING)
+
+        ranked = sorted((tier, doc) for doc, tier in best.items())
+        if len(ranked) >= limit:
+            return ranked[:limit]
+
+        # Fuzzy fallback (typos): best similarity of symbol or name, most similar first
+        query_grams = trigrams(query)
+        scores = snapshot.symbol_grams.similar(query_grams)
+        for doc, score in snapshot.name_grams.similar(query_grams).items():
+            scores[doc] = max(score, scores.get(doc, 0.0))
+        fuzzy = sorted((-score, doc) for doc, score in scores.items() if doc not in best)
+        return ranked + [(FUZZY, doc) for _, doc in fuzzy[: limit - len(ranked)]]
+
+
+# Global instance shared by every CoinService
+coin_search_index = CoinSearchIndex()
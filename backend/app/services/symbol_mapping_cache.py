@@ -0,0 +1,161 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import UTC, datetime, timedelta
+from typing import Dict, Optional
+
+from app.config import CACHE_DIR, COINGECKO_API_URL
+from app.services.http_cache import coingecko_client
+
+logger = logging.getLogger(__name__)
+
+
+class SymbolMappingCache:
+    """
+    Process-wide CoinGecko symbol -> ID mapping
+    Persisted to a small JSON file so restarts don't re-download the multi-MB /coins/list,
+    refreshed with conditional requests (ETag / Last-Modified) once the TTL has passed
+    """
+
+    def __init__(self, cache_path: str, ttl: timedelta = timedelta(hours=24), timeout: float = 30.0):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.timeout = timeout
+
+        self._mapping: Dict[str, str] = {}
+        self._fetched_at: Optional[datetime] = None
+        self._etag: Optional[str] = None
+        self._last_modified: Optional[str] = None
+
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    # ==================== PUBLIC API ====================
+
+    async def get_mapping(self, force_refresh: bool = False) -> Dict[str, str]:
+        """
+        Get the symbol -> ID mapping
+        Stale data is returned immediately while a refresh runs in the background
+        """
+        if not self._mapping:
+            self.load()
+
+        if force_refresh or not self._mapping:
+            await self.refresh()
+        elif self.is_stale():
+            self._schedule_refresh()
+
+        return self._mapping
+
+    def is_stale(self) -> bool:
+        """True when the mapping is older than the TTL"""
+        return self._fetched_at is None or datetime.now(UTC) - self._fetched_at >= self.ttl
+
+    async def refresh(self) -> bool:
+        """Fetch /coins/list if it changed since the last download. Returns True on success"""
+        async with self._lock:
+            # Another caller may have refreshed while we were waiting for the lock
+            if self._mapping and not self.is_stale():
+                return True
+
+            headers = {}
+            if self._mapping:
+                if self._etag:
+                    headers["If-None-Match"] = self._etag
+                if self._last_modified:
+                    headers["If-Modified-Since"] = self._last_modified
+
+            logger.info("Fetching fresh symbol-to-ID mapping from CoinGecko")
+
+            async with coingecko_client(timeout=self.timeout) as client:
+                try:
+                    response = await client.get(f"{COINGECKO_API_URL}/coins/list", headers=headers)
+
+                    if response.status_code == 304:
+                        logger.info("CoinGecko symbol mapping unchanged (304)")
+                    else:
+                        response.raise_for_status()
+                        self._mapping = self._build_mapping(response.json())
+                        self._etag = response.headers.get("ETag")
+                        self._last_modified = response.headers.get("Last-Modified")
+                        logger.info(f"Cached {len(self._mapping)} symbol mappings from CoinGecko")
+
+                    self._fetched_at = datetime.now(UTC)
+                    self.save()
+                    return True
+
+                except Exception as e:
+                    logger.error(f"Error fetching CoinGecko symbol mapping: {e}")
+                    return False
+
+    # ==================== PERSISTENCE ====================
+
+    def load(self) -> int:
+        """Load the persisted mapping from disk (called at startup). Returns the number of symbols"""
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+
+            self._mapping = cached["mapping"]
+            self._fetched_at = datetime.fromisoformat(cached["fetched_at"])
+            self._etag = cached.get("etag")
+            self._last_modified = cached.get("last_modified")
+
+            logger.info(f"Loaded {len(self._mapping)} cached symbol mappings (fetched {cached['fetched_at']})")
+            return len(self._mapping)
+
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable symbol mapping cache {self.cache_path}: {e}")
+            return 0
+
+    def save(self):
+        """Persist the mapping atomically (write to a temp file, then rename)"""
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "fetched_at": self._fetched_at.isoformat() if self._fetched_at else None,
+                        "etag": self._etag,
+                        "last_modified": self._last_modified,
+                        "mapping": self._mapping,
+                    },
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp_path, self.cache_path)
+
+        except Exception as e:
+            logger.warning(f"Could not persist symbol mapping cache: {e}")
+
+    # ==================== INTERNALS ====================
+
+    def _schedule_refresh(self):
+        """Refresh in the background unless a refresh is already running"""
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self.refresh())
+
+    @staticmethod
+    def _build_mapping(coins_list) -> Dict[str, str]:
+        """Reduce /coins/list to a compact symbol -> ID dict"""
+        symbol_to_id = {}
+        for coin in coins_list:
+            symbol = coin.get("symbol", "").upper()
+            coin_id = coin.get("id", "")
+
+            if symbol and coin_id:
+                # Handle duplicate symbols by preferring more popular coins
+                if symbol not in symbol_to_id:
+                    symbol_to_id[symbol] = coin_id
+
+        return symbol_to_id
+
+
+# Shared by every CoinGeckoService / HistoricalDataService instance in the process
+symbol_mapping_cache = SymbolMappingCache(os.path.join(CACHE_DIR, "coingecko_symbol_map.json"))
@@ -0,0 +1,153 @@
+from datetime import UTC, datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+# Numeric columns, in append() order after the string columns
+NUMERIC_COLUMNS = (
+    "price_usd",
+    "price_24h_high",
+    "price_24h_low",
+    "price_change_24h",
+    "volume_24h_base",
+    "volume_24h_usd",
+    "last_price",
+    "volume_24h_quote",
+)
+
+
+class TickBatch:
+    """
+    Normalized tickers from one exchange fetch, stored column-wise
+    One exchange and one timestamp per batch instead of an 11-key dict per pair.
+    Missing numeric values are None in the list columns and NaN in the array() views.
+    Parsers fill last_price / volume_24h_quote (quote currency) and the high/low in quote currency;
+    QuoteConversionGraph.apply() then fills the USD columns
+    """
+
+    __slots__ = (
+        "exchange",
+        "timestamp",
+        "symbols",
+        "pairs",
+        "quote_currencies",
+        "price_usd",
+        "price_24h_high",
+        "price_24h_low",
+        "price_change_24h",
+        "volume_24h_base",
+        "volume_24h_usd",
+        "last_price",
+        "volume_24h_quote",
+        "usd_resolved",
+        "stale",
+        "_arrays",
+    )
+
+    def __init__(self, exchange: str, timestamp: Optional[datetime] = None):
+        self.exchange = exchange
+        self.timestamp = timestamp or datetime.now(UTC)
+
+        self.symbols: List[str] = []
+        self.pairs: List[str] = []
+        self.quote_currencies: List[str] = []
+        self.price_usd: List[Optional[float]] = []
+        self.price_24h_high: List[Optional[float]] = []
+        self.price_24h_low: List[Optional[float]] = []
+        self.price_change_24h: List[Optional[float]] = []
+        self.volume_24h_base: List[Optional[float]] = []
+        self.volume_24h_usd: List[Optional[float]] = []
+        self.last_price: List[Optional[float]] = []
+        self.volume_24h_quote: List[Optional[float]] = []
+
+        # Set once QuoteConversionGraph.apply() has converted the quote-currency columns
+        self.usd_resolved = False
+
+        # Set when an exchange's previous batch is reused for a skipped / failed tick: it still feeds the coin table,
+        # but not the price history or live candles (its prices aren't from this tick)
+        self.stale = False
+
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    def append(
+        self,
+        symbol: str,
+        pair: str,
+        quote_currency: str,
+        price_usd: Optional[float],
+        price_24h_high: Optional[float],
+        price_24h_low: Optional[float],
+        price_change_24h: Optional[float],
+        volume_24h_base: Optional[float],
+        volume_24h_usd: Optional[float],
+        last_price: Optional[float] = None,
+        volume_24h_quote: Optional[float] = None,
+    ):
+        """Add one pair (parsers call this once per ticker)"""
+        self.symbols.append(symbol)
+        self.pairs.append(pair)
+        self.quote_currencies.append(quote_currency)
+        self.price_usd.append(price_usd)
+        self.price_24h_high.append(price_24h_high)
+        self.price_24h_low.append(price_24h_low)
+        self.price_change_24h.append(price_change_24h)
+        self.volume_24h_base.append(volume_24h_base)
+        self.volume_24h_usd.append(volume_24h_usd)
+        self.last_price.append(last_price)
+        self.volume_24h_quote.append(volume_24h_quote)
+        self._arrays.clear()
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def array(self, column: str) -> np.ndarray:
+        """float64 view of a numeric column (None -> NaN), built once and cached until the next append"""
+        values = self._arrays.get(column)
+        if values is None:
+            if column not in NUMERIC_COLUMNS:
+                raise KeyError(f"Not a numeric column: {column}")
+            values = self._arrays[column] = np.array(getattr(self, column), dtype=np.float64)
+        return values
+
+    def set_column(self, column: str, values: List[Optional[float]]):
+        """Replace a whole numeric column (bulk conversion), invalidating its cached array"""
+        if column not in NUMERIC_COLUMNS:
+            raise KeyError(f"Not a numeric column: {column}")
+        if len(values) != len(self):
+            raise ValueError(f"{column}: expected {len(self)} values, got {len(values)}")
+        setattr(self, column, values)
+        self._arrays.pop(column, None)
+
+    def priced_mask(self) -> np.ndarray:
+        """True for pairs with a positive USD price"""
+        prices = self.array("price_usd")
+        return prices > 0
+
+    # ==================== CONVERSION ====================
+
+    def rows(self) -> Iterator[Dict[str, Any]]:
+        """Per-pair dicts in the legacy ticker shape (debugging / callers that still want records)"""
+        for i in range(len(self)):
+            yield {
+                "symbol": self.symbols[i],
+                "exchange": self.exchange,
+                "pair": self.pairs[i],
+                "quote_currency": self.quote_currencies[i],
+                **{column: getattr(self, column)[i] for column in NUMERIC_COLUMNS},
+                "timestamp": self.timestamp,
+            }
+
+    @classmethod
+    def from_records(
+        cls, exchange: str, records: List[Dict[str, Any]], timestamp: Optional[datetime] = None
+    ) -> "TickBatch":
+        """Build a batch from legacy ticker dicts"""
+        batch = cls(exchange, timestamp)
+        for record in records:
+            batch.append(
+                record["symbol"],
+                record["pair"],
+                record["quote_currency"],
+                *(record.get(column) for column in NUMERIC_COLUMNS),
+            )
+        return batch
@@ -3,5 +3,13 @@ Background tasks package initialization
 """
 
 from .scheduler import scheduler, start_scheduler
+from .startup import cancel_startup_backfill, get_startup_status, mark_ready, start_startup_backfill
 
-__all__ = ["scheduler", "start_scheduler"]
+__all__ = [
+    "scheduler",
+    "start_scheduler",
+    "start_startup_backfill",
+    "cancel_startup_backfill",
+    "mark_ready",
+    "get_startup_status",
+]
@@ -79,11 +79,12 @@ async def discover_new_coins_job():
             new_coin_symbols = [coin.symbol for coin in new_coins]
 
             if new_coin_symbols:
-                # Backfill 7 days of historical data for new coins
+                # Backfill 7 days of historical data for new coins (stored as 1h candles)
+                from app.services.historical_data_service import HistoricalDataService
+
                 logger.info(f"Starting historical backfill for {len(new_coin_symbols)} new coins")
-                backfilled_count = await coingecko_service.backfill_historical_data_for_new_coins(
-                    new_coin_symbols, days_back=7
-                )
+                historical_service = HistoricalDataService(db)
+                backfilled_count = await historical_service.backfill_new_coins(new_coin_symbols, days_back=7)
                 logger.info(f"Historical backfill completed: {backfilled_count} coins processed")
             else:
                 logger.info("No new coins found requiring historical backfill")
@@ -173,6 +174,35 @@ async def cleanup_old_data_job():
         db.close()
 
 
+async def refresh_symbol_mapping_job():
+    """
+    Scheduled job to keep the shared CoinGecko symbol-to-ID mapping fresh
+    No-op until the cached mapping is older than its TTL
+    """
+    try:
+        from app.services.symbol_mapping_cache import symbol_mapping_cache
+
+        if symbol_mapping_cache.is_stale():
+            await symbol_mapping_cache.refresh()
+
+    except Exception as e:
+        logger.error(f"Error refreshing symbol mapping: {e}")
+
+
+async def refresh_exchange_metadata_job():
+    """
+    Scheduled job to keep the exchange pair metadata (exchangeInfo / AssetPairs) fresh
+    Only exchanges whose table is older than its TTL are fetched
+    """
+    try:
+        from app.services.exchange_metadata import exchange_metadata
+
+        await exchange_metadata.refresh()
+
+    except Exception as e:
+        logger.error(f"Error refreshing exchange metadata: {e}")
+
+
 # ==================== SCHEDULER MANAGEMENT ====================
 
 
@@ -240,6 +270,26 @@ def start_scheduler():
             max_instances=1,
         )
 
+        # Add symbol mapping refresh job (hourly check, refreshes once the 24h TTL has passed)
+        scheduler.add_job(
+            refresh_symbol_mapping_job,
+            trigger=IntervalTrigger(hours=1),
+            id="refresh_symbol_mapping",
+            name="Refresh CoinGecko symbol mapping",
+            replace_existing=True,
+            max_instances=1,
+        )
+
+        # Add exchange metadata refresh job (hourly check, refreshes once the 24h TTL has passed)
+        scheduler.add_job(
+            refresh_exchange_metadata_job,
+            trigger=IntervalTrigger(hours=1),
+            id="refresh_exchange_metadata",
+            name="Refresh exchange pair metadata",
+            replace_existing=True,
+            max_instances=1,
+        )
+
         # Start the scheduler
         scheduler.start()
         _scheduler_running = True
@@ -251,6 +301,8 @@ def start_scheduler():
         logger.info("  - Data cleanup: Daily")
         logger.info("  - New coin discovery: Every 6 hours")
         logger.info("  - Health monitoring: Every hour")
+        logger.info("  - CoinGecko symbol mapping: Refreshed every 24 hours")
+        logger.info("  - Exchange pair metadata: Refreshed every 24 hours")
         logger.info("  - Data retention: ALL price history kept permanently")
 
     except Exception as e:
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+from datetime import UTC, datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Startup state shared with the health endpoints
+_startup_state: Dict[str, Any] = {
+    "ready": False,
+    "started_at": None,
+    "backfill": {
+        "status": "pending",  # pending -> running -> completed / failed
+        "started_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None,
+    },
+}
+
+# Keep a reference to the running task so it isn't garbage collected mid-run
+_backfill_task: Optional[asyncio.Task] = None
+_historical_service = None
+
+
+async def startup_backfill_job(max_gap_hours: int = 2):
+    """
+    Background startup job: detect data gaps and backfill them
+    Real-time fetching keeps running while this is in progress
+    """
+    global _historical_service
+
+    from app.database import SessionLocal
+    from app.services.historical_data_service import HistoricalDataService
+
+    backfill_state = _startup_state["backfill"]
+    backfill_state.update(status="running", started_at=datetime.now(UTC).isoformat())
+
+    db = SessionLocal()
+    try:
+        logger.info("🔍 Checking for historical data gaps in the background...")
+        _historical_service = HistoricalDataService(db)
+
+        result = await _historical_service.startup_gap_check_and_fill(
+            max_gap_hours=max_gap_hours, pause_real_time=False
+        )
+
+        if result["status"] == "no_action_needed":
+            logger.info("✅ All historical data is current - no backfill needed")
+        elif result["status"] == "gaps_filled":
+            logger.info(f"✅ {result['message']}")
+        else:
+            logger.warning(f"⚠️ Startup gap check: {result}")
+
+        # Keep the summary small - the full gap analysis can list thousands of coins
+        backfill_state.update(status="completed", result={"status": result["status"], "message": result["message"]})
+
+    except Exception as e:
+        logger.error(f"❌ Error in startup backfill: {e}")
+        backfill_state.update(status="failed", error=str(e))
+
+    finally:
+        backfill_state["finished_at"] = datetime.now(UTC).isoformat()
+        db.close()
+
+
+def start_startup_backfill(max_gap_hours: int = 2) -> asyncio.Task:
+    """Launch the gap check/backfill as a tracked background task"""
+    global _backfill_task
+
+    if _backfill_task and not _backfill_task.done():
+        logger.warning("Startup backfill is already running")
+        return _backfill_task
+
+    _backfill_task = asyncio.create_task(startup_backfill_job(max_gap_hours), name="startup_backfill")
+    return _backfill_task
+
+
+async def cancel_startup_backfill():
+    """Cancel the startup backfill if it is still running (on shutdown)"""
+    if _backfill_task and not _backfill_task.done():
+        _backfill_task.cancel()
+        try:
+            await _backfill_task
+        except asyncio.CancelledError:
+            logger.info("Startup backfill cancelled")
+
+
+def mark_ready():
+    """Mark the application as ready to serve traffic"""
+    _startup_state["ready"] = True
+    _startup_state["started_at"] = datetime.now(UTC).isoformat()
+
+
+def get_startup_status() -> Dict[str, Any]:
+    """Readiness flag plus startup backfill status and progress"""
+    backfill = dict(_startup_state["backfill"])
+    if _historical_service is not None:
+        backfill["progress"] = dict(_historical_service.progress)
+
+    return {"ready": _startup_state["ready"], "started_at": _startup_state["started_at"], "backfill": backfill}
@@ -0,0 +1,21 @@
+"""
+Offline benchmarks for the ingest pipeline
+
+    python -m bench.record --out bench/fixtures/live         # capture real exchange payloads once
+    python -m bench.fake_exchange --symbols 2000              # serve a synthetic market locally
+    python -m bench.ingest --fixtures bench/fixtures/live     # time full ticks against recorded payloads
+    python -m bench.ingest --symbols 5000 --latency-ms 80     # ... or against a synthetic market
+    python -m bench.suite --check                             # component benchmarks, fail if over bench/budgets.json
+
+Run from the backend/ directory
+"""
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# app.database builds its engine at import time - give it a parseable URL when no database is configured
+os.environ.setdefault("DB_HOST", "localhost")
+os.environ.setdefault("DB_PORT", "5432")
@@ -0,0 +1,64 @@
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import BigInteger, SmallInteger, create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+
+@compiles(BigInteger, "sqlite")
+@compiles(SmallInteger, "sqlite")
+def _sqlite_integer(type_, compiler, **kw):
+    """SQLite only auto-increments INTEGER PRIMARY KEY columns"""
+    return "INTEGER"
+
+
+def create_bench_database(database_url: Optional[str] = None) -> Tuple[Engine, sessionmaker]:
+    """
+    Engine + session factory with the app schema created
+    Defaults to a throwaway SQLite file; pass a postgresql:// URL to benchmark a local Postgres
+    """
+    import app.models  # noqa: F401 - registers the tables on Base.metadata
+    from app.database import Base
+    from app.models.key_dictionary import load_history_keys
+
+    if database_url is None:
+        fd, path = tempfile.mkstemp(prefix="hypercap-bench-", suffix=".db")
+        os.close(fd)
+        database_url = f"sqlite:///{path}"
+
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    # The key dictionaries are process-wide: drop ids left over from a previous bench database
+    load_history_keys(engine)
+    return engine, sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+
+def drop_bench_database(engine: Engine):
+    """Dispose the engine and delete the SQLite file if it was a temporary one"""
+    database = engine.url.database if engine.url.get_backend_name() == "sqlite" else None
+    engine.dispose()
+    if database and os.path.basename(database).startswith("hypercap-bench-"):
+        os.remove(database)
+
+
+def table_sizes(engine: Engine, table: str) -> Dict[str, int]:
+    """On-disk bytes of a table's heap and of its indexes (SQLite via dbstat, PostgreSQL via pg_*_size)"""
+    with engine.connect() as connection:
+        if engine.url.get_backend_name() == "postgresql":
+            connection.execute(text(f"ANALYZE {table}"))
+            table_bytes, index_bytes = connection.execute(
+                text("SELECT pg_relation_size(:table), pg_indexes_size(:table)"), {"table": table}
+            ).one()
+            return {"table_bytes": table_bytes, "index_bytes": index_bytes}
+
+        sizes = dict(connection.execute(text("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name")).all())
+        indexes = [
+            name
+            for (name,) in connection.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"), {"table": table}
+            )
+        ]
+        return {"table_bytes": sizes.get(table, 0), "index_bytes": sum(sizes.get(name, 0) for name in indexes)}
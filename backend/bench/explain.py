@@ -0,0 +1,251 @@
+"""
+History query plans and timings under the pre-plan indexes ("legacy") and app.models.indexes ("planned")
+
+    python -m bench.explain
+    python -m bench.explain --symbols 500 --raw-hours 12 --repeat 20
+    python -m bench.explain --database-url postgresql://localhost/hypercap_bench   # BRIN / INCLUDE only exist here
+
+One database is seeded, every query shape is timed and EXPLAINed with the legacy indexes, then the indexes are
+swapped for the planned ones and the same queries run again. SQLite builds plain B-trees for both BRIN and
+covering indexes, so the numbers that matter for production come from a PostgreSQL run
+"""
+
+import argparse
+import logging
+import time
+from contextlib import contextmanager
+from datetime import UTC, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.config import COMPACT_HISTORY_SCHEMA
+from app.models import PriceHistory1h, PriceHistoryRaw
+from app.models.indexes import INDEX_PLANS, LEGACY_SUFFIXES, PLAN_SUFFIXES, has_chart_index
+from app.services.raw_history import CARRY_FORWARD_LIMIT
+from bench.db import create_bench_database, drop_bench_database, table_sizes
+from bench.results import summarize, write_results
+from bench.seed import seed_candles, seed_raw_history
+
+HISTORY_TABLES = {"price_history_raw": PriceHistoryRaw, "price_history_1h": PriceHistory1h}
+
+
+# ==================== QUERY SHAPES ====================
+
+
+def query_shapes(symbol: str, now: datetime) -> Dict[str, Any]:
+    """The history reads the app issues, as Core statements (mirrors routes / services)"""
+    raw, hourly = PriceHistoryRaw, PriceHistory1h
+    return {
+        # /coins/{symbol}/chart?timeframe=1h (raw, carried forward)
+        "chart_raw": select(raw.timestamp, raw.price_usd, raw.volume_24h_usd)
+        .where(raw.symbol == symbol, raw.exchange == "average", raw.timestamp >= now - timedelta(hours=1))
+        .order_by(raw.timestamp.asc()),
+        # /coins/{symbol}/chart?timeframe=7d
+        "chart_1h": select(hourly.timestamp, hourly.price_close, hourly.volume_sum)
+        .where(hourly.symbol == symbol, hourly.exchange == "average", hourly.timestamp >= now - timedelta(days=7))
+        .order_by(hourly.timestamp.asc()),
+        # raw_history.price_at for a 1h price change
+        "price_at": select(raw.timestamp, raw.price_usd, raw.volume_24h_usd)
+        .where(
+            raw.symbol == symbol,
+            raw.exchange == "average",
+            raw.timestamp > now - timedelta(hours=1) - CARRY_FORWARD_LIMIT,
+        )
+        .order_by(raw.timestamp.asc())
+        .limit(1),
+        # cleanup_old_raw_data (counted instead of deleted so every run sees the same rows)
+        "cleanup_raw": select(func.count()).select_from(raw).where(raw.timestamp < now - timedelta(hours=1)),
+        # reaggregate_range symbol discovery
+        "symbols_in_range": select(raw.symbol)
+        .where(raw.timestamp >= now - timedelta(minutes=10), raw.timestamp < now)
+        .distinct(),
+        # historical gap check: last "average" candle per symbol
+        "latest_per_symbol": select(hourly.symbol, func.max(hourly.timestamp))
+        .where(hourly.exchange == "average")
+        .group_by(hourly.symbol),
+    }
+
+
+# ==================== INDEX SETS ====================
+
+
+def legacy_index_statements(table_name: str, compact: bool) -> List[str]:
+    """DDL that recreates the pre-plan (symbol, timestamp) / (symbol, exchange, timestamp) B-trees"""
+    prefix = INDEX_PLANS[table_name].prefix
+    symbol, exchange = ("symbol_id", "exchange_id") if compact else ("symbol", "exchange")
+    statements = [f"CREATE INDEX IF NOT EXISTS {prefix}_symbol_time ON {table_name} ({symbol}, timestamp)"]
+    # The compact OHLC primary key already is (symbol_id, exchange_id, timestamp)
+    if has_chart_index(table_name, compact):
+        statements.append(
+            f"CREATE INDEX IF NOT EXISTS {prefix}_exchange_time ON {table_name} ({symbol}, {exchange}, timestamp)"
+        )
+    return statements
+
+
+def drop_statements(table_name: str, suffixes: Tuple[str, ...]) -> List[str]:
+    prefix = INDEX_PLANS[table_name].prefix
+    return [f"DROP INDEX IF EXISTS {prefix}_{suffix}" for suffix in suffixes]
+
+
+def use_legacy_indexes(engine: Engine):
+    """Replace the planned indexes with the (symbol, timestamp) / (symbol, exchange, timestamp) B-trees"""
+    with engine.begin() as connection:
+        for table in HISTORY_TABLES:
+            for statement in drop_statements(table, PLAN_SUFFIXES):
+                connection.execute(text(statement))
+            for statement in legacy_index_statements(table, COMPACT_HISTORY_SCHEMA):
+                connection.execute(text(statement))
+    _analyze(engine)
+
+
+def use_planned_indexes(engine: Engine):
+    """Drop the legacy B-trees and build the model's indexes (dialect-aware DDL)"""
+    with engine.begin() as connection:
+        for table, model in HISTORY_TABLES.items():
+            for statement in drop_statements(table, LEGACY_SUFFIXES):
+                connection.execute(text(statement))
+            for index in model.__table__.indexes:
+                index.create(connection, checkfirst=True)
+    _analyze(engine)
+
+
+def _analyze(engine: Engine):
+    with engine.begin() as connection:
+        if engine.url.get_backend_name() == "postgresql":
+            for table in HISTORY_TABLES:
+                connection.execute(text(f"ANALYZE {table}"))
+        else:
+            connection.execute(text("ANALYZE"))
+
+
+# ==================== EXPLAIN ====================
+
+
+@contextmanager
+def captured_statements(connection: Connection):
+    """Collect (sql, parameters) as sent to the driver, i.e. after bind processing"""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(connection, "before_cursor_execute", capture)
+    try:
+        yield captured
+    finally:
+        event.remove(connection, "before_cursor_execute", capture)
+
+
+def explain(connection: Connection, statement) -> List[str]:
+    """Plan lines of a statement (EXPLAIN QUERY PLAN on SQLite, EXPLAIN (ANALYZE, BUFFERS) on PostgreSQL)"""
+    with captured_statements(connection) as captured:
+        connection.execute(statement).all()
+    sql, parameters = captured[-1]
+
+    if connection.engine.url.get_backend_name() == "postgresql":
+        rows = connection.exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS) {sql}", parameters).all()
+        return [row[0] for row in rows]
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parameters).all()
+    return [row[-1] for row in rows]
+
+
+def time_query(connection: Connection, statement, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        connection.execute(statement).all()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def measure(engine: Engine, shapes: Dict[str, Any], repeat: int) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    with engine.connect() as connection:
+        for name, statement in shapes.items():
+            plan = explain(connection, statement)
+            results[name] = {**summarize(time_query(connection, statement, repeat)), "plan": plan}
+    for table in HISTORY_TABLES:
+        results[f"{table}_index_bytes"] = table_sizes(engine, table)["index_bytes"]
+    return results
+
+
+# ==================== RUN ====================
+
+
+def run_explain_benchmark(
+    symbols: int,
+    raw_hours: int,
+    hourly_days: int,
+    repeat: int,
+    database_url: Optional[str] = None,
+    variants: Optional[Dict[str, Callable[[Engine], None]]] = None,
+) -> Dict[str, Any]:
+    """Seed once, then measure every query shape under each index set (legacy first, then planned)"""
+    variants = variants or {"legacy": use_legacy_indexes, "planned": use_planned_indexes}
+    names = [f"SYM{i:05d}" for i in range(symbols)] + ["BTC"]
+    now = datetime.now(UTC).replace(second=0, microsecond=0)
+
+    engine, session_factory = create_bench_database(database_url)
+    try:
+        db = session_factory()
+        try:
+            raw_rows = seed_raw_history(db, names, now - timedelta(hours=raw_hours), now, timedelta(seconds=30))
+            hourly_rows = seed_candles(
+                db, PriceHistory1h, names, now - timedelta(days=hourly_days), now, timedelta(hours=1)
+            )
+        finally:
+            db.close()
+
+        shapes = query_shapes("BTC", now)
+        results = {"raw_rows": raw_rows, "1h_rows": hourly_rows}
+        for variant, apply in variants.items():
+            apply(engine)
+            results[variant] = measure(engine, shapes, repeat)
+        return results
+    finally:
+        drop_bench_database(engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--raw-hours", type=int, default=6)
+    parser.add_argument("--hourly-days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--output", help="results file (default bench/results/explain-<timestamp>.json)")
+    parser.add_argument("--plans", action="store_true", help="print the plan of every query")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    config = {
+        "symbols": args.symbols,
+        "raw_hours": args.raw_hours,
+        "hourly_days": args.hourly_days,
+        "repeat": args.repeat,
+        "history_layout": "compact" if COMPACT_HISTORY_SCHEMA else "decimal",
+        "database": "sqlite" if not args.database_url else args.database_url.split(":", 1)[0],
+    }
+    results = run_explain_benchmark(args.symbols, args.raw_hours, args.hourly_days, args.repeat, args.database_url)
+
+    legacy, planned = results["legacy"], results["planned"]
+    print(f"{results['raw_rows']} raw rows, {results['1h_rows']} 1h rows")
+    for name, before in legacy.items():
+        if not isinstance(before, dict):
+            print(f"  {name:<26} {before:>10} -> {planned[name]:>10} bytes")
+            continue
+        after = planned[name]
+        change = (after["median_ms"] - before["median_ms"]) / before["median_ms"] * 100
+        print(f"  {name:<20} median {before['median_ms']:>9.2f} -> {after['median_ms']:>9.2f} ms  ({change:+.1f}%)")
+        if args.plans:
+            for variant, stats in (("legacy", before), ("planned", after)):
+                for line in stats["plan"]:
+                    print(f"      {variant:<8} {line}")
+    print(f"Results written to {write_results('explain', config, results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
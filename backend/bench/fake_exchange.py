@@ -0,0 +1,232 @@
+"""
+Local stand-in for Binance, Kraken, MEXC and CoinGecko
+
+    python -m bench.fake_exchange --symbols 2000 --latency-ms 80 --port 8900
+    python -m bench.fake_exchange --fixtures bench/fixtures/live
+
+Point the app at it with the printed environment variables
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Query, Response
+
+from bench.fixtures import FIXTURE_FILES, load_fixture
+from bench.server import ThreadedServer
+from bench.synthetic import SyntheticMarket
+
+
+class FixtureSource:
+    """Replays recorded payloads byte-for-byte"""
+
+    def __init__(self, fixture_dir: str):
+        self.fixture_dir = fixture_dir
+        self.payloads: Dict[str, bytes] = {}
+        for name in FIXTURE_FILES:
+            body = load_fixture(fixture_dir, name)
+            if body is not None:
+                self.payloads[name] = body
+
+        if not self.payloads:
+            raise FileNotFoundError(f"No fixtures found in {fixture_dir}")
+
+    def payload(self, name: str) -> Optional[bytes]:
+        return self.payloads.get(name)
+
+    def markets(self, ids: str) -> Optional[bytes]:
+        return self.payloads.get("coingecko_markets")
+
+    def advance(self):
+        """Recorded data is static"""
+
+
+class SyntheticSource:
+    """
+    Serves a SyntheticMarket; payloads are encoded once per tick, not per request
+    With auto_advance_seconds set the market moves on its own, otherwise call advance() between ticks
+    """
+
+    def __init__(self, market: SyntheticMarket, auto_advance_seconds: Optional[float] = None):
+        self.market = market
+        self.auto_advance_seconds = auto_advance_seconds
+        self._lock = threading.Lock()
+        self._advanced_at = time.monotonic()
+        self._payloads = self._encode()
+
+    def _encode(self) -> Dict[str, bytes]:
+        market = self.market
+        return {
+            "binance_ticker_24hr": json.dumps(market.binance_ticker_24hr()).encode(),
+            "binance_exchange_info": json.dumps(market.binance_exchange_info()).encode(),
+            "kraken_asset_pairs": json.dumps(market.kraken_asset_pairs()).encode(),
+            "kraken_ticker": json.dumps(market.kraken_ticker()).encode(),
+            "mexc_ticker_24hr": json.dumps(market.mexc_ticker_24hr()).encode(),
+            "mexc_exchange_info": json.dumps(market.mexc_exchange_info()).encode(),
+            "coingecko_coins_list": json.dumps(market.coingecko_coins_list()).encode(),
+        }
+
+    def advance(self):
+        with self._lock:
+            self.market.advance()
+            self._payloads = self._encode()
+            self._advanced_at = time.monotonic()
+
+    def payload(self, name: str) -> Optional[bytes]:
+        if self.auto_advance_seconds and time.monotonic() - self._advanced_at >= self.auto_advance_seconds:
+            self.advance()
+        return self._payloads.get(name)
+
+    def markets(self, ids: str) -> Optional[bytes]:
+        with self._lock:
+            return json.dumps(self.market.coingecko_markets([i for i in ids.split(",") if i])).encode()
+
+
+def create_app(
+    source, latency_ms: float = 0.0, jitter_ms: float = 0.0, faults: Optional[Dict[str, Dict[str, float]]] = None
+) -> FastAPI:
+    """
+    FastAPI app exposing each upstream under its own path prefix
+    faults injects per-upstream trouble, e.g. {"binance": {"latency_ms": 15000}, "mexc": {"error_rate": 1.0}}
+    """
+    app = FastAPI(title="Fake exchange")
+    app.state.requests = 0
+    faults = faults or {}
+
+    async def respond(upstream: str, body: Optional[bytes]) -> Response:
+        app.state.requests += 1
+        fault = faults.get(upstream, {})
+        delay = (
+            latency_ms + fault.get("latency_ms", 0.0) + (random.uniform(-jitter_ms, jitter_ms) if jitter_ms else 0.0)
+        )
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if random.random() < fault.get("error_rate", 0.0):
+            return Response(status_code=503)
+        if body is None:
+            return Response(status_code=404)
+        return Response(content=body, media_type="application/json")
+
+    @app.get("/binance/api/v3/ticker/24hr")
+    async def binance_ticker_24hr():
+        return await respond("binance", source.payload("binance_ticker_24hr"))
+
+    @app.get("/binance/api/v3/exchangeInfo")
+    async def binance_exchange_info():
+        return await respond("binance", source.payload("binance_exchange_info"))
+
+    @app.get("/kraken/0/public/AssetPairs")
+    async def kraken_asset_pairs():
+        return await respond("kraken", source.payload("kraken_asset_pairs"))
+
+    @app.get("/kraken/0/public/Ticker")
+    async def kraken_ticker():
+        return await respond("kraken", source.payload("kraken_ticker"))
+
+    @app.get("/mexc/api/v3/ticker/24hr")
+    async def mexc_ticker_24hr():
+        return await respond("mexc", source.payload("mexc_ticker_24hr"))
+
+    @app.get("/mexc/api/v3/exchangeInfo")
+    async def mexc_exchange_info():
+        return await respond("mexc", source.payload("mexc_exchange_info"))
+
+    @app.get("/coingecko/api/v3/coins/list")
+    async def coingecko_coins_list():
+        return await respond("coingecko", source.payload("coingecko_coins_list"))
+
+    @app.get("/coingecko/api/v3/coins/markets")
+    async def coingecko_markets(ids: str = Query("")):
+        return await respond("coingecko", source.markets(ids))
+
+    @app.post("/_bench/advance")
+    async def advance():
+        source.advance()
+        return {"requests": app.state.requests}
+
+    return app
+
+
+def exchange_env(base_url: str) -> Dict[str, str]:
+    """Environment variables that point ExchangeService / CoinGecko clients at a fake server"""
+    return {
+        "BINANCE_API_URL": f"{base_url}/binance/api/v3",
+        "BINANCE_24HR_URL": f"{base_url}/binance/api/v3/ticker/24hr",
+        "BINANCE_INFO_URL": f"{base_url}/binance/api/v3/exchangeInfo",
+        "KRAKEN_API_URL": f"{base_url}/kraken",
+        "MEXC_API_URL": f"{base_url}/mexc/api/v3",
+        "COINGECKO_API_URL": f"{base_url}/coingecko/api/v3",
+    }
+
+
+class FakeExchangeServer(ThreadedServer):
+    """Runs the fake exchange in a background thread: `with FakeExchangeServer(source) as server: ...`"""
+
+    def __init__(
+        self,
+        source,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        port: Optional[int] = None,
+        faults: Optional[Dict[str, Dict[str, float]]] = None,
+    ):
+        self.source = source
+        super().__init__(create_app(source, latency_ms, jitter_ms, faults), port)
+
+    @property
+    def env(self) -> Dict[str, str]:
+        return exchange_env(self.base_url)
+
+
+def build_source(
+    fixtures: Optional[str],
+    symbols: int,
+    seed: int,
+    auto_advance_seconds: Optional[float] = None,
+    idle_share: float = 0.0,
+):
+    """Replay fixtures if a directory is given, otherwise synthesize a market"""
+    if fixtures:
+        return FixtureSource(fixtures)
+    return SyntheticSource(SyntheticMarket(symbols, seed=seed, idle_share=idle_share), auto_advance_seconds)
+
+
+def parse_faults(specs: Optional[List[str]]) -> Dict[str, Dict[str, float]]:
+    """["binance:latency_ms=15000", "mexc:error_rate=1"] -> {"binance": {"latency_ms": 15000.0}, ...}"""
+    faults: Dict[str, Dict[str, float]] = {}
+    for spec in specs or []:
+        upstream, _, setting = spec.partition(":")
+        key, _, value = setting.partition("=")
+        faults.setdefault(upstream, {})[key] = float(value)
+    return faults
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="replay recorded payloads from this directory")
+    parser.add_argument("--symbols", type=int, default=2000, help="synthetic market size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tick-seconds", type=float, default=30.0, help="synthetic prices move this often")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--fault", action="append", help="per-upstream fault, e.g. binance:latency_ms=15000")
+    args = parser.parse_args()
+
+    source = build_source(args.fixtures, args.symbols, args.seed, args.tick_seconds)
+    app = create_app(source, args.latency_ms, args.jitter_ms, parse_faults(args.fault))
+
+    for key, value in exchange_env(f"http://127.0.0.1:{args.port}").items():
+        print(f"{key}={value}")
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import gzip
+import json
+import os
+from datetime import UTC, datetime
+from typing import Any, Dict, Optional
+
+# Recorded payloads, one gzip-compressed JSON file per upstream endpoint
+FIXTURE_FILES = {
+    "binance_ticker_24hr": "binance_ticker_24hr.json.gz",
+    "binance_exchange_info": "binance_exchange_info.json.gz",
+    "kraken_asset_pairs": "kraken_asset_pairs.json.gz",
+    "kraken_ticker": "kraken_ticker.json.gz",
+    "mexc_ticker_24hr": "mexc_ticker_24hr.json.gz",
+    "mexc_exchange_info": "mexc_exchange_info.json.gz",
+    "coingecko_coins_list": "coingecko_coins_list.json.gz",
+    "coingecko_markets": "coingecko_markets.json.gz",
+}
+
+MANIFEST_FILE = "manifest.json"
+
+
+def save_fixture(fixture_dir: str, name: str, body: bytes):
+    """Write a raw response body for one endpoint"""
+    os.makedirs(fixture_dir, exist_ok=True)
+    with gzip.open(os.path.join(fixture_dir, FIXTURE_FILES[name]), "wb") as f:
+        f.write(body)
+
+
+def load_fixture(fixture_dir: str, name: str) -> Optional[bytes]:
+    """Raw response body for one endpoint, or None if it wasn't recorded"""
+    try:
+        with gzip.open(os.path.join(fixture_dir, FIXTURE_FILES[name]), "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def save_manifest(fixture_dir: str, sources: Dict[str, Any]):
+    """Record when and from where the fixtures were captured"""
+    with open(os.path.join(fixture_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump({"recorded_at": datetime.now(UTC).isoformat(), "sources": sources}, f, indent=2)
+
+
+def load_manifest(fixture_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(fixture_dir, MANIFEST_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
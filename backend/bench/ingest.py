@@ -0,0 +1,170 @@
+"""
+End-to-end tick benchmark: fetch -> parse -> aggregate -> persist, with no network
+
+    python -m bench.ingest --symbols 5000 --ticks 10 --latency-ms 80
+    python -m bench.ingest --fixtures bench/fixtures/live --database-url postgresql://localhost/hypercap_bench
+    python -m bench.ingest --fault binance:latency_ms=15000 --fault mexc:error_rate=1 --deadline 5
+    python -m bench.ingest --idle-share 0.5 --ticks 20
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from bench.db import create_bench_database, drop_bench_database
+from bench.fake_exchange import FakeExchangeServer, build_source, parse_faults
+from bench.results import summarize, write_results
+
+
+@contextmanager
+def patched_env(values: Dict[str, str]):
+    """Temporarily set environment variables"""
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+async def run_ticks(
+    server: FakeExchangeServer, session_factory, ticks: int, deadline: Optional[float] = None
+) -> Dict[str, Any]:
+    """
+    Run full ticks against the fake server and time each phase
+    Exchange metadata lives in a throwaway cache, so the first tick includes fetching it. Circuit breakers are
+    fresh and poll on every tick (ticks run back to back, not 30s apart)
+    """
+    from app.services import ExchangeService, PriceService
+    from app.services.exchange_health import ExchangeHealthRegistry
+    from app.services.exchange_metadata import ExchangeMetadataCache
+
+    timings: Dict[str, List[float]] = {"fetch": [], "aggregate": [], "persist": [], "tick": []}
+    pair_counts = []
+    raw_rows = []
+
+    with patched_env(server.env), tempfile.TemporaryDirectory() as cache_dir:
+        metadata = ExchangeMetadataCache(os.path.join(cache_dir, "exchange_metadata.json"))
+        health = ExchangeHealthRegistry(base_interval=0.0, max_interval=0.0)
+        for _ in range(ticks):
+            server.source.advance()
+            db = session_factory()
+            try:
+                exchange_service = ExchangeService(db)
+                exchange_service.metadata = metadata
+                exchange_service.health = health
+                if deadline:
+                    exchange_service.deadline = exchange_service.timeout = deadline
+                price_service = PriceService(db)
+
+                started = time.perf_counter()
+                exchange_data = await exchange_service.fetch_all_exchange_data()
+                fetched = time.perf_counter()
+                price_service.aggregate_exchange_data(exchange_data)
+                aggregated = time.perf_counter()
+                results = await price_service.update_prices_and_rankings(exchange_data)
+                persisted = time.perf_counter()
+
+                timings["fetch"].append((fetched - started) * 1000)
+                timings["aggregate"].append((aggregated - fetched) * 1000)
+                timings["persist"].append((persisted - aggregated) * 1000)
+                timings["tick"].append((persisted - started) * 1000)
+                pair_counts.append(sum(len(pairs) for pairs in exchange_data.values()))
+                raw_rows.append(results["price_history"])
+            finally:
+                db.close()
+
+    return {
+        "pairs_per_tick": max(pair_counts) if pair_counts else 0,
+        "raw_rows_per_tick": raw_rows,
+        "server_requests": server.app.state.requests,
+        "exchanges": health.snapshot(),
+        "phases": {phase: summarize(samples) for phase, samples in timings.items() if samples},
+    }
+
+
+def run_ingest_benchmark(
+    fixtures: Optional[str] = None,
+    symbols: int = 2000,
+    seed: int = 42,
+    ticks: int = 5,
+    latency_ms: float = 0.0,
+    jitter_ms: float = 0.0,
+    database_url: Optional[str] = None,
+    faults: Optional[Dict[str, Dict[str, float]]] = None,
+    deadline: Optional[float] = None,
+    idle_share: float = 0.0,
+) -> Dict[str, Any]:
+    """Start a fake exchange and a fresh database, run the ticks, tear both down"""
+    source = build_source(fixtures, symbols, seed, idle_share=idle_share)
+    engine, session_factory = create_bench_database(database_url)
+    try:
+        with FakeExchangeServer(source, latency_ms, jitter_ms, faults=faults) as server:
+            return asyncio.run(run_ticks(server, session_factory, ticks, deadline))
+    finally:
+        drop_bench_database(engine)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", help="replay recorded payloads instead of a synthetic market")
+    parser.add_argument("--symbols", type=int, default=2000, help="synthetic market size")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--ticks", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="simulated exchange response latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--idle-share", type=float, default=0.0, help="share of long-tail symbols idle per tick")
+    parser.add_argument("--fault", action="append", help="per-exchange fault, e.g. binance:latency_ms=15000")
+    parser.add_argument("--deadline", type=float, help="per-exchange fetch deadline in seconds (default from config)")
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file")
+    parser.add_argument("--output", help="results file (default bench/results/ingest-<timestamp>.json)")
+    parser.add_argument("--verbose", action="store_true", help="show app logging")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+
+    config = {
+        "source": args.fixtures or "synthetic",
+        "symbols": None if args.fixtures else args.symbols,
+        "seed": args.seed,
+        "ticks": args.ticks,
+        "latency_ms": args.latency_ms,
+        "jitter_ms": args.jitter_ms,
+        "idle_share": args.idle_share,
+        "faults": args.fault or [],
+        "deadline": args.deadline,
+        "database": "sqlite" if not args.database_url else args.database_url.split(":", 1)[0],
+    }
+    results = run_ingest_benchmark(
+        args.fixtures,
+        args.symbols,
+        args.seed,
+        args.ticks,
+        args.latency_ms,
+        args.jitter_ms,
+        args.database_url,
+        parse_faults(args.fault),
+        args.deadline,
+        args.idle_share,
+    )
+
+    raw_rows = results["raw_rows_per_tick"]
+    print(f"{results['pairs_per_tick']} pairs per tick, {sum(raw_rows)} raw rows written over {len(raw_rows)} ticks")
+    for phase, stats in results["phases"].items():
+        print(f"  {phase:<10} median {stats['median_ms']:>9.1f} ms   p95 {stats['p95_ms']:>9.1f} ms")
+    for exchange, circuit in results["exchanges"].items():
+        print(f"  {exchange:<10} circuit {circuit['state']:<9} failures {circuit['failures']}/{circuit['calls']}")
+    print(f"Results written to {write_results('ingest', config, results, args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Capture live exchange and CoinGecko payloads as replayable fixtures
+
+    python -m bench.record --out bench/fixtures/live
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.fixtures import FIXTURE_FILES, save_fixture, save_manifest
+
+
+async def record(out_dir: str, markets_per_page: int = 250) -> Dict[str, Any]:
+    """Fetch every endpoint the ingest pipeline reads and save the raw bodies. Returns the manifest sources"""
+    from app.config import COINGECKO_API_URL
+    from app.services.exchange_metadata import ExchangeMetadataCache
+    from app.services.exchange_service import ExchangeService
+
+    # URLs come from the service itself so recordings track what the pipeline actually calls
+    exchange_service = ExchangeService(db=None)
+    endpoints: List[Tuple[str, str, Optional[Dict[str, Any]]]] = [
+        ("binance_ticker_24hr", exchange_service.binance_24hr_url, None),
+        ("binance_exchange_info", ExchangeMetadataCache.metadata_url("binance"), None),
+        ("kraken_asset_pairs", f"{exchange_service.kraken_api_url}/0/public/AssetPairs", None),
+        ("kraken_ticker", f"{exchange_service.kraken_api_url}/0/public/Ticker", None),
+        ("mexc_ticker_24hr", f"{exchange_service.mexc_api_url}/ticker/24hr", None),
+        ("mexc_exchange_info", ExchangeMetadataCache.metadata_url("mexc"), None),
+        ("coingecko_coins_list", f"{COINGECKO_API_URL}/coins/list", None),
+        (
+            "coingecko_markets",
+            f"{COINGECKO_API_URL}/coins/markets",
+            {"vs_currency": "usd", "order": "market_cap_desc", "per_page": markets_per_page, "page": 1},
+        ),
+    ]
+
+    sources = {}
+    async with httpx.AsyncClient(timeout=60.0) as client:
+        for name, url, params in endpoints:
+            try:
+                response = await client.get(url, params=params)
+                response.raise_for_status()
+                save_fixture(out_dir, name, response.content)
+                sources[name] = {"url": str(response.url), "bytes": len(response.content)}
+                print(f"  {name}: {len(response.content) / 1024:.0f} KB")
+
+            except httpx.HTTPError as e:
+                sources[name] = {"url": url, "error": str(e)}
+                print(f"  {name}: FAILED ({e})", file=sys.stderr)
+
+    save_manifest(out_dir, sources)
+    return sources
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default=os.path.join("bench", "fixtures", "live"), help="fixture directory")
+    args = parser.parse_args()
+
+    print(f"Recording {len(FIXTURE_FILES)} endpoints to {args.out}")
+    sources = asyncio.run(record(args.out))
+    failed = [name for name, source in sources.items() if "error" in source]
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
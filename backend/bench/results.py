@@ -0,0 +1,56 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+from datetime import UTC, datetime
+from typing import Any, Dict, List, Optional
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, float]:
+    """min / median / p95 / max / mean of a list of timings in milliseconds"""
+    ordered = sorted(samples_ms)
+    p95_index = min(len(ordered) - 1, max(0, round(0.95 * len(ordered)) - 1))
+    return {
+        "runs": len(ordered),
+        "min_ms": round(ordered[0], 3),
+        "median_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[p95_index], 3),
+        "max_ms": round(ordered[-1], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def write_results(name: str, config: Dict[str, Any], results: Dict[str, Any], output: Optional[str] = None) -> str:
+    """Save a benchmark run as JSON (default bench/results/<name>-<timestamp>.json). Returns the path"""
+    now = datetime.now(UTC)
+    if output is None:
+        output = os.path.join(RESULTS_DIR, f"{name}-{now.strftime('%Y%m%dT%H%M%SZ')}.json")
+
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "benchmark": name,
+                "recorded_at": now.isoformat(),
+                "git_commit": _git_commit(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "config": config,
+                "results": results,
+            },
+            f,
+            indent=2,
+        )
+    return output
@@ -0,0 +1,123 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models import Coin, ExchangePair, PriceHistoryRaw
+from app.models.key_dictionary import intern_history_keys
+from app.services.tick_batch import TickBatch
+
+SEED_EXCHANGES = ["binance", "kraken", "mexc", "average"]
+
+
+def seed_coins(db: Session, exchange_data: Dict[str, TickBatch], seed: int = 42) -> List[str]:
+    """Insert a coin row (with market cap and rank) per symbol plus its exchange pairs. Returns symbols by rank"""
+    rng = random.Random(seed)
+    coins: Dict[str, Dict[str, Any]] = {}
+    pairs = []
+
+    for exchange, batch in exchange_data.items():
+        for pair_data in batch.rows():
+            symbol = pair_data["symbol"]
+            coin = coins.setdefault(
+                symbol,
+                {
+                    "symbol": symbol,
+                    "name": symbol.title(),
+                    "price_usd": pair_data["price_usd"],
+                    "price_24h_high": pair_data["price_24h_high"],
+                    "price_24h_low": pair_data["price_24h_low"],
+                    "price_change_24h": pair_data["price_change_24h"],
+                    "volume_24h_usd": 0.0,
+                    "circulating_supply": rng.uniform(1e6, 1e10),
+                    "categories": ["layer-1"] if rng.random() < 0.2 else ["defi", "smart-contracts"],
+                    "exchange_count": 0,
+                    "last_updated": pair_data["timestamp"],
+                },
+            )
+            coin["volume_24h_usd"] += pair_data["volume_24h_usd"]
+            coin["exchange_count"] += 1
+            pairs.append(
+                {
+                    "symbol": symbol,
+                    "exchange": exchange,
+                    "pair": pair_data["pair"],
+                    "quote_currency": pair_data["quote_currency"],
+                    "is_active": True,
+                    "last_seen": pair_data["timestamp"],
+                }
+            )
+
+    for coin in coins.values():
+        coin["market_cap"] = coin["price_usd"] * coin["circulating_supply"]
+    ranked = sorted(coins.values(), key=lambda c: c["market_cap"], reverse=True)
+    for rank, coin in enumerate(ranked, start=1):
+        coin["market_cap_rank"] = rank
+
+    db.execute(insert(Coin), ranked)
+    db.execute(insert(ExchangePair), pairs)
+    db.commit()
+    return [coin["symbol"] for coin in ranked]
+
+
+def seed_raw_history(db: Session, symbols: List[str], start: datetime, end: datetime, step: timedelta) -> int:
+    """Raw ticks for every symbol on every seed exchange, one per step in [start, end)"""
+    rng = random.Random(7)
+    rows = []
+    for symbol in symbols:
+        for exchange in SEED_EXCHANGES:
+            price = 10 ** rng.uniform(-2, 4)
+            timestamp = start
+            while timestamp < end:
+                price *= 1 + rng.gauss(0, 0.001)
+                rows.append(
+                    {
+                        "symbol": symbol,
+                        "exchange": exchange,
+                        "price_usd": round(price, 8),
+                        "volume_24h_usd": round(rng.uniform(1e4, 1e8), 2),
+                        "timestamp": timestamp,
+                    }
+                )
+                timestamp += step
+
+    _insert_chunked(db, PriceHistoryRaw, rows)
+    return len(rows)
+
+
+def seed_candles(db: Session, table, symbols: List[str], start: datetime, end: datetime, bucket: timedelta) -> int:
+    """OHLC candles for every symbol on every seed exchange, one per bucket in [start, end)"""
+    rng = random.Random(11)
+    rows = []
+    for symbol in symbols:
+        for exchange in SEED_EXCHANGES:
+            price = 10 ** rng.uniform(-2, 4)
+            timestamp = start
+            while timestamp < end:
+                open_price = price
+                price *= 1 + rng.gauss(0, 0.01)
+                rows.append(
+                    {
+                        "symbol": symbol,
+                        "exchange": exchange,
+                        "price_open": round(open_price, 8),
+                        "price_close": round(price, 8),
+                        "price_high": round(max(open_price, price) * 1.005, 8),
+                        "price_low": round(min(open_price, price) * 0.995, 8),
+                        "volume_sum": round(rng.uniform(1e4, 1e8), 2),
+                        "timestamp": timestamp,
+                    }
+                )
+                timestamp += bucket
+
+    _insert_chunked(db, table, rows)
+    return len(rows)
+
+
+def _insert_chunked(db: Session, table, rows: List[Dict[str, Any]], chunk_size: int = 10000):
+    intern_history_keys(db.get_bind(), {row["symbol"] for row in rows}, {row["exchange"] for row in rows})
+    for i in range(0, len(rows), chunk_size):
+        db.execute(insert(table), rows[i : i + chunk_size])
+    db.commit()
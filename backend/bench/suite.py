@@ -0,0 +1,727 @@
+"""
+Benchmark suite for the tick pipeline, OHLC rollups and read endpoints
+
+    python -m bench.suite                              # run everything, write bench/results/suite-<timestamp>.json
+    python -m bench.suite --only aggregate_exchange_data,coins_list
+    python -m bench.suite --check                      # exit 1 on a failed request or a result over bench/budgets.json
+    python -m bench.suite --compare bench/results/suite-previous.json
+
+Every benchmark gets a fresh database (temporary SQLite unless --database-url is given) seeded with synthetic data
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from app.config import COMPACT_HISTORY_SCHEMA
+from bench.db import create_bench_database, drop_bench_database, table_sizes
+from bench.results import summarize, write_results
+from bench.seed import seed_candles, seed_coins, seed_raw_history
+from bench.server import ThreadedServer
+from bench.synthetic import synthetic_exchange_data
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), "budgets.json")
+
+
+@dataclass
+class SuiteConfig:
+    pairs: int = 10000
+    repeat: int = 5
+    rollup_symbols: int = 200
+    requests: int = 200
+    list_requests: int = 50
+    concurrency: int = 16
+    database_url: Optional[str] = None
+    seed: int = 42
+
+
+BENCHMARKS: Dict[str, Callable[[SuiteConfig], Dict[str, Any]]] = {}
+
+
+def benchmark(name: str):
+    """Register a benchmark function under a stable name (the key used in results and budgets)"""
+
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+
+    return register
+
+
+def time_runs(run: Callable[[], Any], repeat: int, setup: Optional[Callable[[], Any]] = None) -> List[float]:
+    """Wall time of run() in ms, repeat times; setup() runs untimed before each run"""
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+class BenchDatabase:
+    """Fresh database per benchmark: `with BenchDatabase(config) as session_factory: ...`"""
+
+    def __init__(self, config: SuiteConfig):
+        self.config = config
+
+    def __enter__(self):
+        self.engine, session_factory = create_bench_database(self.config.database_url)
+        return session_factory
+
+    def __exit__(self, *exc):
+        drop_bench_database(self.engine)
+
+
+# ==================== TICK PIPELINE ====================
+
+
+@benchmark("aggregate_exchange_data")
+def bench_aggregate_exchange_data(config: SuiteConfig) -> Dict[str, Any]:
+    from app.services import PriceService
+
+    exchange_data = synthetic_exchange_data(config.pairs, config.seed)
+    price_service = PriceService(db=None)
+    samples = time_runs(lambda: price_service.aggregate_exchange_data(exchange_data), config.repeat)
+    return {**summarize(samples), "pairs": config.pairs}
+
+
+@benchmark("store_price_history")
+def bench_store_price_history(config: SuiteConfig) -> Dict[str, Any]:
+    from app.services import PriceService
+    from app.services.raw_history import raw_history_writer
+
+    exchange_data = synthetic_exchange_data(config.pairs, config.seed)
+    with BenchDatabase(config) as session_factory:
+        db = session_factory()
+        try:
+            price_service = PriceService(db)
+            # Every timed run is a first sighting (all rows written); an unchanged repeat tick is reported separately
+            samples = time_runs(
+                lambda: price_service.store_price_history(exchange_data), config.repeat, setup=raw_history_writer.reset
+            )
+            unchanged_rows = price_service.store_price_history(exchange_data)
+        finally:
+            db.close()
+    return {**summarize(samples), "pairs": config.pairs, "unchanged_tick_rows": unchanged_rows}
+
+
+@benchmark("bulk_upsert_coins")
+def bench_bulk_upsert_coins(config: SuiteConfig) -> Dict[str, Any]:
+    from app.services import CoinService, PriceService
+
+    exchange_data = synthetic_exchange_data(config.pairs, config.seed)
+    aggregated_coins = PriceService(db=None).aggregate_exchange_data(exchange_data)
+    with BenchDatabase(config) as session_factory:
+        db = session_factory()
+        try:
+            seed_coins(db, exchange_data, config.seed)
+            coin_service = CoinService(db)
+            samples = time_runs(lambda: coin_service.bulk_upsert_coins(aggregated_coins), config.repeat)
+        finally:
+            db.close()
+    return {**summarize(samples), "coins": len(aggregated_coins)}
+
+
+# ==================== TICKER PARSING ====================
+
+
+def _ticker_payloads(config: SuiteConfig) -> Dict[str, bytes]:
+    """
+    Raw exchange response bodies for a market of config.pairs / 2 symbols
+    Binance and MEXC get one extra near-zero-volume row per listed pair, roughly the live share of dead pairs
+    """
+    from bench.synthetic import SyntheticMarket
+
+    market = SyntheticMarket(max(2, config.pairs // 2), seed=config.seed)
+    payloads = {}
+    for name, rows in (("binance", market.binance_ticker_24hr()), ("mexc", market.mexc_ticker_24hr())):
+        dust = [market._spot_ticker(f"{row['symbol']}FDUSD", 1.0, 0.0, 1.0) for row in rows]
+        payloads[name] = json.dumps(rows + dust).encode()
+    payloads["kraken_pairs"] = json.dumps(market.kraken_asset_pairs()).encode()
+    payloads["kraken_ticker"] = json.dumps(market.kraken_ticker()).encode()
+    payloads["binance_info"] = json.dumps(market.binance_exchange_info()).encode()
+    payloads["mexc_info"] = json.dumps(market.mexc_exchange_info()).encode()
+    return payloads
+
+
+def _parsing_exchange_service(payloads: Dict[str, bytes]):
+    """ExchangeService whose pair tables are compiled from the synthetic metadata (never the shared disk cache)"""
+    from app.services import ExchangeService
+    from app.services.exchange_metadata import (
+        ExchangeMetadataCache,
+        compile_exchange_info,
+        compile_kraken_asset_pairs,
+    )
+
+    metadata = ExchangeMetadataCache(os.devnull)
+    metadata.update("binance", compile_exchange_info(json.loads(payloads["binance_info"])))
+    metadata.update("mexc", compile_exchange_info(json.loads(payloads["mexc_info"])))
+    metadata.update("kraken", compile_kraken_asset_pairs(json.loads(payloads["kraken_pairs"])))
+
+    exchange_service = ExchangeService(db=None)
+    exchange_service.metadata = metadata
+    return exchange_service
+
+
+def _parse_benchmark(
+    config: SuiteConfig, payloads: Dict[str, bytes], names: List[str], parse_name: str
+) -> Dict[str, Any]:
+    """
+    Decode-only time (json vs orjson), then full parse+normalize time and peak memory with and without
+    the incremental path (median_ms is the default full-decode path)
+    """
+    import orjson
+
+    bodies = [payloads[name] for name in names]
+    exchange_service = _parsing_exchange_service(payloads)
+    parse = getattr(exchange_service, parse_name)
+
+    def normalize(stream: bool):
+        exchange_service.stream_parsing = stream
+        return parse(*bodies)
+
+    def peak_kb(stream: bool) -> int:
+        tracemalloc.start()
+        try:
+            normalize(stream)
+            return tracemalloc.get_traced_memory()[1] // 1024
+        finally:
+            tracemalloc.stop()
+
+    full_pairs = len(normalize(False))
+    streamed_pairs = len(normalize(True))
+    stream_samples = time_runs(lambda: normalize(True), config.repeat)
+    samples = time_runs(lambda: normalize(False), config.repeat)
+
+    return {
+        **summarize(samples),
+        "stream_median_ms": summarize(stream_samples)["median_ms"],
+        "json_decode_ms": summarize(time_runs(lambda: [json.loads(b) for b in bodies], config.repeat))["median_ms"],
+        "orjson_decode_ms": summarize(time_runs(lambda: [orjson.loads(b) for b in bodies], config.repeat))["median_ms"],
+        "peak_kb": peak_kb(False),
+        "stream_peak_kb": peak_kb(True),
+        "payload_bytes": sum(len(b) for b in bodies),
+        "pairs": full_pairs,
+        "pairs_match": full_pairs == streamed_pairs,
+    }
+
+
+@benchmark("parse_binance")
+def bench_parse_binance(config: SuiteConfig) -> Dict[str, Any]:
+    return _parse_benchmark(config, _ticker_payloads(config), ["binance"], "parse_binance_tickers")
+
+
+@benchmark("parse_kraken")
+def bench_parse_kraken(config: SuiteConfig) -> Dict[str, Any]:
+    return _parse_benchmark(config, _ticker_payloads(config), ["kraken_ticker"], "parse_kraken_tickers")
+
+
+@benchmark("parse_mexc")
+def bench_parse_mexc(config: SuiteConfig) -> Dict[str, Any]:
+    return _parse_benchmark(config, _ticker_payloads(config), ["mexc"], "parse_mexc_tickers")
+
+
+@benchmark("quote_conversion")
+def bench_quote_conversion(config: SuiteConfig) -> Dict[str, Any]:
+    """Build the per-tick conversion graph over every parsed pair and fill the USD columns"""
+    from app.services.quote_conversion import QuoteConversionGraph
+
+    payloads = _ticker_payloads(config)
+    exchange_service = _parsing_exchange_service(payloads)
+    exchange_data: Dict[str, Any] = {}
+
+    def parse():
+        exchange_data["binance"] = exchange_service.parse_binance_tickers(payloads["binance"])
+        exchange_data["kraken"] = exchange_service.parse_kraken_tickers(payloads["kraken_ticker"])
+        exchange_data["mexc"] = exchange_service.parse_mexc_tickers(payloads["mexc"])
+
+    def convert():
+        QuoteConversionGraph.from_batches(exchange_data).apply_all(exchange_data)
+
+    samples = time_runs(convert, config.repeat, setup=parse)
+    priced = sum(int(batch.priced_mask().sum()) for batch in exchange_data.values())
+    return {**summarize(samples), "pairs": sum(len(batch) for batch in exchange_data.values()), "priced": priced}
+
+
+# ==================== OHLC ROLLUPS ====================
+
+
+@benchmark("history_storage")
+def bench_history_storage(config: SuiteConfig) -> Dict[str, Any]:
+    """
+    Insert time for an hour of raw ticks, then bytes per row of the raw and 5m tables in the configured history
+    layout (run once with COMPACT_HISTORY_SCHEMA=true and once without, and --compare the two)
+    """
+    from app.models import PriceHistory5m, PriceHistoryRaw
+
+    symbols = [f"SYM{i:05d}" for i in range(config.rollup_symbols)]
+    end = datetime.now(UTC).replace(minute=0, second=0, microsecond=0)
+
+    with BenchDatabase(config) as session_factory:
+        engine = session_factory.kw["bind"]
+        db = session_factory()
+        try:
+
+            def clear_raw():
+                db.query(PriceHistoryRaw).delete()
+                db.commit()
+
+            rows = []
+            samples = time_runs(
+                lambda: rows.append(
+                    seed_raw_history(db, symbols, end - timedelta(hours=1), end, timedelta(seconds=30))
+                ),
+                config.repeat,
+                setup=clear_raw,
+            )
+            candles = seed_candles(db, PriceHistory5m, symbols, end - timedelta(days=1), end, timedelta(minutes=5))
+            sizes = {"raw": table_sizes(engine, "price_history_raw"), "5m": table_sizes(engine, "price_history_5m")}
+        finally:
+            db.close()
+
+    results = {**summarize(samples), "layout": "compact" if COMPACT_HISTORY_SCHEMA else "decimal"}
+    for name, count in (("raw", rows[-1]), ("5m", candles)):
+        results[f"{name}_rows"] = count
+        results[f"{name}_bytes_per_row"] = round(sizes[name]["table_bytes"] / count, 1)
+        results[f"{name}_index_bytes_per_row"] = round(sizes[name]["index_bytes"] / count, 1)
+    return results
+
+
+def _rollup_benchmark(config: SuiteConfig, source, target, bucket: timedelta, window_end: datetime, run_name: str):
+    """Seed two closed target buckets of source rows, then time one rollup run (target emptied before each run)"""
+    from app.services import AggregationService
+
+    symbols = [f"SYM{i:05d}" for i in range(config.rollup_symbols)]
+    start = window_end - 2 * bucket
+
+    with BenchDatabase(config) as session_factory:
+        db = session_factory()
+        try:
+            if source.__tablename__ == "price_history_raw":
+                rows = seed_raw_history(db, symbols, start, window_end, timedelta(seconds=30))
+            else:
+                source_bucket = {
+                    "price_history_5m": timedelta(minutes=5),
+                    "price_history_1h": timedelta(hours=1),
+                    "price_history_1d": timedelta(days=1),
+                }[source.__tablename__]
+                rows = seed_candles(db, source, symbols, start, window_end, source_bucket)
+
+            def clear_target():
+                db.query(target).delete()
+                db.commit()
+
+            aggregation_service = AggregationService(db)
+            samples = time_runs(getattr(aggregation_service, run_name), config.repeat, setup=clear_target)
+            created = db.query(target).count()
+        finally:
+            db.close()
+
+    return {**summarize(samples), "source_rows": rows, "candles": created}
+
+
+@benchmark("create_5m_aggregates")
+def bench_create_5m_aggregates(config: SuiteConfig) -> Dict[str, Any]:
+    from app.models import PriceHistory5m, PriceHistoryRaw
+
+    now = datetime.now(UTC).replace(second=0, microsecond=0)
+    window_end = now.replace(minute=now.minute // 5 * 5)
+    return _rollup_benchmark(
+        config, PriceHistoryRaw, PriceHistory5m, timedelta(minutes=5), window_end, "create_5m_aggregates"
+    )
+
+
+@benchmark("create_1h_aggregates")
+def bench_create_1h_aggregates(config: SuiteConfig) -> Dict[str, Any]:
+    from app.models import PriceHistory1h, PriceHistory5m
+
+    window_end = datetime.now(UTC).replace(minute=0, second=0, microsecond=0)
+    return _rollup_benchmark(
+        config, PriceHistory5m, PriceHistory1h, timedelta(hours=1), window_end, "create_1h_aggregates"
+    )
+
+
+@benchmark("create_1d_aggregates")
+def bench_create_1d_aggregates(config: SuiteConfig) -> Dict[str, Any]:
+    from app.models import PriceHistory1d, PriceHistory1h
+
+    window_end = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    return _rollup_benchmark(
+        config, PriceHistory1h, PriceHistory1d, timedelta(days=1), window_end, "create_1d_aggregates"
+    )
+
+
+@benchmark("create_1w_aggregates")
+def bench_create_1w_aggregates(config: SuiteConfig) -> Dict[str, Any]:
+    from app.models import PriceHistory1d, PriceHistory1w
+
+    today = datetime.now(UTC).replace(hour=0, minute=0, second=0, microsecond=0)
+    window_end = today - timedelta(days=today.weekday())
+    return _rollup_benchmark(
+        config, PriceHistory1d, PriceHistory1w, timedelta(weeks=1), window_end, "create_1w_aggregates"
+    )
+
+
+# ==================== READ ENDPOINTS ====================
+
+
+def _api_server(session_factory) -> ThreadedServer:
+    """The API router on its own (no lifespan: no scheduler, no startup backfill) bound to the bench database"""
+    from fastapi import FastAPI
+
+    from app.api.routes import router
+    from app.database import get_db
+
+    def bench_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = bench_db
+    return ThreadedServer(app)
+
+
+async def _load(base_url: str, paths: List[str], concurrency: int) -> Dict[str, Any]:
+    """Issue every path with `concurrency` clients in flight; per-request latency plus overall throughput"""
+    queue: asyncio.Queue = asyncio.Queue()
+    for path in paths:
+        queue.put_nowait(path)
+
+    samples: List[float] = []
+    errors = 0
+    first_error: Optional[str] = None
+
+    async def client_loop(client: httpx.AsyncClient):
+        nonlocal errors, first_error
+        while True:
+            try:
+                path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            response = await client.get(path)
+            samples.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                errors += 1
+                first_error = first_error or f"{response.status_code} {path}: {response.text[:200]}"
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        **summarize(samples),
+        "requests": len(paths),
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput_rps": round(len(paths) / elapsed, 2),
+        "first_error": first_error,
+    }
+
+
+@benchmark("coins_list")
+def bench_coins_list(config: SuiteConfig) -> Dict[str, Any]:
+    """GET /coins?size=500 across the first pages"""
+    exchange_data = synthetic_exchange_data(config.pairs, config.seed)
+    with BenchDatabase(config) as session_factory:
+        db = session_factory()
+        try:
+            coin_count = len(seed_coins(db, exchange_data, config.seed))
+        finally:
+            db.close()
+
+        pages = max(1, min(4, coin_count // 500))
+        paths = [f"/coins?size=500&page={i % pages + 1}" for i in range(config.list_requests)]
+        with _api_server(session_factory) as server:
+            return asyncio.run(_load(server.base_url, paths, config.concurrency))
+
+
+@benchmark("coins_cursor_pages")
+def bench_coins_cursor_pages(config: SuiteConfig) -> Dict[str, Any]:
+    """GET /coins?size=500 following next_cursor through every page, one client (keyset pagination)"""
+    exchange_data = synthetic_exchange_data(config.pairs, config.seed)
+    with BenchDatabase(config) as session_factory:
+        db = session_factory()
+        try:
+            seed_coins(db, exchange_data, config.seed)
+        finally:
+            db.close()
+
+        samples: List[float] = []
+        with _api_server(session_factory) as server, httpx.Client(base_url=server.base_url, timeout=120.0) as client:
+            for _ in range(config.repeat):
+                cursor = None
+                while True:
+                    started = time.perf_counter()
+                    response = client.get("/coins", params={"size": 500, **({"cursor": cursor} if cursor else {})})
+                    samples.append((time.perf_counter() - started) * 1000)
+                    response.raise_for_status()
+                    cursor = response.json()["next_cursor"]
+                    if not cursor:
+                        break
+        return {**summarize(samples), "pages": len(samples) // config.repeat}
+
+
+@benchmark("page_serialization")
+def bench_page_serialization(config: SuiteConfig) -> Dict[str, Any]:
+    """
+    Rendering one 500-coin /coins page, without the database: render() of the pre-shaped dicts (orjson) vs the
+    previous path (CoinResponse models, response_model validation and encoding by FastAPI, JSONResponse)
+    """
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+
+    from app.api.responses import render
+    from app.schemas import CoinResponse, PaginatedResponse
+    from app.services.coin_service import CoinService
+
+    exchange_data = synthetic_exchange_data(config.pairs, config.seed)
+    with BenchDatabase(config) as session_factory:
+        db = session_factory()
+        try:
+            seed_coins(db, exchange_data, config.seed)
+            coin_service = CoinService(db)
+            coins = coin_service.get_coins_with_exchange_pairs(coin_service.get_coins(limit=500))
+        finally:
+            db.close()
+
+    model = PaginatedResponse[CoinResponse]
+    field = create_response_field(name="page_serialization", type_=model)
+    page = {"total": len(coins), "page": 1, "size": 500, "pages": 1, "has_next": False, "has_previous": False}
+    loop = asyncio.new_event_loop()
+
+    def validated() -> bytes:
+        content = model(items=[CoinResponse(**coin) for coin in coins], **page)
+        return JSONResponse(loop.run_until_complete(serialize_response(field=field, response_content=content))).body
+
+    def rendered() -> bytes:
+        return render(model, {"items": coins, **page, "next_cursor": None}).body
+
+    try:
+        validated_samples = time_runs(validated, config.repeat * 4)
+        samples = time_runs(rendered, config.repeat * 4)
+    finally:
+        loop.close()
+
+    validated_ms = summarize(validated_samples)["median_ms"]
+    stats = summarize(samples)
+    return {
+        **stats,
+        "coins": len(coins),
+        "bytes": len(rendered()),
+        "validated_median_ms": validated_ms,
+        "speedup": round(validated_ms / stats["median_ms"], 1) if stats["median_ms"] else None,
+    }
+
+
+# Columns of a markets table page (?fields=)
+TABLE_FIELDS = "symbol,name,price_usd,price_change_24h,market_cap,volume_24h_usd,market_cap_rank"
+TABLE_FORMATS = {
+    "objects": {},
+    "sparse": {"fields": TABLE_FIELDS},
+    "columns": {"fields": TABLE_FIELDS, "format": "columns"},
+}
+
+
+@benchmark("coins_table_formats")
+def bench_coins_table_formats(config: SuiteConfig) -> Dict[str, Any]:
+    """GET /coins?size=500 as full objects vs a ?fields= projection vs format=columns: latency and payload size"""
+    exchange_data = synthetic_exchange_data(config.pairs, config.seed)
+    with BenchDatabase(config) as session_factory:
+        db = session_factory()
+        try:
+            seed_coins(db, exchange_data, config.seed)
+        finally:
+            db.close()
+
+        result: Dict[str, Any] = {}
+        stats: Dict[str, Any] = {}
+        with _api_server(session_factory) as server, httpx.Client(base_url=server.base_url, timeout=120.0) as client:
+            for label, params in TABLE_FORMATS.items():
+                samples: List[float] = []
+                for _ in range(config.repeat):
+                    started = time.perf_counter()
+                    response = client.get("/coins", params={"size": 500, **params})
+                    samples.append((time.perf_counter() - started) * 1000)
+                    response.raise_for_status()
+                stats = summarize(samples)
+                result[f"{label}_median_ms"] = stats["median_ms"]
+                result[f"{label}_bytes"] = len(response.content)
+        # Headline stats are the columnar format's (the last one)
+        return {**stats, **result}
+
+
+@benchmark("coin_search")
+def bench_coin_search(config: SuiteConfig) -> Dict[str, Any]:
+    """Typeahead: every keystroke prefix of the top coins' symbols and names through the search index (vs ILIKE)"""
+    from sqlalchemy import or_
+
+    from app.models import Coin
+    from app.services.search_index import CoinSearchIndex
+
+    exchange_data = synthetic_exchange_data(config.pairs, config.seed)
+    with BenchDatabase(config) as session_factory:
+        db = session_factory()
+        try:
+            symbols = seed_coins(db, exchange_data, config.seed)
+            queries = [word[:i] for word in symbols[:20] + ["Bitcoin", "Ethereum"] for i in range(1, len(word) + 1)]
+
+            index = CoinSearchIndex()
+            build_ms = time_runs(lambda: index.rebuild(db.query(Coin.symbol, Coin.name, Coin.market_cap).all()), 1)[0]
+            samples = time_runs(lambda: [index.search(db, query) for query in queries], config.repeat)
+
+            def ilike():
+                for query in queries:
+                    term = f"%{query.upper()}%"
+                    db.query(Coin).filter(or_(Coin.symbol.ilike(term), Coin.name.ilike(term))).order_by(
+                        Coin.market_cap_rank
+                    ).limit(10).all()
+
+            ilike_samples = time_runs(ilike, config.repeat)
+        finally:
+            db.close()
+
+    per_query = [sample / len(queries) for sample in samples]
+    return {
+        **summarize(per_query),
+        "queries": len(queries),
+        "build_ms": round(build_ms, 1),
+        "ilike_median_ms": summarize([sample / len(queries) for sample in ilike_samples])["median_ms"],
+    }
+
+
+@benchmark("coin_chart")
+def bench_coin_chart(config: SuiteConfig) -> Dict[str, Any]:
+    """GET /coins/{symbol}/chart?timeframe=7d for the top 50 coins (hourly candles)"""
+    from app.models import PriceHistory1h
+
+    exchange_data = synthetic_exchange_data(config.pairs, config.seed)
+    with BenchDatabase(config) as session_factory:
+        db = session_factory()
+        try:
+            symbols = seed_coins(db, exchange_data, config.seed)[:50]
+            end = datetime.now(UTC).replace(minute=0, second=0, microsecond=0)
+            seed_candles(db, PriceHistory1h, symbols, end - timedelta(days=7), end, timedelta(hours=1))
+        finally:
+            db.close()
+
+        paths = [f"/coins/{symbols[i % len(symbols)]}/chart?timeframe=7d" for i in range(config.requests)]
+        with _api_server(session_factory) as server:
+            return asyncio.run(_load(server.base_url, paths, config.concurrency))
+
+
+# ==================== BUDGETS & COMPARISON ====================
+
+
+def check_budgets(results: Dict[str, Dict[str, Any]], budgets: Dict[str, Dict[str, float]]) -> List[str]:
+    """
+    One message per metric that exceeds its budget (budgets are upper bounds on result metrics), plus one per
+    benchmark whose requests failed - a fast median means nothing if some of the requests errored
+    """
+    failures = []
+    for name, stats in results.items():
+        if stats.get("errors"):
+            failures.append(f"{name}: {stats['errors']} failed requests (first: {stats.get('first_error')})")
+    for name, limits in budgets.items():
+        if name not in results:
+            continue
+        for metric, limit in limits.items():
+            value = results[name].get(metric)
+            if value is not None and value > limit:
+                failures.append(f"{name}.{metric} = {value} exceeds budget {limit}")
+    return failures
+
+
+def compare(results: Dict[str, Dict[str, Any]], previous_path: str):
+    """Print median change against an earlier results file"""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = json.load(f)["results"]
+
+    print(f"\nCompared to {previous_path}:")
+    for name, stats in results.items():
+        before = previous.get(name, {}).get("median_ms")
+        if before:
+            change = (stats["median_ms"] - before) / before * 100
+            print(f"  {name:<26} {before:>10.1f} -> {stats['median_ms']:>10.1f} ms  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", help=f"comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--pairs", type=int, default=SuiteConfig.pairs)
+    parser.add_argument("--repeat", type=int, default=SuiteConfig.repeat)
+    parser.add_argument("--rollup-symbols", type=int, default=SuiteConfig.rollup_symbols)
+    parser.add_argument("--requests", type=int, default=SuiteConfig.requests, help="chart requests")
+    parser.add_argument("--list-requests", type=int, default=SuiteConfig.list_requests, help="/coins?size=500 requests")
+    parser.add_argument("--concurrency", type=int, default=SuiteConfig.concurrency)
+    parser.add_argument("--database-url", help="defaults to a temporary SQLite file per benchmark")
+    parser.add_argument("--output", help="results file (default bench/results/suite-<timestamp>.json)")
+    parser.add_argument("--budgets", default=BUDGETS_PATH)
+    parser.add_argument("--check", action="store_true", help="exit 1 when a request fails or a budget is exceeded")
+    parser.add_argument("--compare", help="earlier results file to diff medians against")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    config = SuiteConfig(
+        pairs=args.pairs,
+        repeat=args.repeat,
+        rollup_symbols=args.rollup_symbols,
+        requests=args.requests,
+        list_requests=args.list_requests,
+        concurrency=args.concurrency,
+        database_url=args.database_url,
+    )
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+
+    results = {}
+    for name in names:
+        results[name] = BENCHMARKS[name](config)
+        stats = results[name]
+        print(f"{name:<26} median {stats['median_ms']:>10.1f} ms   p95 {stats['p95_ms']:>10.1f} ms")
+
+    run_config = {
+        **vars(config),
+        "database_url": None if not config.database_url else "custom",
+        "history_layout": "compact" if COMPACT_HISTORY_SCHEMA else "decimal",
+    }
+    print(f"Results written to {write_results('suite', run_config, results, args.output)}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+    if args.check:
+        with open(args.budgets, encoding="utf-8") as f:
+            failures = check_budgets(results, json.load(f))
+        if failures:
+            print("\nBudget exceeded:", file=sys.stderr)
+            for failure in failures:
+                print(f"  {failure}", file=sys.stderr)
+            sys.exit(1)
+        print("All benchmarks within budget")
+
+
+if __name__ == "__main__":
+    main()
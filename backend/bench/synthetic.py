@@ -0,0 +1,194 @@
+import random
+import string
+from datetime import UTC, datetime
+from typing import Any, Dict, List
+
+
+class SyntheticMarket:
+    """
+    Deterministic N-symbol market rendered in each exchange's ticker format
+    Every symbol trades on Binance and MEXC against USDT (plus BTC/ETH quotes for a share of them),
+    and a smaller share is listed on Kraken. Prices follow a random walk advanced once per tick; with idle_share
+    set, that share of the long tail doesn't trade (keeps its price) on any given tick
+    """
+
+    def __init__(
+        self,
+        n_symbols: int,
+        seed: int = 42,
+        kraken_share: float = 0.3,
+        cross_share: float = 0.25,
+        idle_share: float = 0.0,
+    ):
+        self.rng = random.Random(seed)
+        self.tick = 0
+        self.idle_share = idle_share
+
+        self.symbols = ["BTC", "ETH"] + self._make_symbols(max(0, n_symbols - 2))
+        self.prices = {"BTC": 65000.0, "ETH": 3200.0}
+        self.volumes = {"BTC": 2.5e9, "ETH": 1.2e9}
+        for symbol in self.symbols[2:]:
+            self.prices[symbol] = 10 ** self.rng.uniform(-4, 3)
+            self.volumes[symbol] = 10 ** self.rng.uniform(4, 8)
+
+        self.opens = dict(self.prices)
+        self.kraken_symbols = [s for s in self.symbols if s in ("BTC", "ETH") or self.rng.random() < kraken_share]
+        self.cross_symbols = [s for s in self.symbols[2:] if self.rng.random() < cross_share]
+
+    def _make_symbols(self, count: int) -> List[str]:
+        """Unique 3-6 letter tickers (no X/Z, which Kraken uses as asset-class prefixes)"""
+        letters = [c for c in string.ascii_uppercase if c not in "XZ"]
+        seen = {"BTC", "ETH", "USDT", "USDC", "USD", "BUSD", "TUSD", "BNB"}
+        symbols = []
+        while len(symbols) < count:
+            symbol = "".join(self.rng.choices(letters, k=self.rng.randint(3, 6)))
+            if symbol not in seen:
+                seen.add(symbol)
+                symbols.append(symbol)
+        return symbols
+
+    @property
+    def pair_count(self) -> int:
+        """Number of tradable pairs across all exchanges"""
+        return 2 * len(self.symbols) + 2 * len(self.cross_symbols) + len(self.kraken_symbols)
+
+    def advance(self):
+        """Move every price one random-walk step"""
+        self.tick += 1
+        for symbol, price in self.prices.items():
+            if self.idle_share and symbol not in ("BTC", "ETH") and self.rng.random() < self.idle_share:
+                continue
+            self.prices[symbol] = price * (1 + self.rng.gauss(0, 0.002))
+
+    # ==================== EXCHANGE PAYLOADS ====================
+
+    def _spot_ticker(self, pair: str, price: float, volume_usd: float, open_price: float) -> Dict[str, Any]:
+        """Binance / MEXC 24hr ticker row (both APIs return numbers as strings)"""
+        return {
+            "symbol": pair,
+            "lastPrice": f"{price:.8f}",
+            "highPrice": f"{max(price, open_price) * 1.02:.8f}",
+            "lowPrice": f"{min(price, open_price) * 0.98:.8f}",
+            "priceChangePercent": f"{(price - open_price) / open_price * 100:.3f}",
+            "volume": f"{volume_usd / price:.4f}",
+            "quoteVolume": f"{volume_usd:.2f}",
+        }
+
+    def _spot_tickers(self, volume_scale: float) -> List[Dict[str, Any]]:
+        rows = []
+        for symbol in self.symbols:
+            price, volume = self.prices[symbol], self.volumes[symbol] * volume_scale
+            rows.append(self._spot_ticker(f"{symbol}USDT", price, volume, self.opens[symbol]))
+        for symbol in self.cross_symbols:
+            for quote in ("BTC", "ETH"):
+                price = self.prices[symbol] / self.prices[quote]
+                volume = self.volumes[symbol] * volume_scale * 0.1 / self.prices[quote]
+                open_price = self.opens[symbol] / self.opens[quote]
+                rows.append(self._spot_ticker(f"{symbol}{quote}", price, volume, open_price))
+        return rows
+
+    def binance_ticker_24hr(self) -> List[Dict[str, Any]]:
+        return self._spot_tickers(volume_scale=1.0)
+
+    def mexc_ticker_24hr(self) -> List[Dict[str, Any]]:
+        return self._spot_tickers(volume_scale=0.4)
+
+    def _exchange_info(self) -> Dict[str, Any]:
+        """Binance / MEXC /exchangeInfo (only the fields the pair table uses)"""
+        markets = [(symbol, "USDT") for symbol in self.symbols]
+        markets += [(symbol, quote) for symbol in self.cross_symbols for quote in ("BTC", "ETH")]
+        return {
+            "symbols": [
+                {"symbol": f"{base}{quote}", "status": "TRADING", "baseAsset": base, "quoteAsset": quote}
+                for base, quote in markets
+            ]
+        }
+
+    def binance_exchange_info(self) -> Dict[str, Any]:
+        return self._exchange_info()
+
+    def mexc_exchange_info(self) -> Dict[str, Any]:
+        return self._exchange_info()
+
+    def _kraken_asset(self, symbol: str) -> str:
+        return {"BTC": "XXBT", "ETH": "XETH"}.get(symbol, symbol)
+
+    def kraken_asset_pairs(self) -> Dict[str, Any]:
+        result = {}
+        for symbol in self.kraken_symbols:
+            asset = self._kraken_asset(symbol)
+            wsname = f"{'XBT' if symbol == 'BTC' else symbol}/USD"
+            result[f"{asset}ZUSD"] = {"altname": f"{symbol}USD", "wsname": wsname, "base": asset, "quote": "ZUSD"}
+        return {"error": [], "result": result}
+
+    def kraken_ticker(self) -> Dict[str, Any]:
+        result = {}
+        for symbol in self.kraken_symbols:
+            price, open_price = self.prices[symbol], self.opens[symbol]
+            volume = self.volumes[symbol] * 0.2 / price
+            result[f"{self._kraken_asset(symbol)}ZUSD"] = {
+                "c": [f"{price:.8f}", "1.0"],
+                "v": [f"{volume / 2:.4f}", f"{volume:.4f}"],
+                "h": [f"{price * 1.01:.8f}", f"{max(price, open_price) * 1.02:.8f}"],
+                "l": [f"{price * 0.99:.8f}", f"{min(price, open_price) * 0.98:.8f}"],
+                "o": f"{open_price:.8f}",
+            }
+        return {"error": [], "result": result}
+
+    # ==================== COINGECKO PAYLOADS ====================
+
+    def coingecko_coins_list(self) -> List[Dict[str, Any]]:
+        return [{"id": symbol.lower(), "symbol": symbol.lower(), "name": symbol.title()} for symbol in self.symbols]
+
+    def coingecko_markets(self, ids: List[str]) -> List[Dict[str, Any]]:
+        markets = []
+        for coin_id in ids:
+            symbol = coin_id.upper()
+            if symbol not in self.prices:
+                continue
+            supply = self.volumes[symbol] * 20 / self.prices[symbol]
+            markets.append(
+                {
+                    "id": coin_id,
+                    "symbol": coin_id,
+                    "name": symbol.title(),
+                    "current_price": self.prices[symbol],
+                    "market_cap": supply * self.prices[symbol],
+                    "circulating_supply": supply,
+                    "total_supply": supply * 1.2,
+                    "max_supply": None,
+                }
+            )
+        return markets
+
+
+def synthetic_exchange_data(n_pairs: int, seed: int = 42) -> Dict[str, Any]:
+    """
+    Already-parsed exchange data (the TickBatch per exchange that ExchangeService.fetch_all_exchange_data returns)
+    Pairs are spread over binance/kraken/mexc so each symbol trades on about three exchanges
+    """
+    from app.services.tick_batch import TickBatch
+
+    rng = random.Random(seed)
+    exchanges = ["binance", "kraken", "mexc"]
+    market = SyntheticMarket(max(2, n_pairs // len(exchanges)), seed=seed)
+    now = datetime.now(UTC)
+
+    exchange_data = {exchange: TickBatch(exchange, now) for exchange in exchanges}
+    for i in range(n_pairs):
+        symbol = market.symbols[i // len(exchanges) % len(market.symbols)]
+        exchange = exchanges[i % len(exchanges)]
+        price = market.prices[symbol] * (1 + rng.gauss(0, 0.001))
+        volume_usd = market.volumes[symbol] * rng.uniform(0.1, 1.0)
+        exchange_data[exchange].append(
+            symbol,
+            f"{symbol}USDT",
+            "USDT",
+            price,
+            price * 1.03,
+            price * 0.97,
+            rng.uniform(-10, 10),
+            volume_usd / price,
+            volume_usd,
+        )
+    return exchange_data